@@ -5,10 +5,16 @@
 # Data libraries
 import pandas     as     pd
 
+# Web libraries
+import requests
+
 # PostGreSQL communication libraries
-from   sqlalchemy                     import MetaData, Table, Column, Text, Date
+from   sqlalchemy                     import MetaData, Table, Column, Text, Date, inspect, text
 from   sqlalchemy.dialects.postgresql import insert
 
+# Modular functions
+from   modules.utils_download         import mtgjson_url
+
 
 
 ###################################################################################################
@@ -108,4 +114,143 @@ def recency_check_upload(schema_name, table_name, dataframe, engine):
                                                                ,'latest_version' : row['latest_version']})
             
             # Execute the statement
-            conn.execute(stmt)
\ No newline at end of file
+            conn.execute(stmt)
+
+
+
+# Function for fetching the current MTGJSON build metadata
+def fetch_meta(url=None, session=None, timeout=30):
+
+    """
+    Download MTGJSON's Meta.json, a tiny file holding the date and version of the
+    current build. Every artifact of a build shares this metadata, so it can be
+    compared with `raw_data.data_recency` before any large file is downloaded.
+
+    Parameters
+    ----------
+    url : str, optional
+        URL of the Meta.json file, defaults to the MTGJSON file server.
+    session : requests.Session, optional
+        Session used for the request.
+    timeout : float
+        Seconds to wait for the server before giving up.
+
+    Returns
+    -------
+    dict
+        The parsed Meta.json, with the same 'meta' key as every other MTGJSON file.
+    """
+
+    # Requesting the uncompressed metadata file
+    response = (session or requests).get(url or mtgjson_url('Meta.json'), timeout = timeout)
+    response.raise_for_status()
+
+    return response.json()
+
+
+
+# Function for reading the stored recency of a JSON type from PostgreSQL
+def stored_recency(schema_name, table_name, json_type, engine):
+
+    """
+    Read the date and version last uploaded for a JSON type from the recency table.
+
+    Parameters
+    ----------
+    schema_name : str
+        Name of the PostgreSQL schema where the table resides.
+    table_name : str
+        Name of the recency table, e.g. 'data_recency'.
+    json_type : str
+        The JSON dataset type/name used when the data was uploaded.
+    engine : sqlalchemy.engine.Engine
+        Engine connected to the database.
+
+    Returns
+    -------
+    pd.DataFrame
+        The matching rows with columns 'json_type', 'latest_date' and
+        'latest_version'. Empty if the table or the JSON type does not exist yet.
+    """
+
+    # Returning an empty frame if the recency table has not been created
+    if not inspect(engine).has_table(table_name, schema = schema_name):
+        return pd.DataFrame(columns = ['json_type', 'latest_date', 'latest_version'])
+
+    # Selecting the row for the JSON type
+    query = text(f"""
+                 SELECT json_type, latest_date, latest_version
+                 FROM {schema_name}.{table_name}
+                 WHERE json_type = :json_type
+                 """)
+
+    return pd.read_sql_query(query, con = engine, params = {'json_type' : json_type})
+
+
+
+# Function for comparing the latest and stored recency of a JSON type
+def update_required(df_latest, df_stored):
+
+    """
+    Compare the latest MTGJSON recency with the stored one.
+
+    Parameters
+    ----------
+    df_latest : pd.DataFrame
+        Output of `data_recency_check` for the latest MTGJSON build.
+    df_stored : pd.DataFrame
+        Output of `stored_recency` for the same JSON type.
+
+    Returns
+    -------
+    bool
+        True if nothing has been stored yet or the date or version differs.
+    """
+
+    # Nothing uploaded yet
+    if df_stored.empty:
+        return True
+
+    # Comparing as strings so dates read back from PostgreSQL match the ISO strings in the JSON
+    latest = df_latest.iloc[0]
+    stored = df_stored.iloc[0]
+
+    return (str(latest['latest_date'])    != str(stored['latest_date'])
+         or str(latest['latest_version']) != str(stored['latest_version']))
+
+
+
+# Function for checking whether a JSON type needs to be downloaded at all
+def preflight_recency_check(json_type, schema_name, table_name, engine, session=None):
+
+    """
+    Compare MTGJSON's Meta.json with the stored recency of a JSON type before any
+    large transfer, so unchanged data is never downloaded, decompressed or parsed.
+
+    Parameters
+    ----------
+    json_type : str
+        The JSON dataset type/name, as passed to `data_recency_check`.
+    schema_name : str
+        Name of the PostgreSQL schema where the recency table resides.
+    table_name : str
+        Name of the recency table, e.g. 'data_recency'.
+    engine : sqlalchemy.engine.Engine
+        Engine connected to the database.
+    session : requests.Session, optional
+        Session used for the Meta.json request.
+
+    Returns
+    -------
+    tuple of (bool, pd.DataFrame)
+        Whether the data needs updating, and the latest recency in the same
+        shape as `data_recency_check` so it can be uploaded afterwards.
+    """
+
+    # Latest recency from the tiny metadata file
+    df_latest = data_recency_check(fetch_meta(session = session), json_type)
+
+    # Stored recency from the database
+    df_stored = stored_recency(schema_name, table_name, json_type, engine)
+
+    return update_required(df_latest, df_stored), df_latest
\ No newline at end of file
@@ -0,0 +1,272 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+
+# Data libraries
+import pyarrow      as pa
+import pyarrow.json as pa_json
+
+# Modular functions
+from   modules.utils_json     import get_json_dumps
+from   modules.utils_pipeline import stream_mtgjson
+from   modules.utils_ragged   import ragged_arrow_table, ragged_types_mapper
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for rewriting AllPrintings into newline-delimited JSON files of cards and tokens
+def write_printings_ndjson(source
+                          ,cards_path
+                          ,tokens_path
+                          ,cache_path = None
+                          ,backend    = None
+                          ,session    = None):
+
+    """
+    Stream AllPrintings and rewrite its cards and tokens as newline-delimited
+    JSON, one card per line with the set code, name and release date injected.
+
+    The sets are written as soon as the streaming pipeline has parsed them, so
+    neither the whole document nor a flattened frame is ever held in memory.
+    The files can then be loaded with `read_ndjson_table`, whose multithreaded
+    Arrow reader replaces the per-set `pd.json_normalize` loop.
+
+    Parameters
+    ----------
+    source : str
+        URL or local path of AllPrintings.json.xz.
+    cards_path : str
+        Destination of the cards NDJSON file.
+    tokens_path : str
+        Destination of the tokens NDJSON file.
+    cache_path : str, optional
+        Local copy of the compressed file, see `stream_mtgjson`.
+    backend : str, optional
+        JSON backend used to serialise each card, see `utils_json`.
+    session : requests.Session, optional
+        Session used for the requests.
+
+    Returns
+    -------
+    tuple of (dict, pd.DataFrame)
+        The 'meta' of the file (for `data_recency_check`) and the per-stage
+        pipeline counters.
+    """
+
+    # Resolving the serialiser once instead of per card
+    dumps = get_json_dumps(backend)
+
+    # Creating the destination folders if needed
+    for path in [cards_path, tokens_path]:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+
+    with open(cards_path, 'wb') as cards_file, open(tokens_path, 'wb') as tokens_file:
+
+        # Writing every card and token of a set with the set columns injected
+        def write_set(set_code, set_data):
+            injected = {'setCode'        : set_code
+                       ,'setName'        : set_data.get('name')
+                       ,'setReleaseDate' : set_data.get('releaseDate')}
+            cards_file.write(b''.join(dumps({**card, **injected}) + b'\n' for card in set_data.get('cards', [])))
+            injected['tokenSetCode'] = set_data.get('tokenSetCode')
+            tokens_file.write(b''.join(dumps({**token, **injected}) + b'\n' for token in set_data.get('tokens', [])))
+
+        try:
+            top, df_stats = stream_mtgjson(source
+                                          ,on_item    = write_set
+                                          ,cache_path = cache_path
+                                          ,session    = session)
+        except BaseException:
+            # Never leaving a half written intermediate behind
+            cards_file.close()
+            tokens_file.close()
+            os.remove(cards_path)
+            os.remove(tokens_path)
+            raise
+
+    return top, df_stats
+
+
+
+# Function for loading a newline-delimited JSON file with the multithreaded Arrow reader
+def read_ndjson_table(path, block_size=16 * 1024 * 1024, use_threads=True, schema=None):
+
+    """
+    Load a newline-delimited JSON file into a typed Arrow table.
+
+    `pyarrow.json.read_json` splits the file into blocks that are parsed in
+    parallel by its C++ reader, and nested objects and lists become Arrow
+    struct and list columns instead of Python dictionaries.
+
+    Parameters
+    ----------
+    path : str
+        Path of the NDJSON file, e.g. written by `write_printings_ndjson`.
+    block_size : int
+        Number of bytes per block handed to each reader thread.
+    use_threads : bool
+        Whether to parse the blocks on multiple cores.
+    schema : pyarrow.Schema, optional
+        Explicit schema for (some of) the columns, the rest are inferred.
+
+    Returns
+    -------
+    pyarrow.Table
+        One row per line of the file (no columns if the file is empty).
+    """
+
+    # The Arrow reader rejects empty files, e.g. a set list without tokens
+    if os.path.getsize(path) == 0:
+        return pa.table({})
+
+    read_options  = pa_json.ReadOptions(use_threads = use_threads
+                                       ,block_size  = block_size)
+    parse_options = pa_json.ParseOptions(explicit_schema           = schema
+                                        ,newlines_in_values        = False
+                                        ,unexpected_field_behavior = 'infer')
+
+    return pa_json.read_json(path, read_options = read_options, parse_options = parse_options)
+
+
+
+# Function for converting a printings Arrow table into the renamed and sorted dataframe
+def printings_table_to_pandas(table, columns__rename, ragged=False):
+
+    """
+    Sort a cards or tokens Arrow table by release date and set code, convert it
+    to pandas and rename its columns.
+
+    Parameters
+    ----------
+    table : pyarrow.Table
+        Output of `read_ndjson_table`.
+    columns__rename : dict
+        Renaming dictionary, e.g. `columns__rename_cards`.
+    ragged : bool
+        Keep the lists of strings and integers (colors, types, printings,
+        artistIds, ...) as dictionary encoded ArrowDtype columns, see
+        `utils_ragged`, instead of one NumPy array per row.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per card or token.
+    """
+
+    types_mapper = None
+    if ragged:
+        table        = ragged_arrow_table(table)
+        types_mapper = ragged_types_mapper
+
+    # Nothing to sort in an empty table
+    if table.num_rows == 0:
+        return table.to_pandas(types_mapper = types_mapper).rename(columns = columns__rename)
+
+    # Sorting in Arrow before the conversion, matching the per-set order of the notebook
+    table = table.sort_by([('setReleaseDate', 'ascending'), ('setCode', 'ascending')])
+
+    return table.to_pandas(types_mapper = types_mapper).rename(columns = columns__rename)
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Dictionary for renaming the card and token columns
+columns__rename_cards = {'setCode'                 : 'SET_CODE'
+                        ,'setName'                 : 'SET_NAME'
+                        ,'setReleaseDate'          : 'RELEASE_DATE'
+                        ,'tokenSetCode'            : 'SET_TOKEN_CODE'
+                        ,'uuid'                    : 'CARD_UUID'
+                        ,'name'                    : 'CARD_NAME'
+                        ,'asciiName'               : 'ASCII_NAME'
+                        ,'faceName'                : 'FACE_NAME'
+                        ,'flavorName'              : 'FLAVOR_NAME'
+                        ,'faceFlavorName'          : 'FACE_FLAVOR_NAME'
+                        ,'number'                  : 'CARD_NUMBER'
+                        ,'side'                    : 'SIDE'
+                        ,'layout'                  : 'LAYOUT'
+                        ,'language'                : 'LANGUAGE'
+                        ,'rarity'                  : 'RARITY'
+                        ,'manaCost'                : 'MANA_COST'
+                        ,'manaValue'               : 'MANA_VALUE'
+                        ,'convertedManaCost'       : 'CONVERTED_MANA_COST'
+                        ,'faceManaValue'           : 'FACE_MANA_VALUE'
+                        ,'faceConvertedManaCost'   : 'FACE_CONVERTED_MANA_COST'
+                        ,'colors'                  : 'COLORS'
+                        ,'colorIdentity'           : 'COLOR_IDENTITY'
+                        ,'colorIndicator'          : 'COLOR_INDICATOR'
+                        ,'producedMana'            : 'PRODUCED_MANA'
+                        ,'type'                    : 'TYPE_LINE'
+                        ,'types'                   : 'TYPES'
+                        ,'supertypes'              : 'SUPERTYPES'
+                        ,'subtypes'                : 'SUBTYPES'
+                        ,'text'                    : 'CARD_TEXT'
+                        ,'flavorText'              : 'FLAVOR_TEXT'
+                        ,'originalText'            : 'ORIGINAL_TEXT'
+                        ,'originalType'            : 'ORIGINAL_TYPE'
+                        ,'keywords'                : 'KEYWORDS'
+                        ,'power'                   : 'POWER'
+                        ,'toughness'               : 'TOUGHNESS'
+                        ,'loyalty'                 : 'LOYALTY'
+                        ,'defense'                 : 'DEFENSE'
+                        ,'hand'                    : 'HAND'
+                        ,'life'                    : 'LIFE'
+                        ,'artist'                  : 'ARTIST'
+                        ,'artistIds'               : 'ARTIST_IDS'
+                        ,'watermark'               : 'WATERMARK'
+                        ,'signature'               : 'SIGNATURE'
+                        ,'securityStamp'           : 'SECURITY_STAMP'
+                        ,'borderColor'             : 'BORDER_COLOR'
+                        ,'frameVersion'            : 'FRAME_VERSION'
+                        ,'frameEffects'            : 'FRAME_EFFECTS'
+                        ,'finishes'                : 'FINISHES'
+                        ,'availability'            : 'AVAILABILITY'
+                        ,'boosterTypes'            : 'BOOSTER_TYPES'
+                        ,'promoTypes'              : 'PROMO_TYPES'
+                        ,'printings'               : 'PRINTINGS'
+                        ,'originalPrintings'       : 'ORIGINAL_PRINTINGS'
+                        ,'rebalancedPrintings'     : 'REBALANCED_PRINTINGS'
+                        ,'originalReleaseDate'     : 'ORIGINAL_RELEASE_DATE'
+                        ,'otherFaceIds'            : 'OTHER_FACE_IDS'
+                        ,'variations'              : 'VARIATIONS'
+                        ,'cardParts'               : 'CARD_PARTS'
+                        ,'subsets'                 : 'SUBSETS'
+                        ,'duelDeck'                : 'DUEL_DECK'
+                        ,'attractionLights'        : 'ATTRACTION_LIGHTS'
+                        ,'edhrecRank'              : 'EDHREC_RANK'
+                        ,'edhrecSaltiness'         : 'EDHREC_SALTINESS'
+                        ,'hasFoil'                 : 'FOIL_FLAG'
+                        ,'hasNonFoil'              : 'NON_FOIL_FLAG'
+                        ,'hasAlternativeDeckLimit' : 'ALTERNATIVE_DECK_LIMIT_FLAG'
+                        ,'hasContentWarning'       : 'CONTENT_WARNING_FLAG'
+                        ,'isAlternative'           : 'ALTERNATIVE_FLAG'
+                        ,'isFullArt'               : 'FULL_ART_FLAG'
+                        ,'isFunny'                 : 'FUNNY_FLAG'
+                        ,'isOnlineOnly'            : 'ONLINE_FLAG'
+                        ,'isOversized'             : 'OVERSIZED_FLAG'
+                        ,'isPromo'                 : 'PROMO_FLAG'
+                        ,'isRebalanced'            : 'REBALANCED_FLAG'
+                        ,'isReprint'               : 'REPRINT_FLAG'
+                        ,'isReserved'              : 'RESERVED_FLAG'
+                        ,'isStarter'               : 'STARTER_FLAG'
+                        ,'isStorySpotlight'        : 'STORY_SPOTLIGHT_FLAG'
+                        ,'isTextless'              : 'TEXTLESS_FLAG'
+                        ,'isTimeshifted'           : 'TIMESHIFTED_FLAG'
+                        ,'orientation'             : 'ORIENTATION'
+                        ,'reverseRelated'          : 'REVERSE_RELATED'
+                        ,'relatedCards'            : 'RELATED_CARDS'
+                        ,'sourceProducts'          : 'SOURCE_PRODUCTS'
+                        ,'leadershipSkills'        : 'LEADERSHIP_SKILLS'
+                        ,'identifiers'             : 'IDENTIFIERS'
+                        ,'legalities'              : 'LEGALITIES'
+                        ,'purchaseUrls'            : 'PURCHASE_URLS'
+                        ,'rulings'                 : 'RULINGS'
+                        ,'foreignData'             : 'FOREIGN_DATA'}
@@ -0,0 +1,387 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import warnings
+from   itertools import chain
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_download import mtgjson_url, download_file, load_json_xz
+from   modules.utils_tabular  import formats__legalities
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Location of each attribute's values in EnumValues.json, the first one present is used
+bitset__enum_paths = {'colors'        : [('card', 'colors')]
+                     ,'colorIdentity' : [('card', 'colorIdentity')]
+                     ,'types'         : [('card', 'types')]
+                     ,'supertypes'    : [('card', 'supertypes')]
+                     ,'finishes'      : [('card', 'finishes')]
+                     ,'legalities'    : [('card', 'legalities')]
+                     ,'languages'     : [('set', 'languages'), ('foreignData', 'language')]}
+
+# Values used when EnumValues.json is not available or lacks an attribute
+bitset__fallback_enums = {'colors'        : ['W', 'U', 'B', 'R', 'G']
+                         ,'colorIdentity' : ['W', 'U', 'B', 'R', 'G']
+                         ,'types'         : ['Artifact', 'Battle', 'Conspiracy', 'Creature', 'Dungeon', 'Emblem', 'Enchantment', 'Instant', 'Kindred'
+                                            ,'Land', 'Phenomenon', 'Plane', 'Planeswalker', 'Scheme', 'Sorcery', 'Tribal', 'Vanguard']
+                         ,'supertypes'    : ['Basic', 'Elite', 'Host', 'Legendary', 'Ongoing', 'Snow', 'World']
+                         ,'finishes'      : ['etched', 'foil', 'nonfoil', 'signed']
+                         ,'legalities'    : formats__legalities
+                         ,'languages'     : ['English', 'Spanish', 'French', 'German', 'Italian', 'Portuguese (Brazil)', 'Japanese', 'Korean', 'Russian'
+                                            ,'Chinese Simplified', 'Chinese Traditional', 'Hebrew', 'Latin', 'Ancient Greek', 'Arabic', 'Sanskrit'
+                                            ,'Phyrexian', 'Quenya']}
+
+# Attribute encoded for each renamed column
+bitset__columns = {'COLORS'         : 'colors'
+                  ,'COLOR_IDENTITY' : 'colorIdentity'
+                  ,'TYPES'          : 'types'
+                  ,'SUPERTYPES'     : 'supertypes'
+                  ,'FINISHES'       : 'finishes'
+                  ,'LEGALITIES'     : 'legalities'
+                  ,'LANGUAGES'      : 'languages'}
+
+# Legality statuses encoded as a set bit
+bitset__legal_statuses = ['Legal', 'Restricted']
+
+# Number of set bits of every byte
+bitset__byte_counts = np.array([bin(byte).count('1') for byte in range(256)], dtype = np.uint8)
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for reading the bitset labels of every attribute from EnumValues
+def bitset_enums(enum_values=None):
+
+    """
+    Take the labels of every multi-valued attribute from MTGJSON's
+    EnumValues, falling back to `bitset__fallback_enums` for the attributes it
+    does not list.
+
+    Parameters
+    ----------
+    enum_values : dict, optional
+        Parsed EnumValues.json (the whole file or its 'data'), defaults to the
+        fallback labels only.
+
+    Returns
+    -------
+    dict
+        {attribute : list of labels}, bit i standing for label i.
+    """
+
+    data  = (enum_values or {}).get('data', enum_values or {})
+    enums = {}
+    for attribute, paths in bitset__enum_paths.items():
+        enums[attribute] = list(bitset__fallback_enums[attribute])
+        for section, key in paths:
+            values = data.get(section, {}).get(key) if isinstance(data.get(section), dict) else None
+            if isinstance(values, list) and values:
+                enums[attribute] = list(values)
+                break
+
+    return enums
+
+
+
+# Function for loading the bitset labels from a local or downloaded EnumValues file
+def load_bitset_enums(path, download=True, session=None):
+
+    """
+    Load the bitset labels from EnumValues.json.xz, downloading it when it
+    changed on the server. Without network and local copy the fallback labels
+    are used with a warning.
+
+    Parameters
+    ----------
+    path : str
+        Local path of EnumValues.json.xz.
+    download : bool
+        Refresh the local copy from the MTGJSON server first.
+    session : requests.Session, optional
+        Session used for the requests.
+
+    Returns
+    -------
+    dict
+        Output of `bitset_enums`.
+    """
+
+    if download:
+        try:
+            download_file(mtgjson_url('EnumValues.json.xz'), path, session = session, progress = False, only_if_changed = True)
+        except Exception as error:
+            if not os.path.exists(path):
+                warnings.warn(f'EnumValues.json.xz could not be downloaded ({error}), using the fallback labels')
+
+    return bitset_enums(load_json_xz(path) if os.path.exists(path) else None)
+
+
+
+# Function for adding the labels seen in the data but missing from the enums
+def bitset_labels(values, labels=()):
+
+    """
+    Extend `labels` with any label found in `values` (sorted, after the known
+    ones), e.g. a type MTGJSON added after the fallback list was written.
+
+    Parameters
+    ----------
+    values : iterable
+        Lists of labels (or legality dictionaries) per row.
+    labels : list of str
+        Known labels, kept first and in order.
+
+    Returns
+    -------
+    list of str
+        The labels.
+    """
+
+    known = set(labels)
+    seen  = {label for x in values for label in _row_labels(x, None) if label not in known}
+
+    return list(labels) + sorted(seen)
+
+
+
+# Function for choosing the smallest unsigned integer holding one bit per label
+def bitset_dtype(labels):
+
+    """
+    Return the smallest unsigned integer dtype with a bit per label.
+
+    Raises
+    ------
+    ValueError
+        If there are more than 64 labels.
+    """
+
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if len(labels) <= np.iinfo(dtype).bits:
+            return np.dtype(dtype)
+
+    raise ValueError(f'{len(labels)} labels do not fit a 64-bit bitset')
+
+
+
+# Function for reading the labels of one row
+def _row_labels(x, statuses):
+
+    """
+    Return the labels of one row: the items of a list (or Arrow converted
+    array), a single string, or the formats of a legality dictionary whose
+    status is in `statuses` (every format when None).
+    """
+
+    if isinstance(x, dict):
+        return [key for key, status in x.items() if statuses is None or status in statuses]
+    if isinstance(x, str):
+        return [x]
+    if isinstance(x, (list, tuple, np.ndarray)):
+        return list(x)
+
+    return []
+
+
+
+# Function for encoding a column of lists as integer bitsets
+def encode_bitset(values, labels, statuses=bitset__legal_statuses):
+
+    """
+    Encode lists of labels as one integer per row, bit i being set when
+    labels[i] is present.
+
+    Parameters
+    ----------
+    values : iterable
+        Lists (or Arrow converted arrays) of labels, legality dictionaries or
+        None per row.
+    labels : list of str
+        Labels of the bits, e.g. `bitset_enums()['colors']`.
+    statuses : list of str
+        Legality statuses encoded as a set bit for dictionary rows.
+
+    Returns
+    -------
+    np.ndarray
+        One unsigned integer per row, of `bitset_dtype(labels)`.
+
+    Raises
+    ------
+    ValueError
+        If a row holds a label missing from `labels`, see `bitset_labels`.
+    """
+
+    dtype   = bitset_dtype(labels)
+    rows    = [_row_labels(x, statuses) for x in values]
+    lengths = np.fromiter(map(len, rows), dtype = np.int64, count = len(rows))
+    bits    = pd.Index(labels).get_indexer(list(chain.from_iterable(rows)))
+
+    if (bits < 0).any():
+        unknown = sorted({label for label, bit in zip(chain.from_iterable(rows), bits) if bit < 0})
+        raise ValueError(f'Labels {unknown} are not in the bitset labels, extend them with bitset_labels')
+
+    # Setting every label's bit on its row in one vectorised pass
+    codes = np.zeros(len(rows), dtype = dtype)
+    np.bitwise_or.at(codes, np.repeat(np.arange(len(rows)), lengths), np.left_shift(dtype.type(1), bits.astype(dtype)))
+
+    return codes
+
+
+
+# Function for decoding bitsets back into lists of labels
+def decode_bitset(codes, labels):
+
+    """
+    Decode bitsets into lists of labels, e.g. at the export boundary.
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        Output of `encode_bitset`.
+    labels : list of str
+        Labels the codes were encoded with.
+
+    Returns
+    -------
+    list of list of str
+        The labels of every row, in label order.
+    """
+
+    codes = np.asarray(codes)
+    flags = [(codes >> codes.dtype.type(i)) & codes.dtype.type(1) for i in range(len(labels))]
+
+    return [[label for label, flag in zip(labels, row) if flag] for row in zip(*flags)] if flags else [[] for _ in codes]
+
+
+
+# Function for converting labels into a bitmask
+def bitset_mask(wanted, labels):
+
+    """
+    Convert labels into the integer mask compared with the encoded columns.
+
+    Parameters
+    ----------
+    wanted : list of str
+        Labels to set.
+    labels : list of str
+        Labels the column was encoded with.
+
+    Returns
+    -------
+    int
+        The mask.
+
+    Raises
+    ------
+    ValueError
+        If a wanted label is unknown.
+    """
+
+    unknown = [label for label in wanted if label not in labels]
+    if unknown:
+        raise ValueError(f'Labels {unknown} are not in the bitset labels {list(labels)}')
+
+    return sum(1 << labels.index(label) for label in set(wanted))
+
+
+
+# Function for the rows holding every label of a mask
+def bitset_superset(codes, mask):
+
+    """
+    Return the rows whose labels include all of `mask` (e.g. both red and green).
+    """
+
+    mask = codes.dtype.type(mask)
+
+    return (codes & mask) == mask
+
+
+
+# Function for the rows holding only labels of a mask
+def bitset_subset(codes, mask):
+
+    """
+    Return the rows whose labels are all in `mask` (e.g. playable in a
+    Simic commander deck), rows without labels included.
+    """
+
+    return (codes & ~codes.dtype.type(mask)) == 0
+
+
+
+# Function for the rows holding any label of a mask
+def bitset_intersects(codes, mask):
+
+    """
+    Return the rows sharing at least one label with `mask`.
+    """
+
+    return (codes & codes.dtype.type(mask)) != 0
+
+
+
+# Function for counting the labels of every row
+def bitset_count(codes):
+
+    """
+    Return the number of labels of every row (population count).
+    """
+
+    codes = np.ascontiguousarray(codes)
+
+    return bitset__byte_counts[codes.view(np.uint8).reshape(len(codes), codes.dtype.itemsize)].sum(axis = 1, dtype = np.int64)
+
+
+
+# Function for adding bitset columns for the multi-valued columns of a table
+def encode_bitset_columns(df, enums=None, columns=None, suffix='_BITS'):
+
+    """
+    Add an integer bitset column next to each multi-valued column, e.g.
+    COLORS_BITS for COLORS, extending the labels with any value missing from
+    EnumValues.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Cards or sets table with renamed columns.
+    enums : dict, optional
+        Output of `bitset_enums` or `load_bitset_enums`, defaults to the fallback labels.
+    columns : list of str, optional
+        Columns encoded, defaults to those of `bitset__columns` present in `df`.
+    suffix : str
+        Suffix of the bitset columns.
+
+    Returns
+    -------
+    tuple of (pd.DataFrame, dict)
+        The table with the bitset columns and the labels of each column.
+    """
+
+    enums   = enums or bitset_enums()
+    columns = columns or [c for c in bitset__columns if c in df.columns]
+    df      = df.copy()
+    labels  = {}
+
+    for column in columns:
+        labels[column] = bitset_labels(df[column], enums[bitset__columns[column]])
+        df[column + suffix] = encode_bitset(df[column], labels[column])
+
+    return df, labels
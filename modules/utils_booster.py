@@ -0,0 +1,453 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import zlib
+import warnings
+from   concurrent.futures import ProcessPoolExecutor
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_pipeline    import stream_mtgjson
+from   modules.utils_product_bom import product_bom_value
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Packs sampled per chunk, bounding the memory of the per-card draws
+booster__chunk_size = 250_000
+
+# Attempts at redrawing the duplicate cards of sheets that do not allow them
+booster__duplicate_attempts = 100
+
+# Percentiles reported for every value distribution
+booster__percentiles = {'P05'    : 5
+                       ,'P25'    : 25
+                       ,'MEDIAN' : 50
+                       ,'P75'    : 75
+                       ,'P95'    : 95}
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for collecting the booster structures of AllPrintings
+def load_boosters(source, set_codes=None, cache_path=None, session=None):
+
+    """
+    Stream AllPrintings and keep the 'booster' structure (sheets, weights and
+    pack configurations) of every set that has one.
+
+    Parameters
+    ----------
+    source : str
+        URL or local path of AllPrintings.json.xz.
+    set_codes : list of str, optional
+        Sets kept, defaults to all of them.
+    cache_path : str, optional
+        Local copy of the compressed file, see `stream_mtgjson`.
+    session : requests.Session, optional
+        Session used for the requests.
+
+    Returns
+    -------
+    dict
+        {set code : {booster type : booster}}.
+    """
+
+    boosters = {}
+
+    def keep_booster(set_code, set_data):
+        if set_data.get('booster') and (set_codes is None or set_code in set_codes):
+            boosters[set_code] = set_data['booster']
+
+    stream_mtgjson(source, on_item = keep_booster, cache_path = cache_path, session = session)
+
+    return boosters
+
+
+
+# Function for compiling one booster type into sampling arrays
+def compile_booster(booster):
+
+    """
+    Convert one booster type of a set into the arrays sampled by
+    `simulate_pack_values`: the cards and cumulative weights of every sheet and
+    the sheet counts of every pack configuration.
+
+    Parameters
+    ----------
+    booster : dict
+        One value of a set's 'booster', with 'sheets' and 'boosters'.
+
+    Returns
+    -------
+    dict
+        'sheets' (names), 'cards' (uuids per sheet), 'cumulative' (normalised
+        cumulative weights per sheet), 'foil' and 'duplicates' (flags per
+        sheet), 'config_counts' (configurations x sheets) and
+        'config_cumulative'.
+    """
+
+    names   = sorted(booster['sheets'])
+    sheets  = [booster['sheets'][name] for name in names]
+    configs = booster['boosters']
+
+    compiled = {'sheets'     : names
+               ,'cards'      : [np.array(list(sheet['cards']), dtype = object) for sheet in sheets]
+               ,'cumulative' : []
+               ,'foil'       : np.array([bool(sheet.get('foil', False)) for sheet in sheets])
+               ,'duplicates' : np.array([bool(sheet.get('allowDuplicates', False)) for sheet in sheets])}
+
+    # Normalising the cumulative weights once so a draw is one binary search
+    for sheet in sheets:
+        cumulative     = np.cumsum(np.fromiter(sheet['cards'].values(), dtype = np.float64, count = len(sheet['cards'])))
+        cumulative    /= cumulative[-1]
+        cumulative[-1] = 1.0
+        compiled['cumulative'].append(cumulative)
+
+    compiled['config_counts']     = np.array([[config['contents'].get(name, 0) for name in names] for config in configs], dtype = np.int64)
+    compiled['config_cumulative'] = np.cumsum([config['weight'] for config in configs], dtype = np.float64)
+    compiled['config_cumulative'] /= compiled['config_cumulative'][-1]
+
+    return compiled
+
+
+
+# Function for looking up the price of every sheet card
+def price_booster(compiled, df_prices, price_column='PRICE'):
+
+    """
+    Add the price of every card of every sheet to a compiled booster, foil
+    sheets taking the foil prices when `df_prices` has a FOIL_FLAG.
+
+    Parameters
+    ----------
+    compiled : dict
+        Output of `compile_booster`, updated in place.
+    df_prices : pd.DataFrame
+        One price per CARD_UUID, or per CARD_UUID and FOIL_FLAG.
+    price_column : str
+        Column of `df_prices` holding the price.
+
+    Returns
+    -------
+    dict
+        The compiled booster with 'prices' (per sheet, 0 for unpriced cards)
+        and 'priced' (share of the sheet weight that has a price).
+    """
+
+    compiled['prices'], compiled['priced'] = [], []
+    for cards, cumulative, foil in zip(compiled['cards'], compiled['cumulative'], compiled['foil']):
+        prices = df_prices
+        if 'FOIL_FLAG' in df_prices.columns:
+            prices = df_prices[df_prices['FOIL_FLAG'] == foil]
+        prices = prices.drop_duplicates('CARD_UUID').set_index('CARD_UUID')[price_column].reindex(cards).to_numpy(dtype = np.float64)
+
+        weights = np.diff(cumulative, prepend = 0.0)
+        compiled['priced'].append(float(weights[~np.isnan(prices)].sum()))
+        compiled['prices'].append(np.nan_to_num(prices))
+
+    return compiled
+
+
+
+# Function for drawing the cards of one sheet for many packs
+def _draw_sheet(rng, cumulative, pack_ids, duplicates, picks):
+
+    """
+    Draw one card per pick with a binary search of uniform numbers in the
+    cumulative weights, redrawing the cards repeated within a pack when the
+    sheet does not allow duplicates. The picks of a pack are contiguous, so a
+    repeat is found by comparing every pick with the `picks` - 1 before it.
+    """
+
+    cards = np.minimum(np.searchsorted(cumulative, rng.random(len(pack_ids)), side = 'right'), len(cumulative) - 1)
+    if duplicates or len(cumulative) < picks or picks < 2:
+        return cards
+
+    # Redrawing every pick equal to an earlier pick of its pack, until none is left
+    for _ in range(booster__duplicate_attempts):
+        repeated = np.zeros(len(cards), dtype = bool)
+        for lag in range(1, picks):
+            repeated[lag:] |= (cards[lag:] == cards[:-lag]) & (pack_ids[lag:] == pack_ids[:-lag])
+        if not repeated.any():
+            break
+        cards[repeated] = np.minimum(np.searchsorted(cumulative, rng.random(repeated.sum()), side = 'right'), len(cumulative) - 1)
+
+    return cards
+
+
+
+# Function for sampling packs of a compiled booster
+def sample_packs(compiled, packs, rng):
+
+    """
+    Sample the contents of `packs` packs.
+
+    Parameters
+    ----------
+    compiled : dict
+        Output of `compile_booster`.
+    packs : int
+        Number of packs.
+    rng : np.random.Generator
+        Random generator.
+
+    Returns
+    -------
+    list of tuple of (np.ndarray, np.ndarray)
+        Per sheet, the pack of every pick and the position of its card in the
+        sheet's 'cards'.
+    """
+
+    configs = np.minimum(np.searchsorted(compiled['config_cumulative'], rng.random(packs), side = 'right'), len(compiled['config_cumulative']) - 1)
+
+    draws = []
+    for sheet, cumulative in enumerate(compiled['cumulative']):
+        pack_ids = np.repeat(np.arange(packs), compiled['config_counts'][configs, sheet])
+        draws.append((pack_ids, _draw_sheet(rng, cumulative, pack_ids, compiled['duplicates'][sheet], compiled['config_counts'][:, sheet].max())))
+
+    return draws
+
+
+
+# Function for simulating the value of many packs of a priced booster
+def simulate_pack_values(compiled, packs, seed=0, chunk_size=booster__chunk_size):
+
+    """
+    Open `packs` packs and return the total card price of each.
+
+    The packs are sampled in chunks of `chunk_size`, each with its own child of
+    `seed`, so the values only depend on the seed and the chunk size.
+
+    Parameters
+    ----------
+    compiled : dict
+        Output of `compile_booster` priced by `price_booster`.
+    packs : int
+        Number of packs.
+    seed : int or np.random.SeedSequence
+        Seed of the simulation.
+    chunk_size : int
+        Packs sampled at once.
+
+    Returns
+    -------
+    np.ndarray
+        The value of every pack.
+    """
+
+    seed   = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    values = np.zeros(packs, dtype = np.float64)
+
+    for start, child in zip(range(0, packs, chunk_size), seed.spawn(-(-packs // chunk_size))):
+        rng  = np.random.default_rng(child)
+        size = min(chunk_size, packs - start)
+        for (pack_ids, cards), prices in zip(sample_packs(compiled, size, rng), compiled['prices']):
+            values[start:start + size] += np.bincount(pack_ids, weights = prices[cards], minlength = size)
+
+    return values
+
+
+
+# Function for summarising a value distribution
+def value_summary(values):
+
+    """
+    Return the MEAN, STD, percentiles of `booster__percentiles` and MAX of a
+    value distribution.
+    """
+
+    percentiles = np.percentile(values, list(booster__percentiles.values())) if len(values) else [np.nan] * len(booster__percentiles)
+
+    return {'MEAN' : float(np.mean(values)) if len(values) else np.nan
+           ,'STD'  : float(np.std(values))  if len(values) else np.nan
+           ,**{name : float(value) for name, value in zip(booster__percentiles, percentiles)}
+           ,'MAX'  : float(np.max(values))  if len(values) else np.nan}
+
+
+
+# Function for the seed of one set and booster type
+def booster_seed(seed, set_code, booster_type):
+
+    """
+    Derive the seed of one set and booster type from the run seed, so a set's
+    packs are the same whichever other sets and how many workers are used.
+    """
+
+    return np.random.SeedSequence(seed, spawn_key = (zlib.crc32(f'{set_code}/{booster_type}'.encode()),))
+
+
+
+# Function for simulating one set in a worker process
+def _simulate_set(set_code, booster_type, booster, df_prices, packs, seed, chunk_size):
+
+    """
+    Compile, price and open the packs of one set and booster type. Runs in the
+    worker processes of `simulate_boosters`.
+    """
+
+    compiled = price_booster(compile_booster(booster), df_prices)
+    values   = simulate_pack_values(compiled, packs, booster_seed(seed, set_code, booster_type), chunk_size)
+
+    # Share of the expected picks of a pack that have a price
+    picks  = np.diff(compiled['config_cumulative'], prepend = 0.0) @ compiled['config_counts']
+    priced = float(picks @ np.array(compiled['priced']) / picks.sum()) if picks.sum() else np.nan
+
+    return set_code, booster_type, values, priced
+
+
+
+# Function for simulating the pack values of many sets in parallel
+def simulate_boosters(boosters
+                     ,df_prices
+                     ,packs         = 1_000_000
+                     ,booster_types = None
+                     ,seed          = 0
+                     ,workers       = None
+                     ,chunk_size    = booster__chunk_size
+                     ,keep_values   = False):
+
+    """
+    Open `packs` packs of every set and booster type across a process pool and
+    summarise the distribution of their card value.
+
+    Every set has its own seed derived from `seed` (see `booster_seed`), so the
+    results are reproducible whatever the number of workers.
+
+    Parameters
+    ----------
+    boosters : dict
+        Output of `load_boosters`.
+    df_prices : pd.DataFrame
+        One price per CARD_UUID, or per CARD_UUID and FOIL_FLAG.
+    packs : int
+        Packs opened per set and booster type.
+    booster_types : tuple of str, optional
+        Booster types simulated when the set has them (e.g. ('draft', 'play')),
+        all of them by default so every pack of the sealed products has values.
+    seed : int
+        Seed of the run.
+    workers : int, optional
+        Worker processes, defaults to the number of cores. 1 runs in process.
+    chunk_size : int
+        Packs sampled at once by each worker.
+    keep_values : bool
+        Also return the value of every pack, e.g. for `product_value_summary`.
+
+    Returns
+    -------
+    pd.DataFrame or tuple of (pd.DataFrame, dict)
+        SET_CODE, BOOSTER_TYPE, PACKS, PRICED_SHARE and the `value_summary`
+        columns, plus {(set code, booster type) : pack values} if `keep_values`.
+    """
+
+    tasks = [(set_code, booster_type, booster)
+             for set_code, set_boosters in sorted(boosters.items())
+             for booster_type, booster in sorted(set_boosters.items())
+             if booster_types is None or booster_type in booster_types]
+
+    # Sending each worker only the prices of its own sheets
+    def task_prices(booster):
+        uuids = {uuid for sheet in booster['sheets'].values() for uuid in sheet['cards']}
+        return df_prices[df_prices['CARD_UUID'].isin(uuids)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [_simulate_set(*task, task_prices(task[2]), packs, seed, chunk_size) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers = min(workers, max(len(tasks), 1))) as executor:
+            futures = [executor.submit(_simulate_set, *task, task_prices(task[2]), packs, seed, chunk_size) for task in tasks]
+            results = [future.result() for future in futures]
+
+    df = pd.DataFrame([{'SET_CODE'     : set_code
+                       ,'BOOSTER_TYPE' : booster_type
+                       ,'PACKS'        : len(values)
+                       ,'PRICED_SHARE' : priced
+                       ,**value_summary(values)} for set_code, booster_type, values, priced in results]
+                     ,columns = ['SET_CODE', 'BOOSTER_TYPE', 'PACKS', 'PRICED_SHARE', 'MEAN', 'STD', *booster__percentiles, 'MAX'])
+
+    if keep_values:
+        return df, {(set_code, booster_type) : values for set_code, booster_type, values, _ in results}
+
+    return df
+
+
+
+# Function for the value distribution of every sealed product
+def product_value_summary(df_bom, pack_values, df_prices, samples=10_000, seed=0, price_column='PRICE'):
+
+    """
+    Summarise the value distribution of every sealed product: the price of
+    its fixed cards plus the value of its packs, each pack being drawn from
+    the simulated pack values of its set and booster type. Packs whose set
+    and booster type were not simulated add nothing to the value and are
+    reported in a warning.
+
+    Parameters
+    ----------
+    df_bom : pd.DataFrame
+        Output of `set_product_bom_table`.
+    pack_values : dict
+        {(set code, booster type) : pack values} from `simulate_boosters`.
+    df_prices : pd.DataFrame
+        Card prices, see `product_bom_value`.
+    samples : int
+        Products opened per product.
+    seed : int
+        Seed of the draws.
+    price_column : str
+        Column of `df_prices` holding the price.
+
+    Returns
+    -------
+    pd.DataFrame
+        PRODUCT_UUID, CARD_VALUE, PACKS, SIMULATED_PACKS (packs with simulated
+        values) and the `value_summary` columns.
+    """
+
+    df_value = product_bom_value(df_bom, df_prices, price_column).set_index('PRODUCT_UUID')
+    df_packs = df_bom[df_bom['COMPONENT_TYPE'] == 'pack']
+    rng      = np.random.default_rng(seed)
+
+    # Grouping the pack rows by product once instead of filtering them for every product
+    packs  = list(zip(df_packs['COMPONENT_SET_CODE'], df_packs['COMPONENT_CODE'], df_packs['QUANTITY']))
+    groups = df_packs.groupby('PRODUCT_UUID', sort = False, observed = True).indices
+
+    # Warning about the packs that cannot be valued, e.g. booster types left out of the simulation
+    missing = sorted({(set_code, booster_type) for set_code, booster_type, _ in packs if not len(pack_values.get((set_code, booster_type), ()))}, key = str)
+    if missing:
+        warnings.warn(f'{len(missing)} pack types of the sealed products have no simulated values and count as 0: {missing[:10]}')
+
+    rows = []
+    for product_uuid, card_value in df_value['CARD_VALUE'].items():
+        values    = np.full(samples, card_value)
+        simulated = 0.0
+        for position in groups.get(product_uuid, ()):
+            set_code, booster_type, quantity = packs[position]
+            opened = pack_values.get((set_code, booster_type))
+            if opened is None or not len(opened):
+                continue
+            # Fractional (expected) quantities open one more pack with the probability of the fraction
+            counts     = int(quantity) + (rng.random(samples) < quantity % 1)
+            pack_ids   = np.repeat(np.arange(samples), counts)
+            values    += np.bincount(pack_ids, weights = opened[rng.integers(0, len(opened), len(pack_ids))], minlength = samples)
+            simulated += quantity
+        rows.append({'PRODUCT_UUID'    : product_uuid
+                    ,'CARD_VALUE'      : card_value
+                    ,'PACKS'           : df_value.at[product_uuid, 'PACKS']
+                    ,'SIMULATED_PACKS' : simulated
+                    ,**value_summary(values)})
+
+    return pd.DataFrame(rows)
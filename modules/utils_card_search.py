@@ -0,0 +1,545 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import re
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_bitset import bitset_enums, bitset_labels, bitset_mask, bitset_count, bitset_superset, bitset_subset, encode_bitset
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Colour names accepted in colour queries, 'c' standing for colourless
+search__colour_names = {'white'      : 'w'
+                       ,'blue'       : 'u'
+                       ,'black'      : 'b'
+                       ,'red'        : 'r'
+                       ,'green'      : 'g'
+                       ,'colorless'  : 'c'
+                       ,'colourless' : 'c'}
+
+# Rarities in increasing order, with their abbreviations
+search__rarities      = ['common', 'uncommon', 'rare', 'mythic', 'special', 'bonus']
+search__rarity_letter = {r[0] : r for r in search__rarities}
+
+# Aliases of every query key
+search__keys = {'c'         : 'colors'
+               ,'color'     : 'colors'
+               ,'colors'    : 'colors'
+               ,'id'        : 'identity'
+               ,'ci'        : 'identity'
+               ,'identity'  : 'identity'
+               ,'t'         : 'type'
+               ,'type'      : 'type'
+               ,'o'         : 'oracle'
+               ,'oracle'    : 'oracle'
+               ,'mv'        : 'mana_value'
+               ,'cmc'       : 'mana_value'
+               ,'manavalue' : 'mana_value'
+               ,'pow'       : 'power'
+               ,'power'     : 'power'
+               ,'tou'       : 'toughness'
+               ,'toughness' : 'toughness'
+               ,'f'         : 'format'
+               ,'format'    : 'format'
+               ,'legal'     : 'format'
+               ,'r'         : 'rarity'
+               ,'rarity'    : 'rarity'
+               ,'s'         : 'set'
+               ,'e'         : 'set'
+               ,'set'       : 'set'
+               ,'edition'   : 'set'
+               ,'n'         : 'name'
+               ,'name'      : 'name'}
+
+# Tokens of the query language
+search__token_pattern = re.compile(r'''\s*(?:(?P<open>\()|(?P<close>\))|(?P<negate>-)(?=[^\s)])
+                                      |(?P<key>[a-zA-Z]+)(?P<op><=|>=|!=|:|=|<|>)(?P<value>"[^"]*"|[^\s()]+)
+                                      |(?P<word>"[^"]*"|[^\s()]+))''', re.VERBOSE)
+
+# Words of the rules text, type line and name kept in the inverted indexes
+search__word_pattern = re.compile(r"\{[^}]+\}|[\w']+")
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for building an inverted index of the words of a text column
+def _inverted_index(texts):
+
+    """
+    Build a CSR style inverted index: a sorted word vocabulary, offsets and the
+    row positions containing each word.
+    """
+
+    words, rows = [], []
+    for row, text in enumerate(texts):
+        tokens = set(search__word_pattern.findall(text))
+        words.extend(tokens)
+        rows.extend([row] * len(tokens))
+
+    # Grouping the postings by word in sorted vocabulary order
+    codes, vocabulary = pd.factorize(np.array(words, dtype = str), sort = True)
+    order             = np.argsort(codes, kind = 'stable')
+    offsets           = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength = len(vocabulary)))])
+
+    return {'vocabulary' : np.asarray(vocabulary, dtype = str)
+           ,'offsets'    : offsets.astype(np.int64)
+           ,'postings'   : np.asarray(rows, dtype = np.int32)[order]}
+
+
+
+# Function for encoding texts as one UTF-8 buffer with offsets
+def _encode_texts(texts):
+
+    """
+    Store texts as one UTF-8 byte buffer plus offsets, which saves to .npz
+    without pickling and decodes single rows cheaply.
+    """
+
+    encoded = [t.encode('utf-8') for t in texts]
+    offsets = np.concatenate([[0], np.cumsum([len(t) for t in encoded])]).astype(np.int64)
+
+    return np.frombuffer(b''.join(encoded), dtype = np.uint8), offsets
+
+
+
+# Function for building the columnar card store queried by the search language
+def build_card_store(df_cards, enums=None):
+
+    """
+    Build the columnar arrays that `search_cards` queries: bitsets for colours,
+    colour identity, types and format legality, numeric arrays for mana value,
+    power and toughness, codes for rarity and set, and inverted indexes of the
+    rules text, type line and name. Missing columns match nothing.
+
+    Parameters
+    ----------
+    df_cards : pd.DataFrame
+        Cards table with the `columns__rename_cards` names, e.g. `df__cards`.
+    enums : dict, optional
+        Bitset labels from `load_bitset_enums`, defaults to the fallback labels.
+
+    Returns
+    -------
+    dict
+        Arrays aligned on the rows of `df_cards`, see `save_card_store`.
+    """
+
+    df     = df_cards.reset_index(drop = True)
+    column = lambda name: df[name] if name in df.columns else pd.Series([None] * len(df), dtype = object)
+    oracle = column('CARD_TEXT').fillna('').astype(str).str.lower()
+    enums  = enums or bitset_enums()
+
+    # Bitsets of the multi-valued columns, the labels being saved with the store
+    store = {'rows' : np.array(len(df))}
+    for name, column_name, attribute in [('colors',     'COLORS',         'colors')
+                                        ,('identity',   'COLOR_IDENTITY', 'colorIdentity')
+                                        ,('types',      'TYPES',          'types')
+                                        ,('supertypes', 'SUPERTYPES',     'supertypes')
+                                        ,('legal',      'LEGALITIES',     'legalities')]:
+        labels                  = bitset_labels(column(column_name), enums[attribute])
+        store[name]             = encode_bitset(column(column_name), labels)
+        store[f'{name}_labels'] = np.array(labels, dtype = str)
+
+    set_codes, set_vocabulary = pd.factorize(column('SET_CODE').astype(str).str.lower())
+    text_bytes, text_offsets  = _encode_texts(oracle)
+
+    store |= {'card_uuid'           : column('CARD_UUID').to_numpy(dtype = str)
+             ,'mana_value'          : pd.to_numeric(column('MANA_VALUE'), errors = 'coerce').to_numpy(dtype = np.float64, na_value = np.nan)
+             ,'power'               : pd.to_numeric(column('POWER'),      errors = 'coerce').to_numpy(dtype = np.float64, na_value = np.nan)
+             ,'toughness'           : pd.to_numeric(column('TOUGHNESS'),  errors = 'coerce').to_numpy(dtype = np.float64, na_value = np.nan)
+             ,'rarity'              : pd.Categorical(column('RARITY').astype('string').str.lower(), categories = search__rarities).codes.astype(np.int8)
+             ,'set'                 : set_codes.astype(np.int32)
+             ,'set_vocabulary'      : np.asarray(set_vocabulary, dtype = str)
+             ,'oracle_text_bytes'   : text_bytes
+             ,'oracle_text_offsets' : text_offsets}
+
+    # Inverted indexes of the words of the rules text, type line and name
+    for name, texts in [('oracle', oracle)
+                       ,('type_line', column('TYPE_LINE').fillna('').astype(str).str.lower())
+                       ,('name', column('CARD_NAME').fillna('').astype(str).str.lower())]:
+        for part, array in _inverted_index(texts).items():
+            store[f'{name}_{part}'] = array
+
+    return store
+
+
+
+# Function for caching a card store to disk
+def save_card_store(store, path):
+
+    """
+    Save a card store as an uncompressed .npz file (no pickled objects, the
+    texts decoded for phrase checks are rebuilt on first use).
+
+    Parameters
+    ----------
+    store : dict
+        Output of `build_card_store`.
+    path : str
+        Destination .npz path.
+    """
+
+    np.savez(path, **{key : value for key, value in store.items() if value.dtype != object})
+
+
+
+# Function for loading a cached card store
+def load_card_store(path):
+
+    """
+    Load a card store saved by `save_card_store`.
+
+    Parameters
+    ----------
+    path : str
+        Path of the .npz file.
+
+    Returns
+    -------
+    dict
+        The card store.
+    """
+
+    with np.load(path, allow_pickle = False) as f:
+        return {key : f[key] for key in f.files}
+
+
+
+# Function for parsing a query into a syntax tree
+def parse_query(query):
+
+    """
+    Parse a Scryfall-like query into a syntax tree.
+
+    Terms are ANDed by default, 'or' separates alternatives, parentheses group
+    and a leading '-' negates, e.g. `c:r t:creature mv<=3 (o:"draw a card" or
+    o:flying) f:modern -r:common set:LEA`.
+
+    Parameters
+    ----------
+    query : str
+        The query.
+
+    Returns
+    -------
+    tuple
+        ('and' | 'or', [nodes]), ('not', node) or ('term', key, op, value).
+
+    Raises
+    ------
+    ValueError
+        If the query is empty, has unbalanced parentheses or an unknown key.
+    """
+
+    tokens = []
+    for match in search__token_pattern.finditer(query):
+        if match.group('open'):
+            tokens.append(('open',))
+        elif match.group('close'):
+            tokens.append(('close',))
+        elif match.group('negate'):
+            tokens.append(('negate',))
+        elif match.group('key'):
+            key = match.group('key').lower()
+            if key not in search__keys:
+                raise ValueError(f"Unknown search key '{key}', expected one of {sorted(search__keys)}")
+            tokens.append(('term', search__keys[key], match.group('op'), match.group('value').strip('"').lower()))
+        elif match.group('word').lower() == 'or':
+            tokens.append(('or',))
+        elif match.group('word').lower() != 'and':
+            tokens.append(('term', 'name', ':', match.group('word').strip('"').lower()))
+
+    position = 0
+
+    # Recursive descent over: alternatives of conjunctions of (negated) terms or groups
+    def parse_or():
+        nonlocal position
+        nodes = [parse_and()]
+        while position < len(tokens) and tokens[position][0] == 'or':
+            position += 1
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and():
+        nodes = []
+        while position < len(tokens) and tokens[position][0] not in ('or', 'close'):
+            nodes.append(parse_unary())
+        if not nodes:
+            raise ValueError(f'Expected a search term in {query!r}')
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_unary():
+        nonlocal position
+        token     = tokens[position]
+        position += 1
+        if token[0] == 'negate':
+            return ('not', parse_unary())
+        if token[0] == 'open':
+            node = parse_or()
+            if position >= len(tokens) or tokens[position][0] != 'close':
+                raise ValueError(f'Unbalanced parentheses in {query!r}')
+            position += 1
+            return node
+        if token[0] == 'term':
+            return token
+        raise ValueError(f'Unexpected {token[0]!r} in {query!r}')
+
+    tree = parse_or()
+    if position != len(tokens):
+        raise ValueError(f'Unbalanced parentheses in {query!r}')
+
+    return tree
+
+
+
+# Function for the rows of an inverted index whose words start with a prefix
+def _word_rows(store, index, word):
+
+    """
+    Return a boolean mask of the rows containing a word starting with `word`,
+    using a binary search of the sorted vocabulary.
+    """
+
+    vocabulary = store[f'{index}_vocabulary']
+    offsets    = store[f'{index}_offsets']
+    lower      = np.searchsorted(vocabulary, word, side = 'left')
+    upper      = np.searchsorted(vocabulary, word + '\uffff', side = 'left')
+
+    mask = np.zeros(int(store['rows']), dtype = bool)
+    mask[store[f'{index}_postings'][offsets[lower]:offsets[upper]]] = True
+
+    return mask
+
+
+
+# Function for the rows whose text contains a phrase
+def _text_rows(store, index, phrase, within=None):
+
+    """
+    Return a boolean mask of the rows whose text contains every word of
+    `phrase` (as word prefixes), checking multi-word phrases as exact
+    substrings of the candidate oracle texts only. Rows outside `within` are
+    not checked and may be left either way.
+    """
+
+    words = search__word_pattern.findall(phrase)
+    if not words:
+        return np.ones(int(store['rows']), dtype = bool)
+
+    mask = np.logical_and.reduce([_word_rows(store, index, word) for word in words])
+
+    # Verifying the phrase on the candidates left by the index and the other terms
+    if len(words) > 1 and index == 'oracle':
+        if 'oracle_texts' not in store:
+            buffer, offsets       = store['oracle_text_bytes'].tobytes(), store['oracle_text_offsets']
+            store['oracle_texts'] = np.array([buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])], dtype = object)
+
+        rows = np.flatnonzero(mask if within is None else mask & within)
+        keep = np.fromiter((phrase in text for text in store['oracle_texts'][rows]), dtype = bool, count = len(rows))
+        mask = np.zeros(int(store['rows']), dtype = bool)
+        mask[rows[keep]] = True
+
+    return mask
+
+
+
+# Function for comparing a bitset column with a set of bits
+def _compare_bits(values, bits, op):
+
+    """
+    Compare bitsets with `bits`: ':' and '>=' mean superset, '<=' subset,
+    '=' equal, '!=' different and '<' / '>' strict subset / superset.
+    """
+
+    subset = bitset_subset(values, bits)
+    within = bitset_superset(values, bits)
+    bits   = values.dtype.type(bits)
+
+    return {'='  : values == bits
+           ,'!=' : values != bits
+           ,':'  : within if bits else values == 0
+           ,'>=' : within
+           ,'<=' : subset
+           ,'<'  : subset & (values != bits)
+           ,'>'  : within & (values != bits)}[op]
+
+
+
+# Function for comparing a numeric or code column with a value
+def _compare_values(values, value, op):
+
+    """
+    Compare an array with a scalar, ':' meaning equality.
+    """
+
+    return {':'  : values == value
+           ,'='  : values == value
+           ,'!=' : values != value
+           ,'<'  : values <  value
+           ,'<=' : values <= value
+           ,'>'  : values >  value
+           ,'>=' : values >= value}[op]
+
+
+
+# Function for evaluating one search term into a boolean mask
+def _evaluate_term(store, key, op, value, within=None):
+
+    """
+    Evaluate one parsed term over the card store, only rows in `within` being
+    guaranteed exact.
+    """
+
+    rows = int(store['rows'])
+
+    if key in ('colors', 'identity'):
+        if value in ('m', 'multicolor', 'multicolour'):
+            return bitset_count(store[key]) >= 2
+        labels  = store[f'{key}_labels'].tolist()
+        letters = set(search__colour_names.get(value, value).upper()) - {'C'}
+        if letters - set(labels) or not value.isalpha():
+            raise ValueError(f"Unknown colours '{value}', expected letters of {labels + ['C']} or a colour name")
+        bits = bitset_mask(letters, labels)
+        # Colour identity uses subset semantics, as in Scryfall ('fits in a commander deck')
+        return _compare_bits(store[key], bits, '<=' if key == 'identity' and op == ':' else op)
+
+    if key == 'type':
+        masks = []
+        for word in value.split():
+            for name in ('types', 'supertypes'):
+                labels = [label.lower() for label in store[f'{name}_labels'].tolist()]
+                if word in labels:
+                    masks.append(bitset_superset(store[name], 1 << labels.index(word)))
+                    break
+            else:
+                masks.append(_text_rows(store, 'type_line', word))
+        return np.logical_and.reduce(masks) if masks else np.ones(rows, dtype = bool)
+
+    if key in ('oracle', 'name'):
+        return _text_rows(store, key, value, within)
+
+    if key in ('mana_value', 'power', 'toughness'):
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"'{value}' is not a number for {key}") from None
+        return _compare_values(store[key], number, op)
+
+    if key == 'format':
+        labels = store['legal_labels'].tolist()
+        if value not in labels:
+            raise ValueError(f"Unknown format '{value}', expected one of {labels}")
+        return bitset_superset(store['legal'], bitset_mask([value], labels))
+
+    if key == 'rarity':
+        rarity = search__rarity_letter.get(value, value)
+        if rarity not in search__rarities:
+            raise ValueError(f"Unknown rarity '{value}', expected one of {search__rarities}")
+        return _compare_values(store['rarity'], search__rarities.index(rarity), op) & (store['rarity'] >= 0)
+
+    if key == 'set':
+        codes = np.flatnonzero(store['set_vocabulary'] == value)
+        mask  = store['set'] == codes[0] if len(codes) else np.zeros(rows, dtype = bool)
+        return ~mask if op == '!=' else mask
+
+    raise ValueError(f"Unsupported search key '{key}'")
+
+
+
+# Function for evaluating a syntax tree into a boolean mask
+def _evaluate(store, node, within=None):
+
+    """
+    Evaluate a tree from `parse_query` into a boolean mask over the store rows.
+    Only the rows in `within` (all rows when None) are guaranteed exact, which
+    lets conjunctions check oracle phrases on the rows their other terms keep.
+    """
+
+    if node[0] == 'term':
+        return _evaluate_term(store, *node[1:], within = within)
+    if node[0] == 'not':
+        return ~_evaluate(store, node[1], within)
+    if node[0] == 'or':
+        return np.logical_or.reduce([_evaluate(store, child, within) for child in node[1]])
+
+    # Evaluating the bitset and numeric terms before the phrase checks
+    mask = np.ones(int(store['rows']), dtype = bool) if within is None else within.copy()
+    for child in sorted(node[1], key = lambda child: 'oracle' in str(child)):
+        mask &= _evaluate(store, child, mask)
+
+    return mask
+
+
+
+# Function for running a search query over a card store
+def search_cards(store, query):
+
+    """
+    Run a Scryfall-like query over a card store.
+
+    Supported keys: c/color (colours), id/ci (colour identity), t/type,
+    o/oracle, mv/cmc, pow, tou, f/format/legal, r/rarity, s/set/e and n/name;
+    bare words search the card name. Operators are ':', '=', '!=', '<', '<=',
+    '>' and '>='. Words match as prefixes of the indexed words (o:fly matches
+    'flying') and quoted phrases must appear verbatim in the rules text.
+
+    Parameters
+    ----------
+    store : dict
+        Output of `build_card_store` or `load_card_store`.
+    query : str
+        The query, e.g. `c:r t:creature mv<=3 o:"draw a card" f:modern`.
+
+    Returns
+    -------
+    np.ndarray
+        Positions of the matching rows of the cards table the store was built from.
+    """
+
+    return np.flatnonzero(_evaluate(store, parse_query(query)))
+
+
+
+# Function for returning the cards matching a query
+def filter_cards(df_cards, store, query):
+
+    """
+    Return the rows of a cards table matching a query.
+
+    Parameters
+    ----------
+    df_cards : pd.DataFrame
+        The cards table the store was built from.
+    store : dict
+        Output of `build_card_store` or `load_card_store`.
+    query : str
+        The query, see `search_cards`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The matching cards.
+
+    Raises
+    ------
+    ValueError
+        If the store was built from a table with a different number of rows.
+    """
+
+    if len(df_cards) != int(store['rows']):
+        raise ValueError(f"The card store has {int(store['rows'])} rows but the cards table has {len(df_cards)}, rebuild the store")
+
+    return df_cards.iloc[search_cards(store, query)]
@@ -0,0 +1,470 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import time
+import heapq
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Database libraries
+from   sqlalchemy import text
+
+# Modular functions
+from   modules.utils_formats import format_statuses
+from   modules.utils_ragged  import RaggedArray
+from   modules.utils_sql     import create_index
+from   modules.utils_tabular import formats__legalities
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Cards of a constructed deck
+deck_builder__deck_size = 60
+
+# Copies of a card allowed in a deck, basic lands being unlimited
+deck_builder__copy_limit = 4
+
+# Supertype of the cards without a copy limit
+deck_builder__unlimited_supertype = 'Basic'
+
+# Seconds given to the solver before falling back to the greedy deck
+deck_builder__time_limit = 1.0
+
+# Best candidates by score considered for each local search swap
+deck_builder__swap_candidates = 4_096
+
+# Columns of the deck candidates
+columns__deck_candidates = ['CARD_UUID'
+                           ,'CARD_NAME'
+                           ,'TYPES'
+                           ,'SUPERTYPES'
+                           ,'MANA_VALUE'
+                           ,'EDHREC_RANK'
+                           ,'PRICE']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for creating the indexes the candidate query relies on
+def create_deck_builder_indexes(engine, schema_name='raw_data', cards_table='cards', prices_table='card_prices'):
+
+    """
+    Index the card uuids of the cards table and the (CARD_UUID, PRICE) pairs of
+    the prices table, so the candidate query joins the legal cards of a format
+    (see the legalities index of `create_format_views`) with index lookups.
+
+    The tables are uploaded by `upload_cards_table` and `upload_card_prices`,
+    which already create these indexes; this only restores them on tables
+    loaded some other way.
+
+    Returns
+    -------
+    list of str
+        Names of the indexes.
+    """
+
+    return [create_index(engine, schema_name, cards_table,  'CARD_UUID', unique = True)
+           ,create_index(engine, schema_name, prices_table, ['CARD_UUID', 'PRICE'])]
+
+
+
+# Function for writing the candidate query of a deck
+def deck_candidates_query(schema_name='raw_data', cards_table='cards', legalities_table='card_format_legalities', prices_table='card_prices', max_price=None):
+
+    """
+    Return the SQL selecting the cheapest non-foil priced printing of every
+    card legal in a format whose colour identity fits the deck's, with the bind
+    parameters :format_name, :statuses, :identity and :max_price.
+
+    The legalities table is read through its (FORMAT, STATUS, CARD_UUID)
+    index and the cards and prices through their CARD_UUID indexes, see
+    `create_deck_builder_indexes`.
+    """
+
+    price_filter = 'AND p."PRICE" <= :max_price' if max_price is not None else ''
+
+    return f"""
+            SELECT DISTINCT ON (c."CARD_NAME")
+                   {', '.join(f'{"p" if column == "PRICE" else "c"}."{column}"' for column in columns__deck_candidates)}
+            FROM {schema_name}.{legalities_table} l
+            JOIN {schema_name}.{cards_table} c
+              ON c."CARD_UUID" = l."CARD_UUID"
+            JOIN {schema_name}.{prices_table} p
+              ON p."CARD_UUID" = l."CARD_UUID"
+            WHERE l."FORMAT" = :format_name
+              AND l."STATUS" = ANY(:statuses)
+              AND NOT p."FOIL_FLAG"
+              AND COALESCE(c."COLOR_IDENTITY", '{{}}') <@ CAST(:identity AS TEXT[])
+              {price_filter}
+            ORDER BY c."CARD_NAME", p."PRICE", c."CARD_UUID"
+            """
+
+
+
+# Function for reading the candidate cards of a deck from the database
+def load_deck_candidates(engine
+                        ,format_name
+                        ,colour_identity  = ()
+                        ,max_price        = None
+                        ,schema_name      = 'raw_data'
+                        ,cards_table      = 'cards'
+                        ,legalities_table = 'card_format_legalities'
+                        ,prices_table     = 'card_prices'
+                        ,statuses         = format_statuses):
+
+    """
+    Select the cards a deck can be built from: legal in the format, within
+    the colour identity (no colour for a colourless deck) and priced, one row
+    per card name at its cheapest printing.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.engine.Engine
+        Engine connected to the database.
+    format_name : str
+        Lower case format, e.g. 'pauper'.
+    colour_identity : iterable of str
+        Colours of the deck, e.g. ['W', 'U'], empty for a colourless deck.
+    max_price : float, optional
+        Most expensive card considered, e.g. the budget.
+    schema_name : str
+        Schema of the tables.
+    cards_table : str
+        Cards table of `upload_cards_table`, with the `columns__deck_candidates`
+        and COLOR_IDENTITY as a TEXT[] array.
+    legalities_table : str
+        Long legalities table of `create_format_views`.
+    prices_table : str
+        Prices table of `upload_card_prices`, with one PRICE per CARD_UUID and
+        FOIL_FLAG.
+    statuses : list of str
+        Legality statuses kept, Legal and Restricted by default.
+
+    Returns
+    -------
+    pd.DataFrame
+        The `columns__deck_candidates` of every candidate.
+
+    Raises
+    ------
+    ValueError
+        If the format is not one of `formats__legalities`.
+    """
+
+    if format_name not in formats__legalities:
+        raise ValueError(f"Unknown format '{format_name}', expected one of {formats__legalities}")
+
+    query  = deck_candidates_query(schema_name, cards_table, legalities_table, prices_table, max_price)
+    params = {'format_name' : format_name
+             ,'statuses'    : list(statuses)
+             ,'identity'    : sorted(colour_identity)
+             ,'max_price'   : max_price}
+
+    return pd.read_sql_query(text(query), con = engine, params = params)
+
+
+
+# Function for scoring cards by their EDHREC rank
+def card_scores(df_candidates, rank_column='EDHREC_RANK'):
+
+    """
+    Score every candidate between 0 and 1 by its popularity rank, the most
+    played card scoring 1 and unranked cards 0.
+    """
+
+    ranks = pd.to_numeric(df_candidates[rank_column], errors = 'coerce')
+
+    return ranks.rank(ascending = False, pct = True).fillna(0).to_numpy(dtype = np.float64)
+
+
+
+# Function for dropping the candidates no optimal deck needs
+def _undominated(score, price, limit, signature, deck_size):
+
+    """
+    Flag the candidates not dominated by `deck_size` copies of cards with the
+    same type signature that cost no more and score higher: a deck playing a
+    dominated card always has a free copy of a better one to swap it for, so
+    dropping these cards keeps the best deck.
+    """
+
+    keep = np.zeros(len(score), dtype = bool)
+    for group in np.unique(signature):
+        cards = np.flatnonzero(signature == group)
+        cards = cards[np.lexsort((-score[cards], price[cards]))]
+
+        # Scores of the best `deck_size` copies seen so far, cheapest cards first
+        best = []
+        for card in cards:
+            if len(best) == deck_size and best[0] >= score[card]:
+                continue
+            keep[card] = True
+            for _ in range(min(limit[card], deck_size)):
+                if len(best) < deck_size:
+                    heapq.heappush(best, score[card])
+                elif best[0] < score[card]:
+                    heapq.heapreplace(best, score[card])
+
+    return keep
+
+
+
+# Function for choosing the deck with the integer program solver
+def _milp_deck(score, price, limit, deck_size, budget, type_masks, type_bounds, time_limit):
+
+    """
+    Solve the deck as an integer program maximising the score, returning the
+    counts and the solver status, or None when no deck was found in time.
+    """
+
+    from scipy.optimize import Bounds, LinearConstraint, milp
+
+    rows  = [np.ones_like(score), price] + type_masks
+    lower = [deck_size, -np.inf] + [low for low, _ in type_bounds]
+    upper = [deck_size, budget]  + [high for _, high in type_bounds]
+
+    result = milp(-score
+                 ,integrality = np.ones_like(score)
+                 ,bounds      = Bounds(0, limit)
+                 ,constraints = LinearConstraint(np.vstack(rows), lower, upper)
+                 ,options     = {'time_limit' : time_limit})
+    if result.x is None:
+        return None
+
+    return np.round(result.x).astype(np.int64), 'optimal' if result.status == 0 else 'time_limit'
+
+
+
+# Function for filling a deck greedily by score
+def _greedy_deck(score, price, limit, deck_size, budget, type_masks, type_bounds):
+
+    """
+    Fill the type minimums and then the rest of the deck with the copies of
+    the best scoring cards, keeping enough budget to fill the remaining slots
+    with the cheapest copies, and complete a short deck with the cheapest
+    copies left.
+    """
+
+    counts      = np.zeros(len(score), dtype = np.int64)
+    type_counts = np.zeros(len(type_masks), dtype = np.int64)
+    masks       = np.array(type_masks, dtype = bool).reshape(len(type_masks), len(score))
+    highs       = np.array([high for _, high in type_bounds], dtype = np.float64)
+
+    # Cost of the cheapest copies filling n slots, infinite when the pool holds fewer than n copies
+    cheapest = np.argsort(price, kind = 'stable')
+    fill     = np.concatenate([[0], np.cumsum(np.repeat(price[cheapest], np.minimum(limit[cheapest], deck_size))[:deck_size])])
+    fill     = np.pad(fill, (0, deck_size + 1 - len(fill)), constant_values = np.inf)
+    spent    = 0.0
+
+    def add(card, copies, reserve=True):
+        nonlocal spent
+        copies = min(copies, limit[card] - counts[card], deck_size - counts.sum())
+        fits   = masks[:, card]
+        if len(highs):
+            copies = min(copies, int(np.min(highs[fits] - type_counts[fits], initial = copies)))
+        while copies > 0 and spent + copies * price[card] + (fill[deck_size - counts.sum() - copies] if reserve else 0.0) > budget:
+            copies -= 1
+        if copies > 0:
+            counts[card]   += copies
+            type_counts[:] += copies * fits
+            spent          += copies * price[card]
+
+    order = np.argsort(-score, kind = 'stable')
+    for t, (low, _) in enumerate(type_bounds):
+        for card in order[masks[t][order]]:
+            if type_counts[t] >= low:
+                break
+            add(card, low - type_counts[t])
+
+    for card in order:
+        if counts.sum() >= deck_size:
+            break
+        add(card, limit[card])
+
+    # Completing the deck with the cheapest copies left
+    for card in cheapest:
+        if counts.sum() >= deck_size:
+            break
+        add(card, limit[card], reserve = False)
+
+    return counts
+
+
+
+# Function for filling a deck greedily under a range of price penalties
+def _penalised_greedy_deck(score, price, limit, deck_size, budget, type_masks, type_bounds):
+
+    """
+    Fill the deck greedily by score minus a penalty per unit of price, for no
+    penalty and a geometric range of penalties, and return the best scoring
+    deck, so a tight budget is spent on the cards that are worth their price.
+    """
+
+    penalties = [0.0]
+    if np.isfinite(budget) and (price > 0).any():
+        penalties += list(np.geomspace(1e-3, 1e3, 24) * score.max() / price[price > 0].mean())
+
+    decks = [_greedy_deck(score - penalty * price, price, limit, deck_size, budget, type_masks, type_bounds) for penalty in penalties]
+
+    return max(decks, key = lambda counts: (counts.sum() == deck_size, counts @ score))
+
+
+
+# Function for improving a deck by swapping single copies
+def _local_search(counts, score, price, limit, budget, type_masks, type_bounds, deadline):
+
+    """
+    Replace one copy of a card of the deck by one copy of a better card while
+    the swap keeps the budget and type bounds, taking the best swap each
+    time, until no swap improves the score or the deadline passes.
+    """
+
+    masks  = np.array(type_masks, dtype = bool).reshape(len(type_masks), len(score))
+    lows   = np.array([low  for low, _  in type_bounds], dtype = np.float64)
+    highs  = np.array([high for _, high in type_bounds], dtype = np.float64)
+    counts = counts.copy()
+
+    while time.perf_counter() < deadline:
+        slack       = budget - counts @ price
+        type_counts = masks.astype(np.int64) @ counts
+
+        # The best cards with a copy left against every card of the deck
+        adds    = np.flatnonzero(counts < limit)
+        adds    = adds[np.argsort(-score[adds], kind = 'stable')[:deck_builder__swap_candidates]]
+        removes = np.flatnonzero(counts > 0)
+
+        gain     = score[adds][:, None] - score[removes][None, :]
+        feasible = (gain > 1e-12) & (price[adds][:, None] - price[removes][None, :] <= slack + 1e-9) & (adds[:, None] != removes[None, :])
+        if len(type_bounds):
+            change   = masks[:, adds][:, :, None].astype(np.int64) - masks[:, removes][:, None, :]
+            after    = type_counts[:, None, None] + change
+            feasible &= ((after >= lows[:, None, None]) & (after <= highs[:, None, None])).all(axis = 0)
+        if not feasible.any():
+            break
+
+        best          = np.argmax(np.where(feasible, gain, -np.inf))
+        add, remove   = np.unravel_index(best, gain.shape)
+        counts[adds[add]]       += 1
+        counts[removes[remove]] -= 1
+
+    return counts
+
+
+
+# Function for building the best scoring deck within a budget
+def build_deck(df_candidates
+              ,deck_size    = deck_builder__deck_size
+              ,budget       = None
+              ,copy_limit   = deck_builder__copy_limit
+              ,type_counts  = None
+              ,scores       = None
+              ,price_column = 'PRICE'
+              ,method       = 'milp'
+              ,time_limit   = deck_builder__time_limit):
+
+    """
+    Choose how many copies of every candidate to play, maximising the total
+    score of the deck under the deck size, budget, copy limit and card type
+    bounds.
+
+    The selection is solved as an integer program (`scipy.optimize.milp`)
+    within `time_limit` seconds. When SciPy is missing, the solver finds no
+    deck in time or `method` is 'greedy', the deck is filled greedily by
+    score and improved by single copy swaps until the time limit.
+
+    Parameters
+    ----------
+    df_candidates : pd.DataFrame
+        Output of `load_deck_candidates`, one row per card name.
+    deck_size : int
+        Cards of the deck.
+    budget : float, optional
+        Most the deck can cost, unlimited when None.
+    copy_limit : int
+        Copies allowed per card, basic lands being unlimited.
+    type_counts : dict, optional
+        {card type : (fewest, most)} copies, e.g. {'Land' : (22, 26)}.
+    scores : array-like, optional
+        Score of every candidate, defaults to `card_scores`.
+    price_column : str
+        Column of `df_candidates` holding the price.
+    method : str
+        'milp' or 'greedy'.
+    time_limit : float
+        Seconds given to the solver, and to the local search of the fallback.
+
+    Returns
+    -------
+    tuple of (pd.DataFrame, dict)
+        The candidates of the deck with their COUNT, and the METHOD, STATUS,
+        CARDS, PRICE, SCORE and SECONDS of the solution.
+
+    Raises
+    ------
+    ValueError
+        If the affordable candidates hold fewer than `deck_size` copies, or
+        no deck of `deck_size` cards fits the budget and type bounds.
+    """
+
+    started     = time.perf_counter()
+    budget      = np.inf if budget is None else float(budget)
+    type_counts = type_counts or {}
+
+    # Candidates affordable on their own, as arrays
+    price = pd.to_numeric(df_candidates[price_column], errors = 'coerce').to_numpy(dtype = np.float64, na_value = np.nan)
+    keep  = ~np.isnan(price) & (price <= budget)
+    df    = df_candidates.loc[keep].reset_index(drop = True)
+    price = price[keep]
+    score = card_scores(df) if scores is None else np.asarray(scores, dtype = np.float64)[keep]
+    limit = np.where(RaggedArray.from_series(df['SUPERTYPES']).contains(deck_builder__unlimited_supertype), deck_size, copy_limit)
+    if np.minimum(limit, deck_size).sum() < deck_size:
+        raise ValueError(f'The {len(df)} affordable candidates allow only {np.minimum(limit, deck_size).sum()} of the {deck_size} cards of the deck')
+
+    types       = RaggedArray.from_series(df['TYPES'])
+    type_masks  = [types.contains(card_type) for card_type in type_counts]
+    type_bounds = [(low, high) for low, high in type_counts.values()]
+
+    # Dropping the cards dominated by cheaper and better cards of the same types
+    signature   = sum((mask.astype(np.int64) << t for t, mask in enumerate(type_masks)), np.zeros(len(df), dtype = np.int64))
+    keep        = _undominated(score, price, limit, signature, deck_size)
+    df, score, price, limit = df.loc[keep].reset_index(drop = True), score[keep], price[keep], limit[keep]
+    type_masks  = [mask[keep].astype(np.float64) for mask in type_masks]
+
+    counts, status = None, None
+    if method == 'milp':
+        try:
+            remaining      = max(started + time_limit - time.perf_counter(), 0.1)
+            counts, status = _milp_deck(score, price, limit, deck_size, budget, type_masks, type_bounds, remaining) or (None, None)
+        except ImportError:
+            pass
+
+    if counts is None:
+        method = 'greedy'
+        counts = _penalised_greedy_deck(score, price, limit, deck_size, budget, type_masks, type_bounds)
+        counts = _local_search(counts, score, price, limit, budget, type_masks, type_bounds, started + time_limit)
+        status = 'local_search'
+
+    # Checking the deck, the greedy fill not always finding one
+    type_totals = [mask @ counts for mask in type_masks]
+    if counts.sum() != deck_size or counts @ price > budget + 1e-9 or any(not low <= n <= high for n, (low, high) in zip(type_totals, type_bounds)):
+        raise ValueError(f'No deck of {deck_size} cards fits the budget of {budget} and the type counts {type_counts}')
+
+    df_deck = df.assign(COUNT = counts, SCORE = score)[counts > 0].sort_values(['COUNT', 'SCORE'], ascending = False, ignore_index = True)
+    summary = {'METHOD'  : method
+              ,'STATUS'  : status
+              ,'CARDS'   : int(counts.sum())
+              ,'PRICE'   : float(counts @ price)
+              ,'SCORE'   : float(counts @ score)
+              ,'SECONDS' : round(time.perf_counter() - started, 3)}
+
+    return df_deck, summary
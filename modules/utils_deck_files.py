@@ -0,0 +1,222 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import tarfile
+import hashlib
+from   concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Data libraries
+import pandas as pd
+
+# Modular functions
+from   modules.utils_download import mtgjson_url, fetch_sha256, iter_download_chunks, open_chunk_stream\
+                                  ,download_chunk_size
+from   modules.utils_json     import json_loads
+from   modules.utils_keys     import encode_key_columns
+from   modules.utils_ragged   import RaggedArray
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for flattening one deck into child-table rows
+def flatten_deck(deck, file_name=None):
+
+    """
+    Flatten the boards of one MTGJSON deck into compact child-table rows.
+
+    Only the count and uuid of each card are kept, so the full card objects
+    in AllDeckFiles never leave the worker process.
+
+    Parameters
+    ----------
+    deck : dict
+        The 'data' value of an MTGJSON deck file (or one entry of a set's
+        'decks' list).
+    file_name : str, optional
+        Name of the deck file inside the archive.
+
+    Returns
+    -------
+    dict
+        'info' holds one tuple (SET_CODE, DECK_NAME, RELEASE_DATE, DECK_TYPE,
+        FILE_NAME) and each key of `deck_files__boards` holds a list of
+        (SET_CODE, DECK_NAME, CARD_COUNT, uuid) tuples.
+    """
+
+    set_code  = deck.get('code')
+    deck_name = deck.get('name')
+
+    rows = {'info' : [(set_code, deck_name, deck.get('releaseDate'), deck.get('type'), file_name)]}
+    for board in deck_files__boards:
+        rows[board] = [(set_code, deck_name, card.get('count'), card.get('uuid'))
+                       for card in deck.get(board) or []
+                       if isinstance(card, dict)]
+
+    return rows
+
+
+
+# Function for parsing and flattening one deck file inside a worker process
+def _flatten_deck_file(file_name, data, backend):
+
+    """
+    Parse the bytes of one deck file and flatten it with `flatten_deck`.
+    Runs in the worker processes of `ingest_deck_files`.
+    """
+
+    return flatten_deck(json_loads(data, backend = backend)['data'], os.path.basename(file_name))
+
+
+
+# Function for streaming the decks of AllDeckFiles.tar.xz through a process pool
+def ingest_deck_files(source=None
+                     ,set_names   = None
+                     ,sha256      = True
+                     ,max_workers = None
+                     ,max_pending = 256
+                     ,backend     = None
+                     ,session     = None
+                     ,ragged      = False
+                     ,registry    = None):
+
+    """
+    Stream AllDeckFiles.tar.xz, iterating the tar members while they come out of
+    the xz decompressor, and flatten every deck in a process pool.
+
+    Nothing is extracted to disk: each member's bytes are read from the stream
+    and handed to a worker, and at most `max_pending` decks are in flight at any
+    time so memory stays bounded however large the archive is.
+
+    Parameters
+    ----------
+    source : str, optional
+        URL or local path of AllDeckFiles.tar.xz, defaults to the MTGJSON server.
+        Remote downloads resume with Range requests after dropped connections.
+    set_names : dict or pd.Series, optional
+        Set code to set name mapping used to fill SET_NAME, e.g. from the
+        sets_info table.
+    sha256 : bool
+        Whether to verify a remote archive against MTGJSON's published checksum
+        once the stream has been read to the end.
+    max_workers : int, optional
+        Number of worker processes, defaults to the number of cores.
+    max_pending : int
+        Maximum number of decks submitted but not yet collected.
+    backend : str, optional
+        JSON backend used by the workers, see `utils_json`.
+    session : requests.Session, optional
+        Session used for the download.
+    ragged : bool
+        Keep each board on its deck's row as two ragged list columns (e.g.
+        CARDS and CARD_COUNTS, see `utils_ragged`) instead of child tables.
+    registry : KeyRegistry, optional
+        Registry replacing the set codes and card uuids with int32 keys, see
+        `utils_keys`.
+
+    Returns
+    -------
+    dict
+        'set_decks_info' plus one dataframe per board: 'set_decks_cards',
+        'set_decks_side_boards' and 'set_decks_commanders', in the same shape as
+        the set_list notebook's child tables. With `ragged` only
+        'set_decks_info' is returned, with the board columns added.
+
+    Raises
+    ------
+    ValueError
+        If the downloaded archive does not match its SHA-256 checksum.
+    """
+
+    source = source or mtgjson_url('AllDeckFiles.tar.xz')
+
+    # Opening the archive as a forward-only stream, hashing remote bytes as they arrive
+    hasher = None
+    if os.path.exists(source):
+        fileobj = open(source, 'rb')
+    else:
+        hasher  = hashlib.sha256() if sha256 else None
+        fileobj = open_chunk_stream(iter_download_chunks(source, hasher = hasher, session = session))
+
+    rows    = {key : [] for key in ['info'] + deck_files__boards}
+    lengths = {key : [] for key in deck_files__boards}
+    pending = set()
+
+    # Moving finished decks into the row lists, a deck's board rows staying contiguous
+    def collect(done):
+        for future in done:
+            for key, values in future.result().items():
+                rows[key].extend(values)
+                if key in lengths:
+                    lengths[key].append(len(values))
+
+    with fileobj, tarfile.open(fileobj = fileobj, mode = 'r|xz') as archive\
+                , ProcessPoolExecutor(max_workers = max_workers) as executor:
+        for member in archive:
+            if not (member.isfile() and member.name.endswith('.json')):
+                continue
+
+            # Reading the member's bytes straight from the stream
+            data = archive.extractfile(member).read()
+            pending.add(executor.submit(_flatten_deck_file, member.name, data, backend))
+
+            # Waiting for some decks to finish before reading further
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                collect(done)
+
+        collect(wait(pending)[0])
+
+        # Reading past the end of the tar archive so the whole file is hashed
+        if hasher is not None:
+            while fileobj.read(download_chunk_size):
+                pass
+
+    # Checking the integrity of the download before returning any rows
+    if hasher is not None:
+        expected = fetch_sha256(source, session = session)
+        if hasher.hexdigest() != expected:
+            raise ValueError(f'SHA-256 mismatch for {source}: expected {expected}, got {hasher.hexdigest()}')
+
+    # Building the output tables
+    tables = {'set_decks_info' : pd.DataFrame(rows['info'], columns = ['SET_CODE', 'DECK_NAME', 'RELEASE_DATE', 'DECK_TYPE', 'FILE_NAME'])}
+    for board, (table_name, card_column) in deck_files__tables.items():
+        if ragged:
+            for column, position in [(f'{card_column}S', 3), (f'{card_column}_COUNTS', 2)]:
+                values = [row[position] for row in rows[board]]
+                values = registry.encode('uuid', values) if registry is not None and position == 3 else values
+                values = RaggedArray.from_flat(values, lengths[board])
+                tables['set_decks_info'][column] = values.to_series(name = column)
+            continue
+        tables[table_name] = pd.DataFrame(rows[board], columns = ['SET_CODE', 'DECK_NAME', 'CARD_COUNT', card_column])
+        tables[table_name]['CARD_COUNT'] = tables[table_name]['CARD_COUNT'].astype('Int64')
+
+    # Adding the set names and ordering the columns as in the set_list notebook
+    for table_name, df in tables.items():
+        df.insert(1, 'SET_NAME', df['SET_CODE'].map(set_names) if set_names is not None else pd.NA)
+        tables[table_name] = df.sort_values(['SET_CODE', 'DECK_NAME'], kind = 'stable').reset_index(drop = True)
+        if registry is not None:
+            tables[table_name] = encode_key_columns(tables[table_name], registry)
+
+    return tables
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Deck boards flattened into child tables
+deck_files__boards = ['mainBoard'
+                     ,'sideBoard'
+                     ,'commander']
+
+# Table name and card column of each board's child table
+deck_files__tables = {'mainBoard' : ('set_decks_cards',       'CARD')
+                     ,'sideBoard' : ('set_decks_side_boards', 'SIDE_BOARD_CARD')
+                     ,'commander' : ('set_decks_commanders',  'COMMANDER')}
@@ -0,0 +1,359 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_bitset      import bitset_enums, bitset_labels, bitset_dtype, bitset_count, encode_bitset
+from   modules.utils_card_search import search__rarities
+from   modules.utils_keys        import KeyRegistry, keys__null
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Last bucket of the mana curve, holding every spell of this mana value or more
+deck_stats__curve_max = 7
+
+# Type whose cards are left out of the mana curve and colour counts
+deck_stats__land_type = 'Land'
+
+# Columns identifying a deck in the deck tables
+deck_stats__deck_columns = ['SET_CODE'
+                           ,'DECK_NAME']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for summing weights per deck and bucket in one bincount
+def _bucket_counts(decks, buckets, weights, n_decks, n_buckets):
+
+    """
+    Return the (n_decks, n_buckets) sums of `weights` per deck and bucket,
+    entries with a negative bucket being left out.
+    """
+
+    keep = buckets >= 0
+
+    return np.bincount(decks[keep].astype(np.int64) * n_buckets + buckets[keep]
+                      ,weights   = weights[keep]
+                      ,minlength = n_decks * n_buckets).reshape(n_decks, n_buckets)
+
+
+
+# Function for summing weights per deck and set bit of a bitset
+def _bit_counts(decks, codes, weights, n_decks, n_bits):
+
+    """
+    Return the (n_decks, n_bits) sums of `weights` per deck and label, every
+    set bit of an entry's bitset counting once.
+    """
+
+    entries, bits = np.nonzero((codes[:, None] >> np.arange(n_bits, dtype = codes.dtype)) & 1)
+
+    return _bucket_counts(decks[entries], bits, weights[entries], n_decks, n_bits)
+
+
+
+# Function for reading keys from a value or an already encoded key column
+def _registry_keys(registry, namespace, values, add=True):
+
+    """
+    Return the int32 keys of `values` in a registry namespace, integer columns
+    (e.g. from `encode_key_columns`) being taken as keys as they are.
+    """
+
+    if not pd.api.types.is_integer_dtype(values):
+        return registry.encode(namespace, values, add = add)
+
+    keys = np.asarray(values, dtype = np.int32)
+    if (keys >= len(registry.values[namespace])).any():
+        raise ValueError(f"Integer '{namespace}' keys must come from the registry given, which does not hold them all")
+
+    return np.where(keys < 0, keys__null, keys).astype(np.int32)
+
+
+
+# Function for building the integer keyed arrays of the deck cards
+def build_deck_store(df_deck_cards, df_cards, card_column='CARD', count_column='CARD_COUNT', registry=None, enums=None):
+
+    """
+    Encode the decks and their cards as integer keyed arrays: one deck key,
+    card key and count per deck entry, and the card attributes the statistics
+    need (mana value, colours, types and rarity) indexed by card key.
+
+    Parameters
+    ----------
+    df_deck_cards : pd.DataFrame
+        Deck list table with SET_CODE, DECK_NAME, a card uuid and a count
+        column, e.g. `set_decks_cards` or its concatenation with
+        `set_decks_side_board` (renamed to the same columns). The card and
+        SET_CODE columns may hold the int32 keys of `encode_key_columns`, in
+        which case the registry that encoded them must be given.
+    df_cards : pd.DataFrame
+        Cards table with the `columns__rename_cards` names, e.g. `df__cards`,
+        with CARD_UUID as uuids or as keys of the registry.
+    card_column : str
+        Card uuid column of `df_deck_cards`.
+    count_column : str
+        Card count column of `df_deck_cards`, missing counts counting as 1.
+    registry : KeyRegistry, optional
+        Registry interning the card uuids, e.g. from `load_key_registry`, a
+        new one being started when None.
+    enums : dict, optional
+        Bitset labels from `load_bitset_enums`, defaults to the fallback labels.
+
+    Returns
+    -------
+    dict
+        The decks (SET_CODE and DECK_NAME, the deck key being the row
+        position), the entry arrays 'deck', 'card' and 'count', the card
+        arrays 'known' (in the cards table), 'mana_value', 'colors', 'types',
+        'produced' (mana produced) and 'rarity' with the bitset labels, the
+        card to entries index used by `reprice_decks` and the registry.
+    """
+
+    registry = registry or KeyRegistry()
+    enums    = enums or bitset_enums()
+    df_cards = df_cards.drop_duplicates('CARD_UUID', keep = 'last')
+
+    # Deck keys, decks without cards keeping their key and encoded set codes being decoded
+    deck_keys, df_decks = pd.MultiIndex.from_frame(df_deck_cards[deck_stats__deck_columns]).factorize()
+    df_decks            = df_decks.to_frame(index = False, name = deck_stats__deck_columns)
+    if pd.api.types.is_integer_dtype(df_decks['SET_CODE']):
+        df_decks['SET_CODE'] = pd.array(registry.decode('set_code', _registry_keys(registry, 'set_code', df_decks['SET_CODE'])), dtype = 'str')
+
+    # Card keys, cards missing from the cards table getting keys without attributes
+    card_keys  = _registry_keys(registry, 'uuid', df_cards['CARD_UUID'])
+    entry_keys = _registry_keys(registry, 'uuid', df_deck_cards[card_column])
+    counts     = pd.to_numeric(df_deck_cards[count_column], errors = 'coerce').fillna(1).to_numpy(dtype = np.float64)
+    entries    = (entry_keys != keys__null) & (deck_keys >= 0)
+
+    # Card attributes indexed by card key
+    n_cards    = len(registry.values['uuid'])
+    known      = np.zeros(n_cards, dtype = bool)
+    mana_value = np.full(n_cards, np.nan)
+    rarity     = np.full(n_cards, -1, dtype = np.int8)
+    known[card_keys]      = True
+    mana_value[card_keys] = pd.to_numeric(df_cards['MANA_VALUE'], errors = 'coerce').to_numpy(dtype = np.float64, na_value = np.nan)
+    rarity[card_keys]     = pd.Categorical(df_cards['RARITY'].astype('string').str.lower(), categories = search__rarities).codes
+
+    store = {'decks'      : df_decks
+            ,'deck'       : deck_keys[entries].astype(np.int32)
+            ,'card'       : entry_keys[entries]
+            ,'count'      : counts[entries]
+            ,'known'      : known
+            ,'mana_value' : mana_value
+            ,'rarity'     : rarity
+            ,'registry'   : registry}
+
+    for name, column_name, attribute in [('colors', 'COLORS', 'colors')
+                                        ,('types',  'TYPES',  'types')]:
+        labels                  = bitset_labels(df_cards[column_name], enums[attribute])
+        codes                   = np.zeros(n_cards, dtype = bitset_dtype(labels))
+        codes[card_keys]        = encode_bitset(df_cards[column_name], labels)
+        store[name]             = codes
+        store[f'{name}_labels'] = labels
+
+    # Colours of mana the cards produce, the colour bits keeping the order of the colour labels
+    produced_mana = df_cards['PRODUCED_MANA'] if 'PRODUCED_MANA' in df_cards.columns else pd.Series([None] * len(df_cards), dtype = object)
+    labels        = bitset_labels(produced_mana, store['colors_labels'])
+    store |= {'produced'        : np.zeros(n_cards, dtype = bitset_dtype(labels))
+             ,'produced_labels' : labels}
+    store['produced'][card_keys] = encode_bitset(produced_mana, labels)
+
+    # Entries grouped by card key, so a price change only touches the decks holding the card
+    store['card_order']   = np.argsort(store['card'], kind = 'stable')
+    store['card_offsets'] = np.concatenate([[0], np.cumsum(np.bincount(store['card'], minlength = n_cards))])
+
+    return store
+
+
+
+# Function for computing the composition statistics of every deck
+def deck_statistics(store):
+
+    """
+    Compute the card count, mana curve, colour distribution, rarity mix and
+    type breakdown of every deck at once, each statistic being one bincount
+    over the deck entries.
+
+    The curve and colour counts only cover non-land cards, the last curve
+    bucket holding every spell of `deck_stats__curve_max` or more. Cards
+    missing from the cards table count towards CARD_COUNT and UNIQUE_CARDS only.
+
+    Parameters
+    ----------
+    store : dict
+        Output of `build_deck_store`.
+
+    Returns
+    -------
+    pd.DataFrame
+        SET_CODE, DECK_NAME, CARD_COUNT, UNIQUE_CARDS, LAND_COUNT,
+        AVERAGE_MANA_VALUE, MANA_CURVE_0 to MANA_CURVE_<max>, COLOR_<colour>,
+        COLORLESS, MULTICOLOR, RARITY_<rarity> and TYPE_<type> per deck.
+    """
+
+    decks, cards, counts = store['deck'], store['card'], store['count']
+    n_decks              = len(store['decks'])
+    colors, types        = store['colors'][cards], store['types'][cards]
+    mana_value           = store['mana_value'][cards]
+
+    # Cards missing from the cards table are neither lands nor spells
+    land_bit = store['types_labels'].index(deck_stats__land_type)
+    known    = store['known'][cards]
+    lands    = known & (((types >> types.dtype.type(land_bit)) & 1) == 1)
+    spells   = known & ~lands
+    valued   = spells & ~np.isnan(mana_value)
+    per_deck = lambda weights: np.bincount(decks, weights = weights, minlength = n_decks)
+
+    df = store['decks'].copy()
+    df['CARD_COUNT']   = per_deck(counts).astype(np.int64)
+    df['UNIQUE_CARDS'] = np.bincount(decks, minlength = n_decks)
+    df['LAND_COUNT']   = per_deck(counts * lands).astype(np.int64)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        df['AVERAGE_MANA_VALUE'] = per_deck(np.where(valued, counts * np.nan_to_num(mana_value), 0)) / per_deck(counts * valued)
+
+    # Mana curve of the spells
+    buckets = np.where(valued, np.clip(np.floor(np.nan_to_num(mana_value)), 0, deck_stats__curve_max), -1).astype(np.int64)
+    curve   = _bucket_counts(decks, buckets, counts, n_decks, deck_stats__curve_max + 1)
+    df[[f'MANA_CURVE_{i}' for i in range(deck_stats__curve_max + 1)]] = curve.astype(np.int64)
+
+    # Colours of the spells
+    colours    = _bit_counts(decks, np.where(spells, colors, 0).astype(colors.dtype), counts, n_decks, len(store['colors_labels']))
+    n_colours  = bitset_count(colors)
+    df[[f'COLOR_{c}' for c in store['colors_labels']]] = colours.astype(np.int64)
+    df['COLORLESS']  = per_deck(counts * (spells & (n_colours == 0))).astype(np.int64)
+    df['MULTICOLOR'] = per_deck(counts * (spells & (n_colours > 1))).astype(np.int64)
+
+    # Rarity mix and type breakdown of every card
+    rarity = _bucket_counts(decks, store['rarity'][cards].astype(np.int64), counts, n_decks, len(search__rarities))
+    df[[f'RARITY_{r.upper()}' for r in search__rarities]] = rarity.astype(np.int64)
+    types  = _bit_counts(decks, np.where(known, types, 0).astype(types.dtype), counts, n_decks, len(store['types_labels']))
+    df[[f'TYPE_{t.upper()}' for t in store['types_labels']]] = types.astype(np.int64)
+
+    return df
+
+
+
+# Function for reading the price of every card key
+def _card_prices(store, df_prices, price_column):
+
+    """
+    Return the card keys and prices of `df_prices` for the cards of the store,
+    foil prices being left out when FOIL_FLAG is present.
+    """
+
+    if 'FOIL_FLAG' in df_prices.columns:
+        df_prices = df_prices[~df_prices['FOIL_FLAG'].astype(bool)]
+
+    keys   = _registry_keys(store['registry'], 'uuid', df_prices['CARD_UUID'], add = False)
+    prices = pd.to_numeric(df_prices[price_column], errors = 'coerce').to_numpy(dtype = np.float64, na_value = np.nan)
+    known  = (keys != keys__null) & (keys < len(store['mana_value']))
+
+    return keys[known], prices[known]
+
+
+
+# Function for computing the value of every deck
+def deck_values(store, df_prices, price_column='PRICE'):
+
+    """
+    Price every deck with one bincount of the entry counts times the card
+    prices.
+
+    The card prices are kept in the store, so when only prices change
+    `reprice_decks` updates the decks of the repriced cards instead of
+    pricing every deck again.
+
+    Parameters
+    ----------
+    store : dict
+        Output of `build_deck_store`, given a 'price' array by card key.
+    df_prices : pd.DataFrame
+        CARD_UUID and the price, non-foil prices being used when FOIL_FLAG is
+        present.
+    price_column : str
+        Column of `df_prices` holding the price.
+
+    Returns
+    -------
+    pd.DataFrame
+        SET_CODE, DECK_NAME, DECK_VALUE and UNPRICED_CARDS (number of cards
+        without a price) per deck.
+    """
+
+    keys, prices = _card_prices(store, df_prices, price_column)
+
+    store['price']       = np.full(len(store['mana_value']), np.nan)
+    store['price'][keys] = prices
+
+    entry_prices = store['price'][store['card']]
+    n_decks      = len(store['decks'])
+
+    df = store['decks'].copy()
+    df['DECK_VALUE']     = np.bincount(store['deck'], weights = store['count'] * np.nan_to_num(entry_prices), minlength = n_decks)
+    df['UNPRICED_CARDS'] = np.bincount(store['deck'], weights = store['count'] * np.isnan(entry_prices), minlength = n_decks).astype(np.int64)
+
+    return df
+
+
+
+# Function for updating the deck values with new card prices
+def reprice_decks(store, df_values, df_prices, price_column='PRICE'):
+
+    """
+    Update the deck values with the prices of some cards, only the entries of
+    those cards being read, so a daily price update costs the number of
+    repriced deck entries rather than the size of every deck list.
+
+    Parameters
+    ----------
+    store : dict
+        Output of `build_deck_store`, already priced by `deck_values`, its
+        'price' array being updated in place.
+    df_values : pd.DataFrame
+        Output of `deck_values` (or of a previous `reprice_decks`), left
+        unchanged.
+    df_prices : pd.DataFrame
+        CARD_UUID and the new price of the repriced cards, a missing price
+        removing the card's price.
+    price_column : str
+        Column of `df_prices` holding the price.
+
+    Returns
+    -------
+    pd.DataFrame
+        The updated copy of `df_values`.
+    """
+
+    keys, prices = _card_prices(store, df_prices, price_column)
+    keys, last   = np.unique(keys[::-1], return_index = True)
+    prices       = prices[::-1][last]
+
+    # Entries of the repriced cards, read from the card to entries index
+    starts, ends = store['card_offsets'][keys], store['card_offsets'][keys + 1]
+    lengths      = ends - starts
+    positions    = np.repeat(starts, lengths) + np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    entries      = store['card_order'][positions]
+
+    old, new = np.repeat(store['price'][keys], lengths), np.repeat(prices, lengths)
+    counts   = store['count'][entries]
+    decks    = store['deck'][entries]
+    n_decks  = len(store['decks'])
+
+    df = df_values.copy()
+    df['DECK_VALUE']     += np.bincount(decks, weights = counts * (np.nan_to_num(new) - np.nan_to_num(old)), minlength = n_decks)
+    df['UNPRICED_CARDS'] += np.bincount(decks, weights = counts * (np.isnan(new).astype(np.int8) - np.isnan(old)), minlength = n_decks).astype(np.int64)
+    store['price'][keys]  = prices
+
+    return df
@@ -3,8 +3,12 @@
 ###################################################################################################
 
 # Data libraries
+import numpy  as np
 import pandas as pd
 
+# Modular functions
+from   modules.utils_ragged import RaggedArray
+
 
 
 ###################################################################################################
@@ -55,4 +59,122 @@ def empty_value_summary(df: pd.DataFrame) -> pd.DataFrame:
             "pd.NA_count": pdna_count
         })
 
-    return pd.DataFrame(summary)
\ No newline at end of file
+    return pd.DataFrame(summary)
+
+
+
+# Function for replacing every kind of empty value in a dataframe with one null value
+def normalise_empty_values(df: pd.DataFrame
+                          ,null       = np.nan
+                          ,strings    : bool  = True
+                          ,containers : tuple = (list, tuple, dict, set, np.ndarray)
+                          ,columns    : list  = None) -> pd.DataFrame:
+    """
+    Replace None, NaN, pd.NA, empty strings and empty containers with a single
+    null value, e.g. after json_normalize or explode.
+
+    Only object columns can hold None, strings mixed with NaN or containers, so
+    numeric and boolean columns are skipped without being read, and string
+    dtype columns only have their empty strings set to their own missing value.
+    Each object column is read once: missing values are found in bulk with
+    `pd.isna`, empty strings and containers in a single pass over the values,
+    and the column is rewritten only if something changed.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The input DataFrame, left unchanged.
+    null : object
+        Value replacing the empty values, e.g. np.nan, None or pd.NA.
+    strings : bool
+        Replace empty strings as well.
+    containers : tuple of types
+        Container types whose empty instances are replaced, () to keep them.
+    columns : list, optional
+        Columns to normalise, defaults to every object column.
+
+    Returns
+    -------
+    pd.DataFrame
+        A shallow copy of the DataFrame with the normalised columns.
+    """
+    df = df.copy(deep = False)
+
+    for col in columns if columns is not None else df.columns:
+        # String dtype columns only hold strings or their own missing value
+        if isinstance(df[col].dtype, pd.StringDtype):
+            empty = (df[col] == '').to_numpy(dtype = bool, na_value = False) if strings else None
+            if empty is not None and empty.any():
+                df[col] = df[col].mask(empty)
+            continue
+        if df[col].dtype != object:
+            continue
+        values = df[col].to_numpy()
+
+        # Flagging missing values in bulk, then empty strings and containers in one pass
+        flags = pd.isna(values)
+        if strings or containers:
+            flags |= np.fromiter(((strings and x == '') if isinstance(x, str) else isinstance(x, containers) and len(x) == 0 for x in values)
+                                ,dtype = bool
+                                ,count = len(values))
+
+        # Rewriting the column only when a value is not already the null value
+        if flags.any() and not all(x is null for x in values[flags]):
+            values        = values.copy()
+            values[flags] = null
+            df[col]       = values
+
+    return df
+
+
+
+# Function for one-hot encoding a column of label lists
+def multi_label_one_hot(values, labels: list = None, index=None) -> pd.DataFrame:
+    """
+    Build a boolean matrix with one column per label from lists of labels,
+    e.g. set languages, card colours, finishes or availability.
+
+    The lists are flattened once into category codes and row positions, and the
+    matrix is filled with a single fancy-indexed assignment, so the cost grows
+    with the total number of labels rather than going through explode and a
+    pivot_table groupby. Missing or empty rows get an all-False row.
+
+    Parameters
+    ----------
+    values : iterable
+        Lists, tuples, Arrow converted arrays or ArrowDtype lists of labels, one
+        per row, anything else counting as no labels.
+    labels : list, optional
+        Labels of the columns, in order. Defaults to the sorted distinct labels
+        found in `values`.
+    index : pd.Index, optional
+        Index of the output, defaults to the index of `values` when it is a
+        Series.
+
+    Returns
+    -------
+    pd.DataFrame
+        One boolean column per label.
+
+    Raises
+    ------
+    ValueError
+        If `labels` is given and a row holds a label missing from it.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype = object)
+    index  = values.index if index is None else index
+    ragged = RaggedArray.from_series(values)
+
+    # Positions of the distinct values found in the column labels
+    labels    = sorted(ragged.dictionary) if labels is None else list(labels)
+    positions = pd.Index(labels).get_indexer(ragged.dictionary)
+    if (positions < 0).any():
+        raise ValueError(f'Labels {sorted(ragged.dictionary[positions < 0])} are not in the one-hot labels')
+
+    # Setting every (row, label) pair at once, missing list items being skipped
+    rows, codes = ragged.parents(), ragged.codes
+    matrix      = np.zeros((len(ragged), len(labels)), dtype = bool)
+    matrix[rows[codes >= 0], positions[codes[codes >= 0]]] = True
+
+    return pd.DataFrame(matrix, index = index, columns = labels)
+
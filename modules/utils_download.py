@@ -0,0 +1,606 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import io
+import os
+import json
+import lzma
+import time
+import hashlib
+
+# Web libraries
+import requests
+from   tqdm     import tqdm
+
+# Modular functions
+from   modules.utils_json import json_loads
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Base URL of the MTGJSON file server
+mtgjson_base_url = 'https://mtgjson.com/api/v5'
+
+# Default number of bytes read from the response per chunk (1 MB)
+download_chunk_size = 1024 * 1024
+
+# Suffix used for partially downloaded files
+partial_suffix = '.part'
+
+# Suffix of the sidecar file holding the ETag and Last-Modified headers of a download
+validators_suffix = '.validators.json'
+
+# Connection failures that trigger a resume instead of an immediate error
+resumable_errors = (requests.exceptions.ConnectionError
+                   ,requests.exceptions.ChunkedEncodingError
+                   ,requests.exceptions.Timeout)
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for building the URL of an MTGJSON file
+def mtgjson_url(file_name):
+
+    """
+    Build the full MTGJSON download URL for a file name.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the file on the MTGJSON server, e.g. 'AllPrintings.json.xz'.
+
+    Returns
+    -------
+    str
+        The full URL of the file.
+    """
+
+    return f'{mtgjson_base_url}/{file_name}'
+
+
+
+# Function for fetching the published SHA-256 checksum of a file
+def fetch_sha256(url, session=None, timeout=30):
+
+    """
+    Fetch the SHA-256 checksum MTGJSON publishes next to each artifact.
+
+    MTGJSON stores the checksum of every file at the same URL with a '.sha256'
+    suffix. The file contains the hex digest, optionally followed by the file name.
+
+    Parameters
+    ----------
+    url : str
+        URL of the artifact (not of the checksum file).
+    session : requests.Session, optional
+        Session used for the request, defaults to a plain `requests.get`.
+    timeout : float
+        Seconds to wait for the server before giving up.
+
+    Returns
+    -------
+    str
+        The lower case hex digest.
+
+    Raises
+    ------
+    ValueError
+        If the checksum file does not contain a valid SHA-256 digest.
+    """
+
+    # Requesting the checksum file
+    response = (session or requests).get(url + '.sha256', timeout = timeout)
+    response.raise_for_status()
+
+    # Taking the first token, as some checksum files also list the file name
+    digest = response.text.strip().split()[0].lower() if response.text.strip() else ''
+
+    # Checking the digest is 64 hex characters
+    if len(digest) != 64 or any(c not in '0123456789abcdef' for c in digest):
+        raise ValueError(f'Invalid SHA-256 checksum published for {url}: {response.text[:100]!r}')
+
+    return digest
+
+
+
+# Error raised when a resumed download finds the remote file replaced by another version
+class RemoteFileChangedError(IOError):
+
+    """
+    The server answered a resume with the whole of a different version of the
+    file, so the bytes already received cannot be completed and the download
+    has to start over.
+    """
+
+
+
+# Function for picking the validator sent in an If-Range header
+def _if_range_validator(etag, last_modified):
+
+    """
+    Return the strong ETag (weak ones are not allowed in If-Range), else the
+    Last-Modified date, else None.
+    """
+
+    if etag and not etag.startswith('W/'):
+        return etag
+
+    return last_modified or None
+
+
+
+# Function for streaming a file with automatic resumption after dropped connections
+def iter_download_chunks(url
+                        ,start       = 0
+                        ,hasher      = None
+                        ,chunk_size  = download_chunk_size
+                        ,max_retries = 5
+                        ,backoff     = 1.0
+                        ,session     = None
+                        ,timeout     = 60
+                        ,info        = None
+                        ,if_range    = None):
+
+    """
+    Yield the bytes of a remote file in chunks, resuming with HTTP Range requests
+    whenever the connection drops.
+
+    Each chunk is passed through `hasher` (if given) as it is yielded, so the
+    checksum is available as soon as the last chunk has been consumed without a
+    second pass over the data.
+
+    Parameters
+    ----------
+    url : str
+        URL of the file to stream.
+    start : int
+        Byte offset to start from, e.g. the size of an existing partial file.
+    hasher : hashlib hash object, optional
+        Hash object updated with every yielded chunk.
+    chunk_size : int
+        Number of bytes read from the response per chunk.
+    max_retries : int
+        Number of consecutive failed attempts (without any new bytes) allowed
+        before the error is raised.
+    backoff : float
+        Base number of seconds to wait between attempts, doubled per failure.
+    session : requests.Session, optional
+        Session used for the requests, defaults to a new session.
+    timeout : float
+        Seconds to wait for the server before an attempt counts as failed.
+    info : dict, optional
+        If given, filled once the first response arrives with 'total' (the full
+        size of the file, or None when the server does not report it) and the
+        'etag' and 'last_modified' validators of the file.
+    if_range : str, optional
+        ETag or Last-Modified date of the version the bytes before `start`
+        belong to, sent as If-Range so the server only sends the rest of that
+        version. Resumes after a dropped connection use the validators of the
+        first response when it is None.
+
+    Yields
+    ------
+    bytes
+        The next chunk of the file.
+
+    Raises
+    ------
+    RemoteFileChangedError
+        If a resume is answered with the whole file and its validators differ
+        from `if_range`, i.e. the file changed since the first bytes were read.
+    IOError
+        If the server returns a range that does not match the requested offset,
+        or the stream ends before the reported size was received.
+    """
+
+    # Using a single session so the connection can be reused across resumes
+    session  = session or requests.Session()
+    position = start
+    total    = None
+    failures = 0
+
+    while True:
+
+        # Asking only for the missing bytes of the same version when resuming
+        headers = {'Range': f'bytes={position}-'} if position > 0 else {}
+        if position > 0 and if_range:
+            headers['If-Range'] = if_range
+
+        try:
+            with session.get(url, headers = headers, stream = True, timeout = timeout) as response:
+
+                # The whole file is already present, its validators coming from a HEAD request as a 416 may not carry them
+                if response.status_code == 416 and position > 0:
+                    total = position
+                    if info is not None:
+                        head = session.head(url, timeout = timeout, allow_redirects = True)
+                        info['total'] = total
+                        info.setdefault('etag',          head.headers.get('ETag'))
+                        info.setdefault('last_modified', head.headers.get('Last-Modified'))
+                    break
+                response.raise_for_status()
+
+                # Keeping the validators of the version being read for the next resume
+                validator = _if_range_validator(response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+                # Working out how many bytes of the response to skip and the total file size
+                skip = 0
+                if response.status_code == 206:
+                    content_range = response.headers.get('Content-Range', '')
+                    range_start   = int(content_range.split()[1].split('-')[0]) if content_range else position
+                    if range_start != position:
+                        raise IOError(f'Server returned range starting at {range_start}, expected {position}')
+                    total_text = content_range.rsplit('/', 1)[-1] if content_range else '*'
+                    total      = int(total_text) if total_text.isdigit() else None
+                else:
+                    # A different version of the file cannot complete the bytes already read
+                    if position > 0 and if_range and validator != if_range:
+                        raise RemoteFileChangedError(f'{url} changed since byte {position} was read, the download has to start over')
+
+                    # The server ignored the Range header and is sending the same file again
+                    skip   = position
+                    length = response.headers.get('Content-Length')
+                    total  = int(length) if length and length.isdigit() else None
+
+                if_range = if_range or validator
+
+                # Reporting the size and cache validators back to the caller
+                if info is not None:
+                    info['total'] = total
+                    info.setdefault('etag',          response.headers.get('ETag'))
+                    info.setdefault('last_modified', response.headers.get('Last-Modified'))
+
+                for chunk in response.iter_content(chunk_size = chunk_size):
+                    # Filtering out keep-alive chunks
+                    if not chunk:
+                        continue
+                    # Dropping bytes that were already received before the resume
+                    if skip:
+                        dropped     = min(skip, len(chunk))
+                        chunk, skip = chunk[dropped:], skip - dropped
+                        if not chunk:
+                            continue
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    position += len(chunk)
+                    failures  = 0
+                    yield chunk
+
+            # Finished when the size is unknown or every byte has arrived
+            if total is None or position >= total:
+                break
+
+            # The server closed the stream early, so the remainder is requested again
+            failures += 1
+
+        except resumable_errors:
+            failures += 1
+
+        # Giving up after too many consecutive attempts without progress
+        if failures > max_retries:
+            raise IOError(f'Download of {url} stopped at byte {position} of {total} after {max_retries} retries')
+
+        time.sleep(backoff * 2 ** (failures - 1))
+
+    # Checking the stream did not end short of the reported size
+    if total is not None and position != total:
+        raise IOError(f'Download of {url} ended at byte {position}, expected {total}')
+
+
+
+# Function for checking whether a remote file changed since it was last downloaded
+def remote_file_changed(url, path, session=None, timeout=30):
+
+    """
+    Send a conditional GET for a file using the ETag and Last-Modified headers
+    stored when it was last downloaded with `download_file`.
+
+    The response body is never read, so an unchanged file costs a single
+    round trip instead of a full transfer.
+
+    Parameters
+    ----------
+    url : str
+        URL of the remote file.
+    path : str
+        Local path the file was downloaded to.
+    session : requests.Session, optional
+        Session used for the request.
+    timeout : float
+        Seconds to wait for the server before giving up.
+
+    Returns
+    -------
+    bool
+        False if the server answers 304 Not Modified for the local copy,
+        True otherwise (including when there is no local copy to compare).
+    """
+
+    # Without a local copy and its validators the file has to be downloaded
+    validators_path = path + validators_suffix
+    if not (os.path.exists(path) and os.path.exists(validators_path)):
+        return True
+
+    # Loading the validators saved with the last download
+    with open(validators_path) as f:
+        validators = json.load(f)
+
+    # Building the conditional request headers
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    if not headers:
+        return True
+
+    # Closing the response straight away, only the status code is needed
+    with (session or requests).get(url, headers = headers, stream = True, timeout = timeout) as response:
+        return response.status_code != 304
+
+
+
+# Function for reading the validators saved next to a file
+def _read_validators(validators_path):
+
+    """
+    Return the 'etag' and 'last_modified' saved at `validators_path`, or an
+    empty dictionary when there is no readable sidecar.
+    """
+
+    try:
+        with open(validators_path) as f:
+            return json.load(f) or {}
+    except (OSError, ValueError):
+        return {}
+
+
+
+# Function for deleting a partial download and its validators
+def _remove_partial(part_path):
+    for file_path in (part_path, part_path + validators_suffix):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+
+# Function for appending the missing bytes of a file to its partial download
+def _download_partial(url, part_path, chunk_size, max_retries, session, progress, if_range):
+
+    """
+    Hash the bytes already in `part_path`, append the rest of the file and
+    save the validators of the version being downloaded next to the partial
+    file, so an interrupted download resumes with If-Range.
+
+    Returns
+    -------
+    tuple of (hashlib hash object, dict)
+        The SHA-256 of the whole partial file and the `info` of
+        `iter_download_chunks`.
+    """
+
+    # Hashing the bytes of any existing partial download so the digest continues from there
+    hasher = hashlib.sha256()
+    start  = 0
+    if os.path.exists(part_path):
+        with open(part_path, 'rb') as f:
+            for block in iter(lambda: f.read(chunk_size), b''):
+                hasher.update(block)
+                start += len(block)
+
+    # Streaming the remaining bytes into the partial file
+    info  = {}
+    saved = if_range is not None
+    with open(part_path, 'ab') as f, tqdm(initial    = start
+                                         ,unit       = 'B'
+                                         ,unit_scale = True
+                                         ,desc       = os.path.basename(part_path[:-len(partial_suffix)])
+                                         ,disable    = not progress) as pbar:
+        for chunk in iter_download_chunks(url
+                                         ,start       = start
+                                         ,hasher      = hasher
+                                         ,chunk_size  = chunk_size
+                                         ,max_retries = max_retries
+                                         ,session     = session
+                                         ,info        = info
+                                         ,if_range    = if_range):
+            if not saved:
+                with open(part_path + validators_suffix, 'w') as v:
+                    json.dump({'etag' : info.get('etag'), 'last_modified' : info.get('last_modified')}, v)
+                saved = True
+            if pbar.total is None and info.get('total'):
+                pbar.total = info['total']
+            f.write(chunk)
+            pbar.update(len(chunk))
+
+    return hasher, info
+
+
+
+# Function for downloading a file to disk with resume and checksum verification
+def download_file(url
+                 ,path
+                 ,sha256          = True
+                 ,chunk_size      = download_chunk_size
+                 ,max_retries     = 5
+                 ,session         = None
+                 ,progress        = True
+                 ,only_if_changed = False):
+
+    """
+    Download a file to disk, resuming any partial download left by an earlier
+    attempt and verifying its SHA-256 checksum while the bytes stream in.
+
+    The bytes are written to `path` + '.part' and only moved to `path` once the
+    size and checksum have been verified, so a corrupt or truncated file never
+    reaches `lzma` or the JSON parser. The ETag and Last-Modified of the
+    version being downloaded are kept next to the partial file and sent as
+    If-Range on resume; a partial file without them, or whose version the
+    server no longer has, is discarded and the download starts over.
+
+    Parameters
+    ----------
+    url : str
+        URL of the file to download.
+    path : str
+        Destination path of the downloaded file.
+    sha256 : bool or str
+        True fetches the checksum MTGJSON publishes at `url` + '.sha256', a string
+        is used as the expected hex digest, and False skips the verification.
+    chunk_size : int
+        Number of bytes read from the response per chunk.
+    max_retries : int
+        Number of consecutive failed attempts allowed before giving up.
+    session : requests.Session, optional
+        Session used for the requests.
+    progress : bool
+        Whether to show a tqdm progress bar.
+    only_if_changed : bool
+        Skip the transfer when a conditional GET shows the local copy at `path`
+        is still current (see `remote_file_changed`).
+
+    Returns
+    -------
+    str
+        The path of the verified file.
+
+    Raises
+    ------
+    ValueError
+        If the checksum of the downloaded file does not match the expected one.
+        The partial file is deleted so the next attempt starts from zero.
+    """
+
+    # Sharing one session between the checksum and the file download
+    session = session or requests.Session()
+
+    # Keeping the local copy when the server reports it has not changed
+    if only_if_changed and not remote_file_changed(url, path, session = session):
+        return path
+
+    # Resolving the expected checksum before any large transfer
+    expected = fetch_sha256(url, session = session) if sha256 is True else (sha256.lower() if sha256 else None)
+
+    # Creating the destination folder if needed
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok = True)
+
+    # Reading the validators of the version any partial download belongs to
+    part_path       = path + partial_suffix
+    part_validators = _read_validators(part_path + validators_suffix)
+    if_range        = _if_range_validator(part_validators.get('etag'), part_validators.get('last_modified'))
+
+    # Discarding a partial download whose version is unknown, as its bytes could belong to an older file
+    if not if_range:
+        _remove_partial(part_path)
+
+    # Starting over once if the remote file changed since the partial download was written
+    for restart in (False, True):
+        try:
+            hasher, info = _download_partial(url, part_path, chunk_size, max_retries, session, progress, if_range)
+            break
+        except RemoteFileChangedError:
+            if restart:
+                raise
+            _remove_partial(part_path)
+            if_range, part_validators = None, {}
+
+    # Rejecting the file if the checksum does not match
+    if expected is not None and hasher.hexdigest() != expected:
+        _remove_partial(part_path)
+        raise ValueError(f'SHA-256 mismatch for {url}: expected {expected}, got {hasher.hexdigest()}')
+
+    # Moving the verified file into place and keeping its validators for later conditional requests
+    os.replace(part_path, path)
+    with open(path + validators_suffix, 'w') as f:
+        json.dump({'etag'          : info.get('etag')          or part_validators.get('etag')
+                  ,'last_modified' : info.get('last_modified') or part_validators.get('last_modified')}, f)
+    _remove_partial(part_path)
+
+    return path
+
+
+
+# Read-only file object over an iterator of byte chunks
+class _ChunkStream(io.RawIOBase):
+
+    """
+    Minimal raw stream exposing an iterator of bytes (e.g. `iter_download_chunks`)
+    through `readinto`, so stream readers such as `tarfile` can consume it.
+    """
+
+    def __init__(self, chunks):
+        self._chunks  = iter(chunks)
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        # Pulling the next non-empty chunk when the previous one is used up
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size          = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+
+# Function for opening an iterator of byte chunks as a buffered file object
+def open_chunk_stream(chunks, buffer_size=download_chunk_size):
+
+    """
+    Wrap an iterator of byte chunks in a buffered, read-only file object.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        E.g. `iter_download_chunks(url)`, so a remote file can be read as a
+        stream with Range resumption.
+    buffer_size : int
+        Size of the read buffer.
+
+    Returns
+    -------
+    io.BufferedReader
+        File object reading the chunks in order.
+    """
+
+    return io.BufferedReader(_ChunkStream(chunks), buffer_size = buffer_size)
+
+
+
+# Function for loading a downloaded .json.xz file into a dictionary
+def load_json_xz(path, backend=None):
+
+    """
+    Decompress and parse an MTGJSON .json.xz file from disk.
+
+    Parameters
+    ----------
+    path : str
+        Path of a file downloaded with `download_file`.
+    backend : str, optional
+        JSON backend used for parsing, see `utils_json.get_json_backend`.
+
+    Returns
+    -------
+    dict
+        The parsed JSON data.
+    """
+
+    # Decompressing the whole file and parsing it
+    with lzma.open(path, 'rb') as f:
+        return json_loads(f.read(), backend = backend)
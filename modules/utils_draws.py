@@ -0,0 +1,361 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import hashlib
+from   itertools import combinations_with_replacement
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_bitset     import bitset_count
+from   modules.utils_deck_stats import deck_stats__land_type
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Cards of the opening hand
+draws__hand_size = 7
+
+# Turns whose land drops and colours are reported
+draws__turns = 4
+
+# Lands of a hand worth keeping, both included
+draws__keep_lands = (2, 5)
+
+# Highest mana value of the spell a hand worth keeping must be able to cast
+draws__keep_mana_value = 2
+
+# Most card classes of a deck whose opening hands are enumerated exactly (3,432 hands for 8 classes),
+# decks with more classes being simulated
+draws__exact_classes = 8
+
+# Hands simulated per deck composition
+draws__samples = 2_000
+
+# Simulated hands held in memory at once
+draws__batch_rows = 1_000_000
+
+# Columns of the card classes of a deck composition
+columns__draw_classes = ['LAND'
+                        ,'PRODUCED'
+                        ,'COLORS'
+                        ,'COUNT']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for reducing every deck to the counts of its card classes
+def deck_compositions(store, keep_mana_value=draws__keep_mana_value):
+
+    """
+    Reduce every deck to the counts of the card classes the draw statistics
+    tell apart: lands by the deck colours they produce, spells castable in a
+    kept hand by colours, and every other spell.
+
+    Parameters
+    ----------
+    store : dict
+        Output of `build_deck_store`, e.g. over `set_decks_cards` or a table
+        of user decks with the same columns.
+    keep_mana_value : int
+        Highest mana value of the spells told apart by colour.
+
+    Returns
+    -------
+    tuple of (pd.DataFrame, np.ndarray, np.ndarray)
+        The classes (DECK key and `columns__draw_classes`, COLORS being 0 for
+        the other spells and LAND being -1 for them), the colours of every
+        deck's spells and the offsets of every deck's classes.
+    """
+
+    decks, cards = store['deck'], store['card']
+    n_decks      = len(store['decks'])
+    colour_mask  = (1 << len(store['colors_labels'])) - 1
+
+    land_bit = store['types_labels'].index(deck_stats__land_type)
+    lands    = ((store['types'][cards] >> store['types'].dtype.type(land_bit)) & 1) == 1
+    colours  = store['colors'][cards].astype(np.int64) & colour_mask
+
+    # Colours of the spells of every deck, the lands only counting for these colours
+    deck_colours = np.zeros(n_decks, dtype = np.int64)
+    np.bitwise_or.at(deck_colours, decks[~lands], colours[~lands])
+    produced     = np.where(lands, store['produced'][cards].astype(np.int64) & deck_colours[decks], 0)
+
+    # Spells castable in a kept hand are told apart by colour, the others are all alike
+    early = ~lands & (store['mana_value'][cards] <= keep_mana_value)
+    df    = pd.DataFrame({'DECK'     : decks
+                         ,'LAND'     : np.where(lands, 1, np.where(early, 0, -1))
+                         ,'PRODUCED' : produced
+                         ,'COLORS'   : np.where(early, colours, 0)
+                         ,'COUNT'    : store['count'].astype(np.int64)})
+    df    = df.groupby(['DECK'] + columns__draw_classes[:-1], as_index = False)['COUNT'].sum()
+
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(df['DECK'], minlength = n_decks))])
+
+    return df, deck_colours, offsets
+
+
+
+# Function for hashing the composition of every deck
+def composition_hashes(df_classes, deck_colours, offsets, parameters=()):
+
+    """
+    Hash the card classes, counts and colours of every deck together with the
+    parameters of the statistics, so decks of the same composition (e.g.
+    reprinted precons) share one cache entry.
+
+    Returns
+    -------
+    np.ndarray
+        One hexadecimal sha256 digest per deck.
+    """
+
+    rows   = np.ascontiguousarray(df_classes[columns__draw_classes].to_numpy(dtype = np.int64))
+    suffix = repr(parameters).encode()
+
+    return np.array([hashlib.sha256(rows[offsets[i]:offsets[i + 1]].tobytes() + deck_colours[i].tobytes() + suffix).hexdigest()
+                     for i in range(len(deck_colours))], dtype = object)
+
+
+
+# Function for computing the log of binomial coefficients
+def _log_comb(n, k):
+
+    """
+    Return log C(n, k), -inf where k is outside [0, n].
+    """
+
+    from scipy.special import gammaln
+
+    n, k = np.broadcast_arrays(np.asarray(n, dtype = np.float64), np.asarray(k, dtype = np.float64))
+    with np.errstate(invalid = 'ignore'):
+        log_comb = gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+
+    return np.where((k >= 0) & (k <= n), log_comb, -np.inf)
+
+
+
+# Function for flagging the hands worth keeping
+def _keep_hands(land, produced, colours, keep_lands):
+
+    """
+    Flag the hands holding `keep_lands` lands and a spell whose colours those
+    lands produce.
+
+    Parameters
+    ----------
+    land, produced, colours : np.ndarray
+        (..., hand size) attributes of the class of every card of the hands.
+    keep_lands : tuple of int
+        Fewest and most lands of a kept hand.
+
+    Returns
+    -------
+    np.ndarray
+        (...) flags.
+    """
+
+    n_lands   = (land == 1).sum(axis = -1)
+    available = np.bitwise_or.reduce(np.where(land == 1, produced, 0), axis = -1)
+    castable  = ((land == 0) & ((colours & ~available[..., None]) == 0)).any(axis = -1)
+
+    return (n_lands >= keep_lands[0]) & (n_lands <= keep_lands[1]) & castable
+
+
+
+# Function for computing the keep rate of decks by enumerating their opening hands
+def _exact_keep_rates(counts, land, produced, colours, hand_size, keep_lands):
+
+    """
+    Return the keep rate of decks with the same number of classes, summing
+    the multivariate hypergeometric probability of every opening hand.
+    """
+
+    n_classes = counts.shape[1]
+    hands     = np.array(list(combinations_with_replacement(range(n_classes), hand_size)), dtype = np.int64)
+    drawn     = np.array([np.bincount(hand, minlength = n_classes) for hand in hands])
+
+    # Log binomial coefficients of every class and number of cards drawn from it, gathered per hand
+    log_comb = _log_comb(counts[:, :, None], np.arange(hand_size + 1))
+    log_p    = log_comb[:, np.arange(n_classes), drawn].sum(axis = -1) - _log_comb(counts.sum(axis = 1), hand_size)[:, None]
+    keep     = _keep_hands(land[:, hands], produced[:, hands], colours[:, hands], keep_lands)
+
+    return (np.exp(log_p) * keep).sum(axis = 1)
+
+
+
+# Function for estimating the keep rate of decks by drawing opening hands
+def _simulated_keep_rates(classes, n_classes, hashes, hand_size, keep_lands, samples, seed):
+
+    """
+    Return the keep rate of decks whose classes are concatenated in
+    `classes`, drawing `samples` hands per deck.
+
+    The cards of every hand are drawn without replacement with Floyd's
+    algorithm, one vectorised step per card for every hand at once, and
+    mapped to their class through the class of every card of the decks.
+    The uniforms of every deck come from a generator seeded with the seed and
+    the deck's composition hash, so an estimate does not depend on the other
+    decks simulated with it.
+    """
+
+    land, produced, colours, counts = classes.T
+    card_class = np.repeat(np.arange(len(classes)), counts)
+    first_card = np.concatenate([[0], np.cumsum(counts)[np.cumsum(n_classes) - 1]])
+    deck_size  = np.repeat(np.diff(first_card), samples)
+    uniforms   = np.concatenate([np.random.default_rng(np.random.SeedSequence(seed, spawn_key = (int(h[:8], 16),))).random((samples, hand_size))
+                                 for h in hashes])
+
+    # Drawing card positions, a position already drawn being replaced by the top of the range
+    positions = np.zeros((len(deck_size), hand_size), dtype = np.int64)
+    for draw in range(hand_size):
+        top                = deck_size - hand_size + draw
+        picks              = (uniforms[:, draw] * (top + 1)).astype(np.int64)
+        positions[:, draw] = np.where((positions[:, :draw] == picks[:, None]).any(axis = 1), top, picks)
+
+    drawn = card_class[positions + np.repeat(first_card[:-1], samples)[:, None]]
+    keep  = _keep_hands(land[drawn], produced[drawn], colours[drawn], keep_lands)
+
+    return keep.reshape(len(hashes), samples).mean(axis = 1)
+
+
+
+# Function for computing the draw statistics of deck compositions
+def _composition_statistics(compositions, labels, hand_size, turns, on_play, keep_lands, samples, seed):
+
+    """
+    Compute the statistics of `draw_statistics` for a list of (hash, deck
+    colours, classes) compositions, returning one dictionary per composition.
+    """
+
+    from scipy.stats import hypergeom
+
+    n_classes = np.array([len(classes) for _, _, classes in compositions])
+    padded    = np.zeros((len(compositions), max(n_classes.max(), 1), len(columns__draw_classes)), dtype = np.int64)
+    for i, (_, _, classes) in enumerate(compositions):
+        padded[i, :len(classes)] = classes
+    land, produced, colours, counts = np.moveaxis(padded, -1, 0)
+
+    deck_colours = np.array([c for _, c, _ in compositions], dtype = np.int64)
+    deck_size    = counts.sum(axis = 1)
+    n_lands      = (counts * (land == 1)).sum(axis = 1)
+    seen         = {t : hand_size + t - 1 + (not on_play) for t in range(1, turns + 1)}
+    stats        = {'DECK_SIZE'   : deck_size
+                   ,'LAND_COUNT'  : n_lands
+                   ,'DECK_COLORS' : np.array([''.join(l for i, l in enumerate(labels) if c >> i & 1) for c in deck_colours], dtype = object)}
+
+    # Lands in the opening hand and land drops, the lands drawn being hypergeometric
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        stats['OPENING_LANDS'] = hypergeom.cdf(keep_lands[1], deck_size, n_lands, hand_size) - hypergeom.cdf(keep_lands[0] - 1, deck_size, n_lands, hand_size)
+        for t, n in seen.items():
+            stats[f'LAND_DROP_T{t}'] = hypergeom.sf(t - 1, deck_size, n_lands, n)
+
+    # Sources of every deck colour, by inclusion-exclusion over the colours missed
+    subsets = np.arange(1, 2 ** len(labels))
+    signs   = np.where(bitset_count(subsets.astype(np.uint64)) % 2 == 1, -1.0, 1.0)
+    wanted  = (subsets[None, :] & ~deck_colours[:, None]) == 0
+    sources = (counts[:, None, :] * ((produced[:, None, :] & subsets[None, :, None]) != 0)).sum(axis = -1)
+    for t, n in seen.items():
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            missed = hypergeom.pmf(0, deck_size[:, None], sources, n)
+        stats[f'COLORS_T{t}'] = np.clip(1 + (wanted * signs * missed).sum(axis = 1), 0, 1)
+
+    # Keep rate, exact for the decks with few classes and simulated for the others
+    keep_rate   = np.full(len(compositions), np.nan)
+    keep_method = np.where(n_classes <= draws__exact_classes, 'exact', 'monte_carlo').astype(object)
+    playable    = deck_size >= hand_size
+    for k in np.unique(n_classes[playable & (n_classes <= draws__exact_classes)]):
+        rows            = np.flatnonzero(playable & (n_classes == k))
+        keep_rate[rows] = _exact_keep_rates(counts[rows, :k], land[rows, :k], produced[rows, :k], colours[rows, :k], hand_size, keep_lands)
+
+    simulated = np.flatnonzero(playable & (n_classes > draws__exact_classes))
+    batch     = max(draws__batch_rows // samples, 1)
+    for start in range(0, len(simulated), batch):
+        rows            = simulated[start:start + batch]
+        keep_rate[rows] = _simulated_keep_rates(np.concatenate([compositions[i][2] for i in rows]), n_classes[rows]
+                                               ,[compositions[i][0] for i in rows], hand_size, keep_lands, samples, seed)
+
+    stats |= {'KEEP_RATE' : keep_rate, 'KEEP_METHOD' : np.where(playable, keep_method, None)}
+    for name, values in stats.items():
+        if name.startswith(('OPENING_LANDS', 'LAND_DROP', 'COLORS_T')):
+            stats[name] = np.where(playable, values, np.nan)
+
+    return [{name : values[i] for name, values in stats.items()} for i in range(len(compositions))]
+
+
+
+# Function for computing the opening hand and mana statistics of every deck
+def draw_statistics(store, cache=None, hand_size=draws__hand_size, turns=draws__turns, on_play=True
+                   ,keep_lands=draws__keep_lands, keep_mana_value=draws__keep_mana_value, samples=draws__samples, seed=0):
+
+    """
+    Compute the land drop, colour availability and keep rate probabilities of
+    every deck.
+
+    Land counts are hypergeometric and colour availability follows by
+    inclusion-exclusion over the deck colours, both exact. The keep rate
+    (opening hands with `keep_lands` lands and a spell of mana value
+    `keep_mana_value` or less whose colours those lands produce) sums the
+    multivariate hypergeometric probability of every hand for decks of up to
+    `draws__exact_classes` card classes and is estimated from `samples`
+    hands per deck, drawn for every deck at once, for the others. Only lands
+    count as mana sources.
+
+    Parameters
+    ----------
+    store : dict
+        Output of `build_deck_store`.
+    cache : dict, optional
+        {composition hash : statistics}, filled in place so decks sharing a
+        composition, or seen in a previous call, are not computed again.
+    hand_size : int
+        Cards of the opening hand.
+    turns : int
+        Turns whose land drops and colours are reported.
+    on_play : bool
+        Whether the deck skips the draw of its first turn.
+    keep_lands : tuple of int
+        Fewest and most lands of a kept hand.
+    keep_mana_value : int
+        Highest mana value of the spell a kept hand must be able to cast.
+    samples : int
+        Hands simulated per deck when the keep rate is not enumerated.
+    seed : int
+        Seed of the simulations.
+
+    Returns
+    -------
+    pd.DataFrame
+        SET_CODE, DECK_NAME, COMPOSITION_HASH, DECK_SIZE, LAND_COUNT,
+        DECK_COLORS, OPENING_LANDS, LAND_DROP_T<turn>, COLORS_T<turn>,
+        KEEP_RATE and KEEP_METHOD ('exact' or 'monte_carlo') per deck, the
+        probabilities being missing for decks smaller than a hand.
+    """
+
+    cache                         = {} if cache is None else cache
+    df_classes, colours, offsets  = deck_compositions(store, keep_mana_value)
+    parameters                    = (hand_size, turns, on_play, tuple(keep_lands), keep_mana_value, samples, seed)
+    hashes                        = composition_hashes(df_classes, colours, offsets, parameters)
+
+    # Computing every composition missing from the cache once
+    classes = df_classes[columns__draw_classes].to_numpy(dtype = np.int64)
+    missing = {h : i for i, h in enumerate(hashes) if h not in cache}
+    if missing:
+        compositions = [(h, colours[i], classes[offsets[i]:offsets[i + 1]]) for h, i in missing.items()]
+        labels       = store['colors_labels']
+        cache.update(zip(missing, _composition_statistics(compositions, labels, hand_size, turns, on_play, keep_lands, samples, seed)))
+
+    df = store['decks'].copy()
+    df['COMPOSITION_HASH'] = hashes
+
+    return pd.concat([df, pd.DataFrame([cache[h] for h in hashes], index = df.index)], axis = 1)
@@ -0,0 +1,439 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import shutil
+
+# Data libraries
+import pandas          as pd
+import pyarrow         as pa
+import pyarrow.dataset as pa_ds
+
+# Database libraries
+from   sqlalchemy import inspect, text
+
+# Modular functions
+from   modules.utils_ragged  import ragged_columns
+from   modules.utils_sql     import upload_indexed_table
+from   modules.utils_tabular import formats__legalities
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Format of each MTGJSON format file replaced by a derived subset (the *Atomic files use the same format)
+format_files = {'Legacy'   : 'legacy'
+               ,'Modern'   : 'modern'
+               ,'Pauper'   : 'pauper'
+               ,'Pioneer'  : 'pioneer'
+               ,'Standard' : 'standard'
+               ,'Vintage'  : 'vintage'}
+
+# Legality statuses of the cards kept in a format subset
+format_statuses = ['Legal'
+                  ,'Restricted']
+
+# Columns ordering the printings of a card when keeping the latest one (the last in this order)
+columns__latest_printing = ['RELEASE_DATE'
+                           ,'CARD_UUID']
+
+# Columns of the cards table the format views and the deck builder read (SCRYFALL_ORACLE_ID when present)
+columns__cards_table = ['CARD_UUID'
+                       ,'CARD_NAME'
+                       ,'FACE_NAME'
+                       ,'SIDE'
+                       ,'SCRYFALL_ORACLE_ID'
+                       ,'SET_CODE'
+                       ,'CARD_NUMBER'
+                       ,'RELEASE_DATE'
+                       ,'LAYOUT'
+                       ,'RARITY'
+                       ,'MANA_VALUE'
+                       ,'MANA_COST'
+                       ,'TYPE_LINE'
+                       ,'COLORS'
+                       ,'COLOR_IDENTITY'
+                       ,'TYPES'
+                       ,'SUPERTYPES'
+                       ,'SUBTYPES'
+                       ,'EDHREC_RANK']
+
+# List columns of the cards table, uploaded as TEXT[] arrays
+columns__cards_table_lists = ['COLORS'
+                             ,'COLOR_IDENTITY'
+                             ,'TYPES'
+                             ,'SUPERTYPES'
+                             ,'SUBTYPES']
+
+# Columns of the long card legalities table
+columns__card_format_legalities = ['CARD_UUID'
+                                  ,'FORMAT'
+                                  ,'STATUS']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for reshaping card legalities into one row per card and format
+def card_format_legalities(df):
+
+    """
+    Reshape card legalities into a long table with one row per card and format.
+
+    Accepts either the card_legalities table of the tabular distribution (a
+    CARD_UUID column and one upper case column per format) or a cards table
+    with the LEGALITIES dictionaries of AllPrintings.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        card_legalities table, or cards table with CARD_UUID and LEGALITIES.
+
+    Returns
+    -------
+    pd.DataFrame
+        CARD_UUID, FORMAT (lower case, as in `formats__legalities`) and STATUS,
+        with categorical FORMAT and STATUS. Formats a card has no status in are
+        left out.
+    """
+
+    # Expanding the dictionaries of AllPrintings into one column per format
+    if 'LEGALITIES' in df.columns:
+        wide = pd.DataFrame([x if isinstance(x, dict) else {} for x in df['LEGALITIES']], index = df.index)
+        wide = wide.rename(columns = str.upper)
+        wide.insert(0, 'CARD_UUID', df['CARD_UUID'])
+    else:
+        wide = df
+
+    format_columns = [f.upper() for f in formats__legalities if f.upper() in wide.columns]
+
+    # Melting the format columns and dropping the formats without a status
+    df_long = wide.melt(id_vars    = ['CARD_UUID']
+                       ,value_vars = format_columns
+                       ,var_name   = 'FORMAT'
+                       ,value_name = 'STATUS')
+    df_long = df_long.loc[df_long['STATUS'].notna()].reset_index(drop = True)
+
+    df_long['FORMAT'] = pd.Categorical(df_long['FORMAT'].str.lower(), categories = formats__legalities)
+    df_long['STATUS'] = df_long['STATUS'].astype('category')
+
+    return df_long[columns__card_format_legalities]
+
+
+
+# Function for deriving the cards of one format from the cards and legalities tables
+def format_subset(df_cards, df_legalities, format_name, atomic=False, statuses=format_statuses):
+
+    """
+    Derive the equivalent of an MTGJSON format file (e.g. Modern) or its Atomic
+    variant (e.g. ModernAtomic) from the cards already ingested.
+
+    Parameters
+    ----------
+    df_cards : pd.DataFrame
+        Cards table with CARD_UUID, e.g. from `printings_table_to_pandas`.
+    df_legalities : pd.DataFrame
+        Output of `card_format_legalities`.
+    format_name : str
+        Lower case format, e.g. 'modern'.
+    atomic : bool
+        Keep one row per card face (the latest printing of each oracle id, or
+        name when the cards carry no oracle id, and SIDE) like the *Atomic
+        files. Printings are ordered by RELEASE_DATE then CARD_UUID, so the
+        result does not depend on the row order of `df_cards`.
+    statuses : list of str
+        Legality statuses kept, Legal and Restricted by default.
+
+    Returns
+    -------
+    pd.DataFrame
+        The rows of `df_cards` legal in the format, in their original order.
+
+    Raises
+    ------
+    ValueError
+        If the format is not one of `formats__legalities`.
+    """
+
+    if format_name not in formats__legalities:
+        raise ValueError(f"Unknown format '{format_name}', expected one of {formats__legalities}")
+
+    # Filtering the long legalities on the categorical format and status
+    legal = df_legalities.loc[(df_legalities['FORMAT'] == format_name) & df_legalities['STATUS'].isin(statuses), 'CARD_UUID']
+    df    = df_cards.loc[df_cards['CARD_UUID'].isin(legal)]
+
+    # Keeping the latest printing of each card face for the Atomic variant, in the original order
+    if atomic:
+        key   = ['SCRYFALL_ORACLE_ID' if 'SCRYFALL_ORACLE_ID' in df.columns else 'CARD_NAME'] + [c for c in ['SIDE'] if c in df.columns]
+        order = [c for c in columns__latest_printing if c in df.columns]
+        df    = df.reset_index(drop = True).sort_values(order, kind = 'stable', na_position = 'first').drop_duplicates(key, keep = 'last').sort_index()
+
+    return df.reset_index(drop = True)
+
+
+
+# Function for writing every format subset as a Parquet partition
+def write_format_partitions(df_cards, df_legalities, folder, formats=None, columns=None):
+
+    """
+    Write the cards legal in each format as a hive partitioned Parquet dataset,
+    e.g. folder/FORMAT=modern/part-0.parquet, replacing the per format files.
+
+    Parameters
+    ----------
+    df_cards : pd.DataFrame
+        Cards table with CARD_UUID.
+    df_legalities : pd.DataFrame
+        Output of `card_format_legalities`.
+    folder : str
+        Root folder of the dataset, existing partitions are overwritten.
+    formats : list of str, optional
+        Formats written, defaults to those of `format_files`.
+    columns : list of str, optional
+        Card columns written, defaults to all of them.
+
+    Returns
+    -------
+    dict
+        Number of cards written per format.
+    """
+
+    formats = formats or list(format_files.values())
+    df      = df_cards if columns is None else df_cards[['CARD_UUID'] + [c for c in columns if c != 'CARD_UUID']]
+
+    # Writing each format as its own partition
+    counts = {}
+    for format_name in formats:
+        subset = format_subset(df, df_legalities, format_name)
+
+        # Clearing the previous partition, which would otherwise survive a format becoming empty
+        shutil.rmtree(os.path.join(folder, f'FORMAT={format_name}'), ignore_errors = True)
+        pa_ds.write_dataset(pa.Table.from_pandas(subset.assign(FORMAT = format_name), preserve_index = False)
+                           ,base_dir               = folder
+                           ,format                 = 'parquet'
+                           ,partitioning           = pa_ds.partitioning(pa.schema([('FORMAT', pa.string())]), flavor = 'hive')
+                           ,existing_data_behavior = 'delete_matching'
+                           ,basename_template      = 'part-{i}.parquet')
+        counts[format_name] = len(subset)
+
+    return counts
+
+
+
+# Function for reading one format back from the Parquet partitions
+def read_format_partition(folder, format_name, columns=None):
+
+    """
+    Read the cards of one format from `write_format_partitions`, only opening
+    the files of its partition.
+
+    Parameters
+    ----------
+    folder : str
+        Root folder of the dataset.
+    format_name : str
+        Lower case format, e.g. 'modern'.
+    columns : list of str, optional
+        Columns read, defaults to all of them.
+
+    Returns
+    -------
+    pd.DataFrame
+        The cards of the format.
+    """
+
+    dataset = pa_ds.dataset(folder, format = 'parquet', partitioning = 'hive')
+    table   = dataset.to_table(columns = columns, filter = pa_ds.field('FORMAT') == format_name)
+
+    return table.to_pandas().drop(columns = 'FORMAT', errors = 'ignore')
+
+
+
+# Function for dropping the format views in PostgreSQL
+def drop_format_views(engine, schema_name='raw_data', cards_table='cards', formats=None):
+
+    """
+    Drop the views of `create_format_views`, which PostgreSQL would otherwise
+    keep as dependants of the cards and legalities tables and so block
+    replacing those tables (e.g. `to_sql(if_exists='replace')`).
+
+    Call it before re-uploading the cards table, then `create_format_views`
+    again once the new table is in place.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.engine.Engine
+        Engine connected to the database.
+    schema_name : str
+        Schema of the views.
+    cards_table : str
+        Name of the cards table the views read.
+    formats : list of str, optional
+        Formats whose views are dropped, defaults to those of `format_files`.
+
+    Returns
+    -------
+    list of str
+        Names of the views dropped (if they existed).
+    """
+
+    formats = formats or list(format_files.values())
+    views   = [v for f in formats for v in (f'{cards_table}_{f}_atomic', f'{cards_table}_{f}')]
+
+    with engine.begin() as conn:
+        for view in views:
+            conn.execute(text(f'DROP VIEW IF EXISTS {schema_name}.{view}'))
+
+    return views
+
+
+
+# Function for uploading the cards table the format views and the deck builder read
+def upload_cards_table(df_cards
+                      ,engine
+                      ,schema_name = 'raw_data'
+                      ,table_name  = 'cards'
+                      ,columns     = columns__cards_table
+                      ,formats     = None):
+
+    """
+    Replace the cards table with the `columns__cards_table` of the cards (those
+    present), the list columns uploaded as TEXT[] arrays so the deck builder
+    can filter on COLOR_IDENTITY, with a unique index on CARD_UUID.
+
+    The format views over the table are dropped first, so call
+    `create_format_views` again once the table is uploaded.
+
+    Parameters
+    ----------
+    df_cards : pd.DataFrame
+        Cards with the columns of `columns__rename_cards`, e.g. from
+        `printings_table_to_pandas`, with Python lists or ragged list columns.
+    engine : sqlalchemy.engine.Engine
+        Engine connected to the database.
+    schema_name : str
+        Name of the PostgreSQL schema.
+    table_name : str
+        Name of the cards table.
+    columns : list of str
+        Columns uploaded, those missing from `df_cards` are skipped.
+    formats : list of str, optional
+        Formats whose views are dropped, defaults to those of `format_files`.
+
+    Returns
+    -------
+    list of str
+        Names of the indexes created.
+
+    Raises
+    ------
+    ValueError
+        If the cards have no CARD_UUID column.
+    """
+
+    if 'CARD_UUID' not in df_cards.columns:
+        raise ValueError('The cards table needs a CARD_UUID column')
+
+    df_cards = ragged_columns(df_cards[[c for c in columns if c in df_cards.columns]], columns__cards_table_lists)
+
+    drop_format_views(engine, schema_name = schema_name, cards_table = table_name, formats = formats)
+
+    return upload_indexed_table(df_cards
+                               ,schema_name    = schema_name
+                               ,table_name     = table_name
+                               ,engine         = engine
+                               ,unique_indexes = ['CARD_UUID'])
+
+
+
+# Function for creating the format views in PostgreSQL
+def create_format_views(engine
+                       ,df_legalities
+                       ,schema_name      = 'raw_data'
+                       ,cards_table      = 'cards'
+                       ,legalities_table = 'card_format_legalities'
+                       ,formats          = None
+                       ,statuses         = format_statuses):
+
+    """
+    Upload the long legalities table with an index on (FORMAT, STATUS,
+    CARD_UUID) and create a view per format over the cards table, plus an
+    Atomic view keeping the latest printing of each card face.
+
+    The views read the current cards table, so the format subsets always match
+    the card table version and nothing has to be downloaded per format. They
+    are dropped and created again on every call, so a cards table with new
+    columns is picked up; re-uploading the cards table itself requires
+    `drop_format_views` first.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.engine.Engine
+        Engine connected to the database.
+    df_legalities : pd.DataFrame
+        Output of `card_format_legalities`.
+    schema_name : str
+        Schema of the cards table, the legalities table and the views.
+    cards_table : str
+        Name of the cards table, with CARD_UUID, CARD_NAME (or
+        SCRYFALL_ORACLE_ID), RELEASE_DATE and optionally SIDE.
+    legalities_table : str
+        Name of the long legalities table.
+    formats : list of str, optional
+        Formats given a view, defaults to those of `format_files`.
+    statuses : list of str
+        Legality statuses kept, Legal and Restricted by default.
+
+    Returns
+    -------
+    list of str
+        Names of the views created, e.g. 'cards_modern' and 'cards_modern_atomic'.
+    """
+
+    formats = formats or list(format_files.values())
+
+    # Dropping the views first, as they depend on the legalities table being replaced
+    drop_format_views(engine, schema_name = schema_name, cards_table = cards_table, formats = formats)
+
+    # Uploading the legalities with the index the views filter on
+    upload_indexed_table(df_legalities.astype({'FORMAT' : str, 'STATUS' : str})
+                        ,schema_name = schema_name
+                        ,table_name  = legalities_table
+                        ,engine      = engine
+                        ,indexes     = [['FORMAT', 'STATUS', 'CARD_UUID']])
+
+    # Keying the Atomic views like `format_subset`, on the columns the cards table has
+    columns     = {c['name'] for c in inspect(engine).get_columns(cards_table, schema = schema_name)}
+    key         = ['SCRYFALL_ORACLE_ID' if 'SCRYFALL_ORACLE_ID' in columns else 'CARD_NAME'] + [c for c in ['SIDE'] if c in columns]
+    key_list    = ', '.join(f'"{c}"' for c in key)
+    order_list  = ', '.join(f'"{c}" DESC NULLS LAST' for c in columns__latest_printing if c in columns)
+    status_list = ', '.join(f"'{s}'" for s in statuses)
+    views       = []
+    with engine.begin() as conn:
+        for format_name in formats:
+            legal = f"""
+                    SELECT c.*
+                    FROM {schema_name}.{cards_table} c
+                    JOIN {schema_name}.{legalities_table} l
+                      ON l."CARD_UUID" = c."CARD_UUID"
+                    WHERE l."FORMAT" = '{format_name}'
+                      AND l."STATUS" IN ({status_list})
+                    """
+            conn.execute(text(f"CREATE VIEW {schema_name}.{cards_table}_{format_name} AS {legal}"))
+
+            # Keeping the latest printing of each card face
+            conn.execute(text(f"""
+                              CREATE VIEW {schema_name}.{cards_table}_{format_name}_atomic AS
+                              SELECT DISTINCT ON ({key_list}) *
+                              FROM ({legal}) legal
+                              ORDER BY {key_list}, {order_list}
+                              """))
+            views += [f'{cards_table}_{format_name}', f'{cards_table}_{format_name}_atomic']
+
+    return views
@@ -0,0 +1,348 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import json
+import uuid
+import shutil
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_download import mtgjson_url, partial_suffix
+from   modules.utils_pipeline import stream_mtgjson
+from   modules.utils_tabular  import columns__rename_identifiers
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Encoding of each known MTGJSON identifier, unknown identifiers are stored as strings
+identifiers__kinds = {'cardKingdomEtchedId'               : 'int'
+                     ,'cardKingdomFoilId'                 : 'int'
+                     ,'cardKingdomId'                     : 'int'
+                     ,'cardsphereId'                      : 'int'
+                     ,'cardsphereFoilId'                  : 'int'
+                     ,'cardtraderId'                      : 'int'
+                     ,'mcmId'                             : 'int'
+                     ,'mcmMetaId'                         : 'int'
+                     ,'mtgArenaId'                        : 'int'
+                     ,'mtgoFoilId'                        : 'int'
+                     ,'mtgoId'                            : 'int'
+                     ,'multiverseId'                      : 'int'
+                     ,'tcgplayerProductId'                : 'int'
+                     ,'tcgplayerEtchedProductId'          : 'int'
+                     ,'tcgplayerAlternativeFoilProductId' : 'int'
+                     ,'mtgjsonFoilVersionId'              : 'uuid'
+                     ,'mtgjsonNonFoilVersionId'           : 'uuid'
+                     ,'mtgjsonV4Id'                       : 'uuid'
+                     ,'scryfallId'                        : 'uuid'
+                     ,'scryfallCardBackId'                : 'uuid'
+                     ,'scryfallOracleId'                  : 'uuid'
+                     ,'scryfallIllustrationId'            : 'uuid'}
+
+# Value marking a missing integer identifier
+identifiers__int_null = -1
+
+# Number of cards encoded into arrays at a time while streaming
+identifiers__chunk_items = 50_000
+
+# Name of the file describing an index folder
+identifiers__manifest = 'manifest.json'
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for encoding identifier values into a numpy array of one kind
+def _encode_values(values, kind):
+
+    """
+    Encode a list of identifier strings (None when missing) as a numpy array.
+
+    'int' identifiers become int64 with `identifiers__int_null` for missing
+    values, 'uuid' identifiers their 16 raw bytes and 'str' identifiers
+    fixed-width UTF-8 bytes, with b'' for missing values.
+
+    Raises
+    ------
+    ValueError
+        If a value cannot be encoded as `kind`, e.g. a non numeric id.
+    """
+
+    if kind == 'int':
+        return np.array([identifiers__int_null if v is None else int(v) for v in values], dtype = np.int64)
+
+    if kind == 'uuid':
+        return np.array([b'' if v is None else uuid.UUID(v).bytes for v in values], dtype = 'S16')
+
+    return np.array([b'' if v is None else str(v).encode('utf-8') for v in values], dtype = 'S')
+
+
+
+# Function for decoding an encoded numpy array back into identifier values
+def _decode_values(array, kind):
+
+    """
+    Decode an array written by `_encode_values` into a pandas Series, with
+    missing values as <NA>.
+    """
+
+    if kind == 'int':
+        return pd.Series(array, dtype = 'Int64').mask(array == identifiers__int_null)
+
+    # numpy strips trailing null bytes, so the uuid bytes are padded back to 16
+    if kind == 'uuid':
+        return pd.Series([str(uuid.UUID(bytes = v.ljust(16, b'\0'))) if v else pd.NA for v in array.tolist()], dtype = 'string')
+
+    return pd.Series([v.decode('utf-8') if v else pd.NA for v in array.tolist()], dtype = 'string')
+
+
+
+# Function for streaming AllIdentifiers into a memory-mapped index folder
+def build_identifiers_index(folder
+                           ,source      = None
+                           ,cache_path  = None
+                           ,chunk_items = identifiers__chunk_items
+                           ,session     = None):
+
+    """
+    Stream AllIdentifiers and write a compact on-disk index of every card uuid
+    and its external identifiers (Scryfall, TCGplayer, MTGO, Card Kingdom, ...).
+
+    The cards are parsed one at a time by the streaming pipeline and their
+    identifiers are packed into numpy arrays every `chunk_items` cards, so the
+    full dictionary is never held in memory. The folder holds:
+
+    - keys.npy: the sorted card uuids as 16 raw bytes,
+    - <identifier>.npy: one value per key (int64, 16 byte uuid or fixed-width
+      string, see `identifiers__kinds`),
+    - <identifier>.sorted.npy and <identifier>.order.npy: the non-missing values
+      sorted, with the position of their key, for reverse lookups,
+    - manifest.json: the MTGJSON meta, the row count and each identifier's kind.
+
+    Parameters
+    ----------
+    folder : str
+        Destination folder. It is built next to the destination and only moved
+        into place once complete, replacing any previous index.
+    source : str, optional
+        URL or local path of AllIdentifiers.json.xz, defaults to the MTGJSON server.
+    cache_path : str, optional
+        Local copy of the compressed file, see `stream_mtgjson`.
+    chunk_items : int
+        Number of cards encoded into arrays at a time.
+    session : requests.Session, optional
+        Session used for the requests.
+
+    Returns
+    -------
+    dict
+        The manifest written to the folder.
+    """
+
+    source = source or mtgjson_url('AllIdentifiers.json.xz')
+
+    kinds        = {}
+    chunks       = {}
+    chunk_keys   = []
+    pending_keys = []
+    pending      = {}
+
+    # Packing the pending cards into arrays, demoting identifiers that do not fit their kind to strings
+    def flush():
+        index = len(chunk_keys)
+        chunk_keys.append(_encode_values(pending_keys, 'uuid'))
+        for name, values in pending.items():
+            kind = kinds.setdefault(name, identifiers__kinds.get(name, 'str'))
+            try:
+                chunks.setdefault(name, {})[index] = _encode_values(values, kind)
+            except ValueError:
+                kinds[name]  = 'str'
+                chunks[name] = {i : _encode_values([None if pd.isna(v) else str(v) for v in _decode_values(array, kind)], 'str')
+                                for i, array in chunks[name].items()}
+                chunks[name][index] = _encode_values(values, 'str')
+        pending_keys.clear()
+        pending.clear()
+
+    # Collecting the identifiers of each card, aligned on the pending keys
+    def on_item(card_uuid, card):
+        for name, value in (card.get('identifiers') or {}).items():
+            pending.setdefault(name, [None] * len(pending_keys))
+        for name, values in pending.items():
+            values.append((card.get('identifiers') or {}).get(name))
+        pending_keys.append(card_uuid)
+        if len(pending_keys) >= chunk_items:
+            flush()
+
+    top, _ = stream_mtgjson(source
+                           ,on_item    = on_item
+                           ,cache_path = cache_path
+                           ,session    = session)
+    if pending_keys:
+        flush()
+
+    # Concatenating the chunks, filling identifiers missing from a chunk, and sorting by uuid
+    keys  = np.concatenate(chunk_keys) if chunk_keys else np.array([], dtype = 'S16')
+    order = np.argsort(keys, kind = 'stable')
+    keys  = keys[order]
+
+    # Writing next to the destination so a failed build never replaces a working index
+    building = folder.rstrip(os.sep) + partial_suffix
+    shutil.rmtree(building, ignore_errors = True)
+    os.makedirs(building)
+    np.save(os.path.join(building, 'keys.npy'), keys)
+
+    for name, kind in kinds.items():
+        null   = np.full(1, identifiers__int_null, dtype = np.int64) if kind == 'int' else np.array([b''], dtype = 'S1')
+        values = np.concatenate([chunks[name].get(i, np.repeat(null, len(k))) for i, k in enumerate(chunk_keys)])[order]
+        np.save(os.path.join(building, f'{name}.npy'), values)
+
+        # Sorting the non-missing values for the external id to uuid direction
+        present = np.flatnonzero(values != null[0])
+        ranked  = present[np.argsort(values[present], kind = 'stable')]
+        np.save(os.path.join(building, f'{name}.sorted.npy'), values[ranked])
+        np.save(os.path.join(building, f'{name}.order.npy'),  ranked.astype(np.int64))
+
+    manifest = {'meta'    : top.get('meta')
+               ,'rows'    : int(len(keys))
+               ,'columns' : kinds}
+    with open(os.path.join(building, identifiers__manifest), 'w') as f:
+        json.dump(manifest, f, indent = 1)
+
+    # Swapping the finished index into place
+    shutil.rmtree(folder, ignore_errors = True)
+    os.replace(building, folder)
+
+    return manifest
+
+
+
+# Function for memory-mapping an identifiers index folder
+def load_identifiers_index(folder):
+
+    """
+    Open an index written by `build_identifiers_index`. Every array is memory
+    mapped read-only, so only the pages touched by lookups are read from disk.
+
+    Parameters
+    ----------
+    folder : str
+        The index folder.
+
+    Returns
+    -------
+    dict
+        'meta', 'rows', 'kinds' ({identifier : kind}), 'keys' and, per
+        identifier, 'values', 'sorted' and 'order' memory maps.
+    """
+
+    with open(os.path.join(folder, identifiers__manifest)) as f:
+        manifest = json.load(f)
+
+    def open_array(name):
+        return np.load(os.path.join(folder, f'{name}.npy'), mmap_mode = 'r')
+
+    return {'meta'   : manifest['meta']
+           ,'rows'   : manifest['rows']
+           ,'kinds'  : manifest['columns']
+           ,'keys'   : open_array('keys')
+           ,'values' : {name : open_array(name)             for name in manifest['columns']}
+           ,'sorted' : {name : open_array(f'{name}.sorted') for name in manifest['columns']}
+           ,'order'  : {name : open_array(f'{name}.order')  for name in manifest['columns']}}
+
+
+
+# Function for looking up the external identifiers of a batch of card uuids
+def lookup_identifiers(index, uuids, identifiers=None):
+
+    """
+    Look up the external identifiers of many card uuids at once with a binary
+    search of the sorted keys (O(log n) per uuid).
+
+    Parameters
+    ----------
+    index : dict
+        Output of `load_identifiers_index`.
+    uuids : iterable of str
+        MTGJSON card uuids, e.g. the CARD_UUID column of the cards table.
+    identifiers : list of str, optional
+        MTGJSON identifier names to return, defaults to all of them.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per input uuid, in input order, with CARD_UUID and one column
+        per identifier named as in `columns__rename_identifiers`. Identifiers of
+        unknown uuids are <NA>.
+    """
+
+    uuids       = list(uuids)
+    identifiers = identifiers or list(index['kinds'])
+    keys        = index['keys']
+
+    # Binary searching the sorted keys for every uuid
+    queries  = _encode_values(uuids, 'uuid')
+    position = np.searchsorted(keys, queries).clip(max = max(len(keys) - 1, 0))
+    found    = (position < len(keys)) & (keys[position] == queries) if len(keys) else np.zeros(len(uuids), dtype = bool)
+
+    df = pd.DataFrame({'CARD_UUID' : uuids})
+    for name in identifiers:
+        kind   = index['kinds'][name]
+        values = _decode_values(np.asarray(index['values'][name][position]), kind) if len(keys) else pd.Series([pd.NA] * len(uuids))
+        df[columns__rename_identifiers.get(name, name)] = values.where(found, pd.NA).values
+
+    return df
+
+
+
+# Function for looking up the card uuids of a batch of external identifiers
+def lookup_uuids(index, identifier, values):
+
+    """
+    Look up the card uuids of many external identifier values at once with a
+    binary search of the identifier's sorted values.
+
+    Identifiers are not unique per card (e.g. a scryfallOracleId is shared by
+    every printing), so each value can match several uuids.
+
+    Parameters
+    ----------
+    index : dict
+        Output of `load_identifiers_index`.
+    identifier : str
+        MTGJSON identifier name, e.g. 'tcgplayerProductId' or 'scryfallId'.
+    values : iterable
+        Identifier values, as integers or strings.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per match with the identifier (named as in
+        `columns__rename_identifiers`) and CARD_UUID, in input order. Values
+        without a match are dropped.
+    """
+
+    kind    = index['kinds'][identifier]
+    values  = list(values)
+    queries = _encode_values([None if pd.isna(v) else v for v in values], kind)
+    ranked  = index['sorted'][identifier]
+
+    # Every match of a value lies between its left and right insertion points
+    left    = np.searchsorted(ranked, queries, side = 'left')
+    right   = np.searchsorted(ranked, queries, side = 'right')
+    counts  = right - left
+    query   = np.repeat(np.arange(len(values)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    rows    = np.asarray(index['order'][identifier][np.repeat(left, counts) + offsets])
+
+    return pd.DataFrame({columns__rename_identifiers.get(identifier, identifier) : pd.Series(values, dtype = object).iloc[query].values
+                        ,'CARD_UUID'                                            : _decode_values(np.asarray(index['keys'][rows]), 'uuid').values})
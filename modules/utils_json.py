@@ -0,0 +1,229 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import json
+import warnings
+import importlib
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Module providing each JSON backend (None for the standard library)
+json_backend_modules = {'orjson'   : 'orjson'
+                       ,'simdjson' : 'simdjson'
+                       ,'stdlib'   : None}
+
+# Order in which backends are tried when none is requested, fastest first
+json_backend_preference = ['orjson'
+                          ,'simdjson'
+                          ,'stdlib']
+
+# Backend used when none is passed explicitly (None picks the fastest available)
+default_json_backend = None
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for building the loads function of a backend
+def _backend_loads(name):
+
+    """
+    Import a JSON backend and return its loads function.
+
+    Parameters
+    ----------
+    name : str
+        One of the keys of `json_backend_modules`.
+
+    Returns
+    -------
+    callable
+        Function parsing bytes or str into Python objects.
+
+    Raises
+    ------
+    ImportError
+        If the optional library of the backend is not installed.
+    """
+
+    # The standard library is always available
+    if name == 'stdlib':
+        return json.loads
+
+    # Optional libraries expose the same loads interface as the standard library
+    return importlib.import_module(json_backend_modules[name]).loads
+
+
+
+# Function for building the dumps function of a backend
+def _backend_dumps(name):
+
+    """
+    Return a function serialising Python objects to UTF-8 bytes with a backend.
+
+    Parameters
+    ----------
+    name : str
+        One of the keys of `json_backend_modules`.
+
+    Returns
+    -------
+    callable
+        Function serialising an object to compact JSON bytes.
+    """
+
+    # orjson already returns compact UTF-8 bytes
+    if name == 'orjson':
+        return importlib.import_module('orjson').dumps
+
+    # simdjson only parses, so the standard library serialises for it
+    return lambda obj: json.dumps(obj, ensure_ascii = False, separators = (',', ':')).encode('utf-8')
+
+
+
+# Function for listing the JSON backends installed in the current environment
+def available_json_backends():
+
+    """
+    List the JSON backends that can be imported, in order of preference.
+
+    Returns
+    -------
+    list of str
+        Names of the available backends, always ending with 'stdlib'.
+    """
+
+    available = []
+    for name in json_backend_preference:
+        try:
+            _backend_loads(name)
+            available.append(name)
+        except ImportError:
+            continue
+
+    return available
+
+
+
+# Function for selecting a JSON backend with a fallback when it is missing
+def get_json_backend(name=None):
+
+    """
+    Return the name and loads function of a JSON backend.
+
+    When `name` is None the module level `default_json_backend` is used, and if
+    that is also None the fastest installed backend is picked. A requested
+    backend that is not installed falls back to the next one in
+    `json_backend_preference` with a warning.
+
+    Parameters
+    ----------
+    name : str, optional
+        'orjson', 'simdjson' or 'stdlib'.
+
+    Returns
+    -------
+    tuple of (str, callable)
+        The name of the backend actually used and its loads function.
+
+    Raises
+    ------
+    ValueError
+        If the name is not a known backend.
+    """
+
+    name = name or default_json_backend
+
+    # Picking the fastest installed backend
+    if name is None:
+        name = available_json_backends()[0]
+        return name, _backend_loads(name)
+
+    if name not in json_backend_modules:
+        raise ValueError(f"Unknown JSON backend '{name}', expected one of {list(json_backend_modules)}")
+
+    # Falling back through the preference list when the requested backend is missing
+    for candidate in json_backend_preference[json_backend_preference.index(name):]:
+        try:
+            loads = _backend_loads(candidate)
+        except ImportError:
+            continue
+        if candidate != name:
+            warnings.warn(f"JSON backend '{name}' is not installed, falling back to '{candidate}'")
+        return candidate, loads
+
+
+
+# Function for selecting the serialiser of a JSON backend
+def get_json_dumps(name=None):
+
+    """
+    Return the dumps function of a JSON backend, resolved once so it can be
+    called per record (e.g. per card when writing NDJSON).
+
+    Parameters
+    ----------
+    name : str, optional
+        Name of the backend, see `get_json_backend`.
+
+    Returns
+    -------
+    callable
+        Function serialising an object to compact JSON bytes.
+    """
+
+    return _backend_dumps(get_json_backend(name)[0])
+
+
+
+# Function for serialising JSON with the selected backend
+def json_dumps(obj, backend=None):
+
+    """
+    Serialise an object to compact JSON bytes with a pluggable backend.
+
+    Parameters
+    ----------
+    obj : object
+        The object to serialise.
+    backend : str, optional
+        Name of the backend, see `get_json_backend`.
+
+    Returns
+    -------
+    bytes
+        The UTF-8 encoded JSON document.
+    """
+
+    return get_json_dumps(backend)(obj)
+
+
+
+# Function for parsing JSON with the selected backend
+def json_loads(data, backend=None):
+
+    """
+    Parse a JSON document with a pluggable backend.
+
+    Parameters
+    ----------
+    data : bytes or str
+        The JSON document.
+    backend : str, optional
+        Name of the backend, see `get_json_backend`.
+
+    Returns
+    -------
+    object
+        The parsed document.
+    """
+
+    return get_json_backend(backend)[1](data)
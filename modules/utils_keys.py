@@ -0,0 +1,274 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import json
+import shutil
+
+# Data libraries
+import numpy   as np
+import pandas  as pd
+import pyarrow as pa
+
+# Modular functions
+from   modules.utils_download import partial_suffix
+from   modules.utils_ragged   import RaggedArray
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Namespaces of interned keys
+keys__namespaces = ['uuid'
+                   ,'set_code'
+                   ,'product_uuid']
+
+# Namespace of every key column of the child tables and card tables
+keys__columns = {'CARD_UUID'         : 'uuid'
+                ,'CARD'              : 'uuid'
+                ,'SIDE_BOARD_CARD'   : 'uuid'
+                ,'COMMANDER'         : 'uuid'
+                ,'PARTNER'           : 'uuid'
+                ,'DISPLAY_COMMANDER' : 'uuid'
+                ,'PLANE'             : 'uuid'
+                ,'SCHEME'            : 'uuid'
+                ,'SET_CODE'          : 'set_code'
+                ,'PRODUCT_UUID'      : 'product_uuid'}
+
+# Namespace of every ragged list column of keys, e.g. from `ingest_deck_files(ragged=True)`
+keys__ragged_columns = {'CARDS'            : 'uuid'
+                       ,'SIDE_BOARD_CARDS' : 'uuid'
+                       ,'COMMANDERS'       : 'uuid'}
+
+# Missing key, e.g. a deck without a partner commander
+keys__null = -1
+
+# Manifest file of a saved registry
+keys__manifest = 'manifest.json'
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Registry interning uuids and codes to dense integer keys
+class KeyRegistry:
+
+    """
+    Global interning dictionary mapping card uuids, set codes and sealed
+    product uuids to dense int32 keys, one sequence per namespace.
+
+    Keys are only ever appended, so a key keeps its value across data versions
+    and tables encoded at different times join on their integer keys. Decoding
+    back to strings is left to the SQL and export boundary.
+    """
+
+    def __init__(self, values=None, version=None):
+        self.values  = {name : pd.Index((values or {}).get(name, []), dtype = object) for name in keys__namespaces}
+        self.version = version
+
+    def __len__(self):
+        return sum(len(values) for values in self.values.values())
+
+    def __repr__(self):
+        return f"KeyRegistry(version={self.version!r}, {', '.join(f'{name}={len(values)}' for name, values in self.values.items())})"
+
+    def encode(self, namespace, values, add=True):
+        # Looking every value up in one hash probe, appending the unseen ones in order of appearance
+        values = pd.Index(values, dtype = object)
+        keys   = self.values[namespace].get_indexer(values)
+        unseen = (keys == keys__null) & values.notna()
+        if unseen.any() and add:
+            new = values[unseen].unique()
+            if len(self.values[namespace]) + len(new) > np.iinfo(np.int32).max:
+                raise ValueError(f"The '{namespace}' namespace is full, int32 keys cannot address more values")
+            self.values[namespace] = self.values[namespace].append(new)
+            keys[unseen] = self.values[namespace].get_indexer(values[unseen])
+        return keys.astype(np.int32)
+
+    def decode(self, namespace, keys):
+        keys   = np.asarray(keys, dtype = np.int64)
+        values = np.append(self.values[namespace].to_numpy(dtype = object), None)
+        return values[np.where(keys < 0, len(values) - 1, keys)]
+
+
+
+# Function for replacing the key columns of a table with integer keys
+def encode_key_columns(df, registry, columns=None):
+
+    """
+    Replace uuid and code columns with their int32 keys, interning unseen
+    values, so joins and sorts compare integers instead of 36-character strings.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The table, left unchanged.
+    registry : KeyRegistry
+        The registry, extended with the unseen values.
+    columns : dict, optional
+        {column : namespace}, defaults to the `keys__columns` present in `df`.
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of the table with int32 key columns (-1 for missing values).
+    """
+
+    columns = columns or {c : n for c, n in keys__columns.items() if c in df.columns}
+
+    return df.assign(**{column : registry.encode(namespace, df[column]) for column, namespace in columns.items()})
+
+
+
+# Function for replacing integer key columns with the uuids and codes they stand for
+def decode_key_columns(df, registry, columns=None):
+
+    """
+    Decode the int32 key columns of a table back into strings, e.g. right
+    before `upload_indexed_table` or an export. Ragged list columns of keys
+    are decoded through their dictionary, so every distinct key is looked up
+    once.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The table, left unchanged.
+    registry : KeyRegistry
+        The registry the keys come from.
+    columns : dict, optional
+        {column : namespace}, defaults to the integer `keys__columns` and
+        the integer ragged `keys__ragged_columns` in `df`.
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of the table with string columns (None for missing keys).
+    """
+
+    columns = columns or {**{c : n for c, n in keys__columns.items()        if c in df.columns and pd.api.types.is_integer_dtype(df[c])}
+                         ,**{c : n for c, n in keys__ragged_columns.items() if c in df.columns and _is_ragged_keys(df[c])}}
+
+    return df.assign(**{column : _decode_ragged(df[column], registry, namespace) if _is_ragged_keys(df[column]) else registry.decode(namespace, df[column])
+                        for column, namespace in columns.items()})
+
+
+
+# Function for checking whether a column is a ragged list of integer keys
+def _is_ragged_keys(series):
+
+    """
+    True for ArrowDtype list columns of integers (plain or dictionary
+    encoded), as built by `RaggedArray.to_series` from encoded keys.
+    """
+
+    if not isinstance(series.dtype, pd.ArrowDtype):
+        return False
+
+    arrow_type = series.dtype.pyarrow_dtype
+    if not (pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type)):
+        return False
+
+    value_type = arrow_type.value_type.value_type if pa.types.is_dictionary(arrow_type.value_type) else arrow_type.value_type
+    return pa.types.is_integer(value_type)
+
+
+
+# Function for decoding a ragged list column of keys
+def _decode_ragged(series, registry, namespace):
+
+    """
+    Same rows as `series` with every key replaced by its string, missing
+    keys becoming missing values. Each distinct key is decoded once.
+    """
+
+    ragged  = RaggedArray.from_series(series)
+    values  = registry.decode(namespace, np.asarray(ragged.dictionary, dtype = np.int64))
+    flat    = np.append(values, None)[ragged.codes]
+    decoded = RaggedArray.from_flat(flat, ragged.lengths(), ragged.valid)
+
+    return decoded.to_series(index = series.index, name = series.name)
+
+
+
+# Function for saving a registry next to the data it encoded
+def save_key_registry(registry, folder, version=None):
+
+    """
+    Save a registry as one .npy array of values per namespace plus a manifest
+    recording the data version (e.g. the MTGJSON 'meta' version) it was last
+    extended with.
+
+    Parameters
+    ----------
+    registry : KeyRegistry
+        The registry.
+    folder : str
+        Destination folder, replaced atomically.
+    version : str, optional
+        Data version, defaults to the registry's.
+
+    Returns
+    -------
+    dict
+        The manifest written.
+    """
+
+    registry.version = version or registry.version
+
+    # Writing next to the destination so a failed save never replaces a working registry
+    building = folder.rstrip(os.sep) + partial_suffix
+    shutil.rmtree(building, ignore_errors = True)
+    os.makedirs(building)
+    for name, values in registry.values.items():
+        np.save(os.path.join(building, f'{name}.npy'), values.to_numpy(dtype = str))
+
+    manifest = {'version' : registry.version
+               ,'counts'  : {name : len(values) for name, values in registry.values.items()}}
+    with open(os.path.join(building, keys__manifest), 'w') as f:
+        json.dump(manifest, f, indent = 1)
+
+    # Swapping the finished registry into place
+    shutil.rmtree(folder, ignore_errors = True)
+    os.replace(building, folder)
+
+    return manifest
+
+
+
+# Function for loading a saved registry
+def load_key_registry(folder):
+
+    """
+    Load a registry saved by `save_key_registry`, or start an empty one when
+    the folder does not exist yet.
+
+    A registry saved for an older data version stays valid for a newer one:
+    keys are only appended, so the new values get new keys and the registry's
+    version moves on at the next save.
+
+    Parameters
+    ----------
+    folder : str
+        The registry folder.
+
+    Returns
+    -------
+    KeyRegistry
+        The registry, with the data version it was saved with.
+    """
+
+    if not os.path.exists(os.path.join(folder, keys__manifest)):
+        return KeyRegistry()
+
+    with open(os.path.join(folder, keys__manifest)) as f:
+        manifest = json.load(f)
+
+    values = {name : np.load(os.path.join(folder, f'{name}.npy')).astype(object) for name in manifest['counts']}
+
+    return KeyRegistry(values, manifest['version'])
@@ -0,0 +1,299 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import re
+from   collections import deque
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Optional libraries
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Keyword type of each list in MTGJSON's Keywords file, named as the raw_data.keywords columns
+keywords__types = {'abilityWords'     : 'abilities'
+                  ,'keywordAbilities' : 'keywords'
+                  ,'keywordActions'   : 'actions'}
+
+# Reminder text in parentheses, which mentions keywords the card does not have
+reminder_text_pattern = re.compile(r'\([^()]*\)')
+
+# Columns of the card keyword incidence table
+columns__card_keywords = ['KEYWORD'
+                         ,'KEYWORD_TYPE'
+                         ,'MATCH_COUNT']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Pure Python Aho-Corasick automaton, used when pyahocorasick is not installed
+class _Automaton:
+
+    """
+    Minimal Aho-Corasick automaton with the same add/build/iter steps as
+    `ahocorasick.Automaton`, matching every phrase in one pass over a text.
+    """
+
+    def __init__(self):
+        self.goto    = [{}]
+        self.fail    = [0]
+        self.outputs = [[]]
+
+    def add_word(self, word, value):
+        node = 0
+        for char in word:
+            if char not in self.goto[node]:
+                self.goto[node][char] = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            node = self.goto[node][char]
+        self.outputs[node].append(value)
+
+    def make_automaton(self):
+        # Breadth first so every failure link points to an already linked node
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child]    = self.goto[state].get(char, 0) if node else 0
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def iter(self, text):
+        goto, fail, outputs, node = self.goto, self.fail, self.outputs, 0
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for value in outputs[node]:
+                yield end, value
+
+
+
+# Function for reshaping MTGJSON keyword lists into one row per keyword
+def keyword_phrases(keywords):
+
+    """
+    Build the long-form keywords table with one row per keyword and type.
+
+    Parameters
+    ----------
+    keywords : dict or pd.DataFrame
+        The 'data' dictionary of MTGJSON's Keywords file, a long frame with
+        KEYWORD and KEYWORD_TYPE (e.g. read back from raw_data.keywords), or the
+        old wide frame with one padded column per keyword type.
+
+    Returns
+    -------
+    pd.DataFrame
+        KEYWORD and a categorical KEYWORD_TYPE (ordered as `keywords__types`),
+        unique on both columns and sorted by type and keyword.
+    """
+
+    # Normalising every input to a dictionary of lists keyed on the keyword type
+    if isinstance(keywords, pd.DataFrame) and 'KEYWORD' in keywords.columns:
+        lists = keywords.groupby('KEYWORD_TYPE', observed = True, sort = False)['KEYWORD'].agg(list).to_dict()
+    elif isinstance(keywords, pd.DataFrame):
+        lists = {column : keywords[column].tolist() for column in keywords.columns}
+    else:
+        lists = {keywords__types.get(key, key) : values for key, values in keywords.items()}
+
+    df = pd.DataFrame([(keyword, keyword_type) for keyword_type, values in lists.items() for keyword in values if isinstance(keyword, str) and keyword]
+                     ,columns = ['KEYWORD', 'KEYWORD_TYPE'])
+
+    # Known types first, in MTGJSON's order, then any new type MTGJSON adds
+    types              = list(keywords__types.values())
+    df['KEYWORD_TYPE'] = pd.Categorical(df['KEYWORD_TYPE'], categories = types + sorted(set(df['KEYWORD_TYPE']) - set(types)))
+
+    return df.drop_duplicates().sort_values(['KEYWORD_TYPE', 'KEYWORD']).reset_index(drop = True)
+
+
+
+# Function for compiling every keyword phrase into one multi-pattern automaton
+def compile_keyword_automaton(df_keywords):
+
+    """
+    Compile every keyword into one Aho-Corasick automaton, so each card text is
+    scanned once for all keywords instead of once per keyword.
+
+    Uses pyahocorasick's C automaton when installed and a pure Python one
+    otherwise. Phrases are matched in lower case.
+
+    Parameters
+    ----------
+    df_keywords : pd.DataFrame
+        Output of `keyword_phrases`.
+
+    Returns
+    -------
+    automaton
+        Object with an `iter(text)` method yielding (end index, (length,
+        keyword ids)) for every phrase occurrence, keyword ids being row
+        positions in `df_keywords`.
+    """
+
+    automaton = ahocorasick.Automaton() if ahocorasick is not None else _Automaton()
+
+    # Grouping the keywords that share a phrase, e.g. a word that is both an ability and an action
+    phrases = {}
+    for position, keyword in enumerate(df_keywords['KEYWORD'].str.lower()):
+        phrases.setdefault(keyword, []).append(position)
+    for phrase, positions in phrases.items():
+        automaton.add_word(phrase, (len(phrase), tuple(positions)))
+
+    automaton.make_automaton()
+
+    return automaton
+
+
+
+# Function for finding every keyword of one text
+def _match_text(text, automaton):
+
+    """
+    Count the whole-word keyword matches of one lower case text, returning
+    {keyword id : count}.
+    """
+
+    counts = {}
+    for end, (length, positions) in automaton.iter(text):
+        start = end - length + 1
+
+        # Only keeping whole words, e.g. not 'flash' inside 'flashback'
+        if (start > 0 and text[start - 1].isalnum()) or (end + 1 < len(text) and text[end + 1].isalnum()):
+            continue
+        for position in positions:
+            counts[position] = counts.get(position, 0) + 1
+
+    return counts
+
+
+
+# Function for tagging every card with the keywords found in its text
+def tag_card_keywords(df_cards
+                     ,df_keywords
+                     ,id_column      = 'CARD_UUID'
+                     ,text_column    = 'CARD_TEXT'
+                     ,strip_reminder = True
+                     ,automaton      = None):
+
+    """
+    Tag cards with the ability words, keyword abilities and keyword actions
+    found in their text, in a single automaton pass per distinct text.
+
+    Printings sharing an oracle text are scanned once, and the cost grows with
+    the total text length rather than keywords x cards as a `str.contains`
+    loop per keyword would.
+
+    Parameters
+    ----------
+    df_cards : pd.DataFrame
+        Cards with an id and a text column, e.g. `df__cards` or oracle_cards.
+    df_keywords : pd.DataFrame
+        Output of `keyword_phrases`.
+    id_column : str
+        Column identifying a card.
+    text_column : str
+        Column holding the rules text.
+    strip_reminder : bool
+        Remove reminder text in parentheses before matching.
+    automaton : optional
+        Output of `compile_keyword_automaton`, compiled here when not given.
+
+    Returns
+    -------
+    pd.DataFrame
+        Sparse incidence table with one row per card and keyword found: the id
+        column and `columns__card_keywords`, with a categorical KEYWORD_TYPE.
+    """
+
+    if automaton is None:
+        automaton = compile_keyword_automaton(df_keywords)
+
+    # Scanning each distinct text once
+    texts = df_cards[text_column].fillna('').astype(str).str.lower()
+    if strip_reminder:
+        texts = texts.str.replace(reminder_text_pattern, '', regex = True)
+    codes, uniques = pd.factorize(texts)
+
+    text_codes, keyword_ids, match_counts = [], [], []
+    for code, text in enumerate(uniques):
+        for position, count in _match_text(text, automaton).items():
+            text_codes.append(code)
+            keyword_ids.append(position)
+            match_counts.append(count)
+
+    text_codes   = np.array(text_codes,   dtype = np.int64)
+    keyword_ids  = np.array(keyword_ids,  dtype = np.int64)
+    match_counts = np.array(match_counts, dtype = np.int64)
+
+    # Expanding the matches of each distinct text back onto every card with that text
+    order    = np.argsort(text_codes, kind = 'stable')
+    starts   = np.searchsorted(text_codes[order], codes, side = 'left')
+    counts   = np.searchsorted(text_codes[order], codes, side = 'right') - starts
+    cards    = np.repeat(np.arange(len(codes)), counts)
+    matches  = order[np.repeat(starts, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)]
+
+    return pd.DataFrame({id_column      : df_cards[id_column].to_numpy()[cards]
+                        ,'KEYWORD'      : df_keywords['KEYWORD'].to_numpy()[keyword_ids[matches]]
+                        ,'KEYWORD_TYPE' : df_keywords['KEYWORD_TYPE'].astype('category').array.take(keyword_ids[matches])
+                        ,'MATCH_COUNT'  : match_counts[matches]})
+
+
+
+# Function for converting the incidence table into a sparse card x keyword matrix
+def keyword_incidence_matrix(df_card_keywords, id_column='CARD_UUID', ids=None, keywords=None):
+
+    """
+    Convert the incidence table of `tag_card_keywords` into a scipy CSR matrix.
+
+    Parameters
+    ----------
+    df_card_keywords : pd.DataFrame
+        Output of `tag_card_keywords`.
+    id_column : str
+        Column identifying a card.
+    ids : list, optional
+        Row order, defaults to the ids present in the table.
+    keywords : list of str, optional
+        Column order, defaults to the keywords present in the table.
+
+    Returns
+    -------
+    tuple of (scipy.sparse.csr_matrix, pd.Index, pd.Index)
+        The match counts, the card ids of the rows and the keywords of the columns.
+    """
+
+    from scipy import sparse
+
+    rows    = pd.Index(pd.unique(df_card_keywords[id_column]) if ids is None else ids)
+    columns = pd.Index(pd.unique(df_card_keywords['KEYWORD']) if keywords is None else keywords)
+
+    # Dropping matches outside the requested rows or columns
+    row_codes    = rows.get_indexer(df_card_keywords[id_column])
+    column_codes = columns.get_indexer(df_card_keywords['KEYWORD'])
+    keep         = (row_codes >= 0) & (column_codes >= 0)
+
+    matrix = sparse.csr_matrix((df_card_keywords['MATCH_COUNT'].to_numpy()[keep], (row_codes[keep], column_codes[keep]))
+                              ,shape = (len(rows), len(columns)))
+
+    return matrix, rows, columns
@@ -0,0 +1,219 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_tabular import columns__rename_foreign_data
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Columns identifying one face of one oracle card
+columns__oracle_key = ['SCRYFALL_ORACLE_ID'
+                      ,'SIDE']
+
+# Printing-invariant card columns moved to the oracle cards table
+columns__oracle_cards = ['CARD_NAME'
+                        ,'ASCII_NAME'
+                        ,'FACE_NAME'
+                        ,'LAYOUT'
+                        ,'MANA_COST'
+                        ,'MANA_VALUE'
+                        ,'CONVERTED_MANA_COST'
+                        ,'FACE_MANA_VALUE'
+                        ,'FACE_CONVERTED_MANA_COST'
+                        ,'COLORS'
+                        ,'COLOR_IDENTITY'
+                        ,'COLOR_INDICATOR'
+                        ,'PRODUCED_MANA'
+                        ,'TYPE_LINE'
+                        ,'TYPES'
+                        ,'SUPERTYPES'
+                        ,'SUBTYPES'
+                        ,'CARD_TEXT'
+                        ,'KEYWORDS'
+                        ,'POWER'
+                        ,'TOUGHNESS'
+                        ,'LOYALTY'
+                        ,'DEFENSE'
+                        ,'HAND'
+                        ,'LIFE'
+                        ,'PRINTINGS'
+                        ,'EDHREC_RANK'
+                        ,'EDHREC_SALTINESS'
+                        ,'LEGALITIES'
+                        ,'LEADERSHIP_SKILLS'
+                        ,'ALTERNATIVE_DECK_LIMIT_FLAG'
+                        ,'RESERVED_FLAG']
+
+# Repeated child columns moved to content-addressed tables
+columns__oracle_children = ['RULINGS'
+                           ,'FOREIGN_DATA']
+
+# Columns whose content addresses a foreign data row
+columns__foreign_data_content = ['LANGUAGE'
+                                ,'FOREIGN_NAME'
+                                ,'FOREIGN_FACE_NAME'
+                                ,'FOREIGN_TEXT'
+                                ,'FOREIGN_TYPE_LINE'
+                                ,'FOREIGN_FLAVOR_TEXT']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for hashing the content of rows into a stable 64-bit id
+def content_id(df, columns):
+
+    """
+    Address rows by their content: equal values in `columns` give the same id,
+    on every run, so repeated child rows can be stored once.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The rows to address.
+    columns : list of str
+        Columns making up the content.
+
+    Returns
+    -------
+    np.ndarray
+        One int64 id per row (the unsigned pandas hash viewed as signed so it
+        fits a PostgreSQL BIGINT).
+    """
+
+    hashes = pd.util.hash_pandas_object(df[columns].astype('string'), index = False)
+
+    return hashes.to_numpy(dtype = np.uint64).view(np.int64)
+
+
+
+# Function for exploding a column of lists of dictionaries into one row per dictionary
+def _explode_records(df, key_columns, column):
+
+    """
+    Explode a column of lists (or Arrow converted arrays) of dictionaries into a
+    dataframe with the key columns and one column per dictionary key.
+    """
+
+    records = df[key_columns + [column]].copy()
+    records[column] = records[column].map(lambda x: list(x) if isinstance(x, (list, np.ndarray)) else [])
+    records = records.explode(column, ignore_index = True).dropna(subset = [column]).reset_index(drop = True)
+
+    return pd.concat([records[key_columns], pd.DataFrame(records[column].tolist(), index = records.index)], axis = 1)
+
+
+
+# Function for splitting a cards table into oracle cards, printings and content-addressed child tables
+def split_oracle_cards(df_cards):
+
+    """
+    Split a cards table (one row per printing) into a deduplicated oracle
+    cards table and a slim printings table, moving rulings and foreign data
+    into content-addressed tables that store every distinct row once.
+
+    Oracle text, types, mana cost, keywords, legalities and rulings repeat on
+    every printing of a card. The oracle cards table keeps them once per face
+    of each scryfallOracleId (the latest printing's values), and the printings
+    table keeps only the printing-specific columns and the oracle key.
+    Printings without an oracle id (e.g. some tokens) use their own uuid.
+
+    Parameters
+    ----------
+    df_cards : pd.DataFrame
+        Cards table with the `columns__rename_cards` names, e.g. `df__cards`
+        from `printings_table_to_pandas`, sorted by release date.
+
+    Returns
+    -------
+    dict
+        - 'oracle_cards': `columns__oracle_key` and the `columns__oracle_cards`
+          present in the input, unique on the key,
+        - 'printings': CARD_UUID, the oracle key and the remaining columns,
+        - 'rulings': RULING_ID, RULING_DATE and RULING_TEXT, unique,
+        - 'oracle_rulings': SCRYFALL_ORACLE_ID and RULING_ID,
+        - 'foreign_data': FOREIGN_DATA_ID and `columns__foreign_data_content`, unique,
+        - 'printing_foreign_data': CARD_UUID, FOREIGN_DATA_ID and MULTIVERSE_ID.
+    """
+
+    df = df_cards.copy()
+
+    # Keying every printing on its oracle id, falling back to the printing's own uuid
+    if 'SCRYFALL_ORACLE_ID' not in df.columns:
+        df['SCRYFALL_ORACLE_ID'] = df['IDENTIFIERS'].map(lambda x: x.get('scryfallOracleId') if isinstance(x, dict) else None)
+    df['SCRYFALL_ORACLE_ID'] = df['SCRYFALL_ORACLE_ID'].fillna(df['CARD_UUID'])
+    if 'SIDE' not in df.columns:
+        df['SIDE'] = None
+
+    oracle_columns = [c for c in columns__oracle_cards if c in df.columns]
+    child_columns  = [c for c in columns__oracle_children if c in df.columns]
+
+    # Keeping the latest printing of each oracle face
+    df_oracle = df.drop_duplicates(columns__oracle_key, keep = 'last')
+
+    printing_columns = [c for c in df.columns if c not in ['CARD_UUID'] + columns__oracle_key + oracle_columns + child_columns]
+
+    tables = {'oracle_cards' : df_oracle[columns__oracle_key + oracle_columns].reset_index(drop = True)
+             ,'printings'    : df[['CARD_UUID'] + columns__oracle_key + printing_columns].reset_index(drop = True)}
+
+    # Rulings belong to the oracle card, so only the kept printings are exploded
+    if 'RULINGS' in df.columns:
+        rulings = _explode_records(df_oracle, ['SCRYFALL_ORACLE_ID'], 'RULINGS').rename(columns = {'date' : 'RULING_DATE', 'text' : 'RULING_TEXT'})
+        rulings = rulings.reindex(columns = ['SCRYFALL_ORACLE_ID', 'RULING_DATE', 'RULING_TEXT'])
+        rulings['RULING_ID'] = content_id(rulings, ['RULING_DATE', 'RULING_TEXT'])
+
+        tables['rulings']        = rulings[['RULING_ID', 'RULING_DATE', 'RULING_TEXT']].drop_duplicates('RULING_ID').reset_index(drop = True)
+        tables['oracle_rulings'] = rulings[['SCRYFALL_ORACLE_ID', 'RULING_ID']].drop_duplicates().reset_index(drop = True)
+
+    # Foreign data is per printing but its text mostly repeats across reprints
+    if 'FOREIGN_DATA' in df.columns:
+        foreign = _explode_records(df, ['CARD_UUID'], 'FOREIGN_DATA').rename(columns = {k : v for k, v in columns__rename_foreign_data.items() if k != 'uuid'})
+        foreign = foreign.reindex(columns = ['CARD_UUID', 'MULTIVERSE_ID', 'identifiers'] + columns__foreign_data_content)
+
+        # Newer MTGJSON builds only carry the multiverse id inside the identifiers
+        identifiers_ids            = foreign['identifiers'].map(lambda x: x.get('multiverseId') if isinstance(x, dict) else None)
+        foreign['MULTIVERSE_ID']   = foreign['MULTIVERSE_ID'].fillna(identifiers_ids)
+        foreign['FOREIGN_DATA_ID'] = content_id(foreign, columns__foreign_data_content)
+
+        tables['foreign_data']          = foreign[['FOREIGN_DATA_ID'] + columns__foreign_data_content].drop_duplicates('FOREIGN_DATA_ID').reset_index(drop = True)
+        tables['printing_foreign_data'] = foreign[['CARD_UUID', 'FOREIGN_DATA_ID', 'MULTIVERSE_ID']].reset_index(drop = True)
+
+    return tables
+
+
+
+# Function for rebuilding one wide row per printing from the split tables
+def join_oracle_printings(tables, columns=None):
+
+    """
+    Join the oracle columns back onto the printings, e.g. for notebooks that
+    expect the wide cards table.
+
+    Parameters
+    ----------
+    tables : dict
+        Output of `split_oracle_cards`.
+    columns : list of str, optional
+        Oracle columns to attach, defaults to all of them.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per printing.
+    """
+
+    df_oracle = tables['oracle_cards']
+    if columns is not None:
+        df_oracle = df_oracle[columns__oracle_key + [c for c in columns if c not in columns__oracle_key]]
+
+    return tables['printings'].merge(df_oracle, on = columns__oracle_key, how = 'left')
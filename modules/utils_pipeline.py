@@ -0,0 +1,463 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import json
+import lzma
+import time
+import queue
+import codecs
+import hashlib
+import threading
+
+# Data libraries
+import pandas as pd
+
+# Web libraries
+import requests
+
+# Modular functions
+from   modules.utils_download import iter_download_chunks, fetch_sha256, download_chunk_size\
+                                    ,remote_file_changed, partial_suffix, validators_suffix
+from   modules.utils_json     import json_loads
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Maximum number of chunks waiting between two pipeline stages
+pipeline_queue_size = 8
+
+# Number of decompressed bytes handed to the parser per chunk
+pipeline_text_chunk_size = 4 * 1024 * 1024
+
+# JSON whitespace characters
+json_whitespace = ' \t\n\r'
+
+# Sentinel marking the end of a stage's output
+_end_of_stream = object()
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for incrementally parsing the items of the top-level 'data' value of an MTGJSON file
+def iter_json_items(chunks, stream_key='data', top=None, decoder=None, backend=None):
+
+    """
+    Incrementally parse an MTGJSON document from chunks of bytes, yielding the
+    items of its `stream_key` value one at a time.
+
+    MTGJSON files are an object with a small 'meta' value and a large 'data'
+    value. Only one item of 'data' (e.g. one set of AllPrintings) is held as a
+    Python object at a time, and each item is parsed with the C scanner of the
+    stdlib JSON decoder as soon as its closing bracket has arrived.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        The UTF-8 encoded document, split anywhere.
+    stream_key : str
+        The top-level key whose items are streamed.
+    top : dict, optional
+        Filled with every other top-level key and value (e.g. 'meta').
+    decoder : json.JSONDecoder, optional
+        Decoder used for each item, defaults to the stdlib decoder.
+    backend : str, optional
+        Name of a JSON backend from `utils_json`. Only the stdlib decoder can
+        resume in the middle of a document, so any other backend ('orjson',
+        'simdjson') parses the whole document once every chunk has arrived.
+
+    Yields
+    ------
+    tuple of (str or int, object)
+        The key (or list index, when the value is an array) and the parsed value.
+
+    Raises
+    ------
+    ValueError
+        If the document is not valid JSON or ends early.
+    """
+
+    top      = top if top is not None else {}
+
+    # Parsing the whole document at once with a non-incremental backend
+    if backend not in (None, 'stdlib'):
+        document = json_loads(b''.join(chunks), backend = backend)
+        data     = document.pop(stream_key, {})
+        top.update(document)
+        yield from (data.items() if isinstance(data, dict) else enumerate(data))
+        return
+
+    decoder  = decoder or json.JSONDecoder()
+    chunks   = iter(chunks)
+    utf8     = codecs.getincrementaldecoder('utf-8')()
+
+    # Parser state: the text buffer, the read position and whether the input is exhausted
+    state = {'buf' : '', 'pos' : 0, 'eof' : False}
+
+    def more():
+        # Dropping consumed text and appending the next decoded chunk
+        if state['eof']:
+            return False
+        state['buf'], state['pos'] = state['buf'][state['pos']:], 0
+        for chunk in chunks:
+            text = utf8.decode(chunk)
+            if text:
+                state['buf'] += text
+                return True
+        state['buf'] += utf8.decode(b'', final = True)
+        state['eof']  = True
+        return True
+
+    def peek():
+        # Skipping whitespace and returning the next character ('' at the end of input)
+        while True:
+            buf, pos = state['buf'], state['pos']
+            while pos < len(buf) and buf[pos] in json_whitespace:
+                pos += 1
+            state['pos'] = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not more():
+                return ''
+
+    def expect(chars):
+        # Consuming one of the expected structural characters
+        char = peek()
+        if not char or char not in chars:
+            raise ValueError(f'Expected one of {chars!r} but found {char!r} in the JSON stream')
+        state['pos'] += 1
+        return char
+
+    def value():
+        # Decoding a complete value, reading more input whenever it is cut off
+        peek()
+        wanted = 0
+        while True:
+            buf, pos = state['buf'], state['pos']
+            if len(buf) - pos >= wanted or state['eof']:
+                try:
+                    result, end = decoder.raw_decode(buf, pos)
+                    # A number at the very end of the buffer may continue in the next chunk
+                    if end < len(buf) or state['eof']:
+                        state['pos'] = end
+                        return result
+                except json.JSONDecodeError:
+                    if state['eof']:
+                        raise
+                # Waiting for the buffer to double so retries stay linear in the item size
+                wanted = 2 * (len(buf) - pos)
+            if not more():
+                raise ValueError('The JSON stream ended in the middle of a value')
+
+    # Walking the top-level object
+    expect('{')
+    if peek() == '}':
+        return
+    while True:
+        key = value()
+        expect(':')
+
+        if key == stream_key:
+            # Streaming the items of the large value
+            closer = '}' if expect('{[') == '{' else ']'
+            index  = 0
+            if peek() == closer:
+                state['pos'] += 1
+            else:
+                while True:
+                    if closer == '}':
+                        item_key = value()
+                        expect(':')
+                    else:
+                        item_key = index
+                    yield item_key, value()
+                    index += 1
+                    if expect(',' + closer) == closer:
+                        break
+        else:
+            # Keeping small values such as 'meta'
+            top[key] = value()
+
+        if expect(',}') == '}':
+            return
+
+
+
+# Function for running a pipeline stage with a stop event and error capture
+def _run_stage(name, work, stats, errors, stop, outbox):
+
+    """
+    Run one pipeline stage, recording its busy time and forwarding errors.
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage in `stats`.
+    work : callable
+        Function running the stage, returning when its input is exhausted.
+    stats : dict
+        Per-stage counters, updated in place.
+    errors : list
+        Collects exceptions raised by any stage.
+    stop : threading.Event
+        Set when any stage fails so the others stop waiting.
+    outbox : queue.Queue or None
+        Queue receiving the end-of-stream sentinel when the stage finishes.
+    """
+
+    started = time.perf_counter()
+    try:
+        work()
+    except BaseException as error:
+        errors.append(error)
+        stop.set()
+    finally:
+        stats[name]['WALL_SECONDS'] = time.perf_counter() - started
+        if outbox is not None:
+            _put(outbox, _end_of_stream, stop, force = True)
+
+
+
+# Function for putting an item on a bounded queue without blocking forever after a failure
+def _put(q, item, stop, force=False):
+
+    """
+    Put an item on a queue, giving up when the pipeline has been stopped.
+
+    Parameters
+    ----------
+    q : queue.Queue
+        The bounded queue between two stages.
+    item : object
+        The item to put.
+    stop : threading.Event
+        Set when any stage has failed.
+    force : bool
+        Keep trying after a stop, used for the end-of-stream sentinel.
+    """
+
+    while True:
+        try:
+            q.put(item, timeout = 0.1)
+            return
+        except queue.Full:
+            if stop.is_set():
+                # Making room for the sentinel so the consumer can finish
+                if force:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+                    continue
+                raise RuntimeError('Pipeline stopped')
+
+
+
+# Function for iterating a queue until the end-of-stream sentinel
+def _drain(q, stop, wait):
+
+    """
+    Yield items from a queue until the end-of-stream sentinel arrives,
+    adding the time spent waiting to `wait['seconds']`.
+    """
+
+    while True:
+        started = time.perf_counter()
+        item    = q.get()
+        wait['seconds'] += time.perf_counter() - started
+        if item is _end_of_stream or stop.is_set():
+            return
+        yield item
+
+
+
+# Function for streaming, decompressing and parsing an MTGJSON file with overlapping stages
+def stream_mtgjson(source
+                  ,on_item
+                  ,cache_path  = None
+                  ,sha256      = True
+                  ,stream_key  = 'data'
+                  ,chunk_size  = download_chunk_size
+                  ,queue_size  = pipeline_queue_size
+                  ,session     = None
+                  ,backend     = None):
+
+    """
+    Download, decompress and parse an MTGJSON .json.xz file as a pipeline of
+    three threads connected by bounded queues, calling `on_item` for every item
+    of its 'data' value (e.g. every set of AllPrintings).
+
+    The download, `LZMADecompressor` and parser stages run concurrently, so the
+    wall time approaches that of the slowest stage instead of the sum of all
+    three. Memory stays bounded by the queue sizes and the largest single item.
+
+    Integrity is checked while the bytes stream through: the xz container has
+    its own CRC check which `lzma` enforces per block, and the SHA-256 published
+    by MTGJSON is compared once the last byte has arrived. Results built by
+    `on_item` should only be used once this function has returned.
+
+    Parameters
+    ----------
+    source : str
+        URL of the file, or the path of a local copy.
+    on_item : callable
+        Called as `on_item(key, value)` from the parser thread for each item,
+        e.g. a set code and its set dictionary.
+    cache_path : str, optional
+        When given, the compressed bytes are also written to this path (via a
+        '.part' file that is only moved into place once verified). If a copy
+        already exists and a conditional GET shows it is current, the file is
+        read from disk instead of the network.
+    sha256 : bool or str
+        True fetches the checksum published at `source` + '.sha256', a string
+        is used as the expected digest, and False skips the verification.
+        Ignored for local files.
+    stream_key : str
+        The top-level key whose items are streamed.
+    chunk_size : int
+        Number of compressed bytes read per chunk.
+    queue_size : int
+        Maximum number of chunks waiting between two stages.
+    session : requests.Session, optional
+        Session used for the requests.
+    backend : str, optional
+        JSON backend of the parser stage. The default incremental stdlib parser
+        keeps one item in memory at a time; a faster backend such as 'orjson'
+        waits for the whole document (see `iter_json_items`).
+
+    Returns
+    -------
+    tuple of (dict, pd.DataFrame)
+        The other top-level values of the file (e.g. {'meta': {...}}) and the
+        per-stage counters with columns STAGE, BYTES_IN, BYTES_OUT, ITEMS,
+        BUSY_SECONDS, WAIT_SECONDS, WALL_SECONDS and MB_PER_SECOND
+        (input megabytes per busy second).
+
+    Raises
+    ------
+    ValueError
+        If the downloaded bytes do not match the published checksum.
+    """
+
+    session = session or requests.Session()
+
+    # Reading from the cache (or a local file) when possible
+    local = os.path.exists(source)
+    if not local and cache_path is not None and not remote_file_changed(source, cache_path, session = session):
+        source, local = cache_path, True
+
+    # Resolving the expected checksum before the transfer starts
+    expected = None
+    if not local:
+        expected = fetch_sha256(source, session = session) if sha256 is True else (sha256.lower() if sha256 else None)
+
+    # Shared pipeline state
+    compressed   = queue.Queue(maxsize = queue_size)
+    decompressed = queue.Queue(maxsize = queue_size)
+    stop         = threading.Event()
+    errors       = []
+    top          = {}
+    stats        = {stage : {'BYTES_IN' : 0, 'BYTES_OUT' : 0, 'ITEMS' : 0, 'WAIT_SECONDS' : 0.0, 'WALL_SECONDS' : 0.0}
+                    for stage in ['download', 'decompress', 'parse']}
+
+    def download():
+        hasher = hashlib.sha256()
+        wait   = {'seconds' : 0.0}
+        info   = {}
+        if local:
+            def chunks():
+                with open(source, 'rb') as f:
+                    yield from iter(lambda: f.read(chunk_size), b'')
+        else:
+            def chunks():
+                yield from iter_download_chunks(source, hasher = hasher, chunk_size = chunk_size, session = session, info = info)
+
+        # Teeing the compressed bytes into the cache file
+        part = open(cache_path + partial_suffix, 'wb') if cache_path is not None and not local else None
+        try:
+            for chunk in chunks():
+                stats['download']['BYTES_OUT'] += len(chunk)
+                stats['download']['ITEMS']     += 1
+                if part is not None:
+                    part.write(chunk)
+                started = time.perf_counter()
+                _put(compressed, chunk, stop)
+                wait['seconds'] += time.perf_counter() - started
+        finally:
+            if part is not None:
+                part.close()
+            stats['download']['WAIT_SECONDS'] = wait['seconds']
+
+        # Rejecting the stream if the checksum does not match
+        if expected is not None and hasher.hexdigest() != expected:
+            if part is not None:
+                os.remove(cache_path + partial_suffix)
+            raise ValueError(f'SHA-256 mismatch for {source}: expected {expected}, got {hasher.hexdigest()}')
+
+        # Moving the verified copy into the cache with its validators
+        if part is not None:
+            os.replace(cache_path + partial_suffix, cache_path)
+            with open(cache_path + validators_suffix, 'w') as f:
+                json.dump({'etag' : info.get('etag'), 'last_modified' : info.get('last_modified')}, f)
+
+    def decompress():
+        wait         = {'seconds' : 0.0}
+        decompressor = lzma.LZMADecompressor() if str(source).endswith('.xz') else None
+        for chunk in _drain(compressed, stop, wait):
+            stats['decompress']['BYTES_IN'] += len(chunk)
+            data = decompressor.decompress(chunk) if decompressor is not None else chunk
+            # Splitting large outputs so the parser receives evenly sized pieces
+            for start in range(0, len(data), pipeline_text_chunk_size):
+                piece = data[start:start + pipeline_text_chunk_size]
+                stats['decompress']['BYTES_OUT'] += len(piece)
+                stats['decompress']['ITEMS']     += 1
+                started = time.perf_counter()
+                _put(decompressed, piece, stop)
+                wait['seconds'] += time.perf_counter() - started
+        if decompressor is not None and not decompressor.eof and not stop.is_set():
+            raise ValueError(f'The compressed stream of {source} ended before the end of the xz container')
+        stats['decompress']['WAIT_SECONDS'] = wait['seconds']
+
+    def parse():
+        wait = {'seconds' : 0.0}
+        def pieces():
+            for piece in _drain(decompressed, stop, wait):
+                stats['parse']['BYTES_IN'] += len(piece)
+                yield piece
+        for key, item in iter_json_items(pieces(), stream_key = stream_key, top = top, backend = backend):
+            on_item(key, item)
+            stats['parse']['ITEMS'] += 1
+        # Consuming anything left after the closing bracket so the upstream stages can finish
+        for _ in pieces():
+            pass
+        stats['parse']['WAIT_SECONDS'] = wait['seconds']
+
+    # Starting the three stages
+    threads = [threading.Thread(target = _run_stage, args = ('download',   download,   stats, errors, stop, compressed),   daemon = True)
+              ,threading.Thread(target = _run_stage, args = ('decompress', decompress, stats, errors, stop, decompressed), daemon = True)
+              ,threading.Thread(target = _run_stage, args = ('parse',      parse,      stats, errors, stop, None),         daemon = True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Raising the first real failure (later ones are usually the stop propagating)
+    if errors:
+        raise next((e for e in errors if not isinstance(e, RuntimeError)), errors[0])
+
+    # Building the per-stage throughput table
+    df_stats = pd.DataFrame.from_dict(stats, orient = 'index').rename_axis('STAGE').reset_index()
+    df_stats.loc[df_stats['STAGE'] == 'download', 'BYTES_IN'] = df_stats.loc[df_stats['STAGE'] == 'download', 'BYTES_OUT']
+    df_stats['BUSY_SECONDS']  = (df_stats['WALL_SECONDS'] - df_stats['WAIT_SECONDS']).clip(lower = 0)
+    df_stats['MB_PER_SECOND'] = df_stats['BYTES_IN'] / 1024 ** 2 / df_stats['BUSY_SECONDS'].where(df_stats['BUSY_SECONDS'] > 0)
+    df_stats = df_stats[['STAGE', 'BYTES_IN', 'BYTES_OUT', 'ITEMS', 'BUSY_SECONDS', 'WAIT_SECONDS', 'WALL_SECONDS', 'MB_PER_SECOND']]
+
+    return top, df_stats
@@ -0,0 +1,148 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+from   array import array
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_download import mtgjson_url
+from   modules.utils_pipeline import stream_mtgjson
+from   modules.utils_sql      import upload_indexed_table
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Game format, provider and price type read by default
+prices__game_format = 'paper'
+prices__provider    = 'tcgplayer'
+prices__price_type  = 'retail'
+
+# FOIL_FLAG of every finish kept, etched prices being left out so each card has one foil price
+prices__finishes = {'normal' : False
+                   ,'foil'   : True}
+
+# Columns of the card prices table
+columns__card_prices = ['CARD_UUID'
+                       ,'FOIL_FLAG'
+                       ,'PRICE'
+                       ,'PRICE_DATE'
+                       ,'CURRENCY']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for streaming AllPricesToday into one price per card and finish
+def ingest_card_prices(source=None
+                      ,cache_path  = None
+                      ,session     = None
+                      ,game_format = prices__game_format
+                      ,provider    = prices__provider
+                      ,price_type  = prices__price_type):
+
+    """
+    Stream AllPricesToday (or AllPrices) into the latest price of every card
+    for one provider, as the CARD_UUID, FOIL_FLAG and PRICE table the deck
+    values, booster simulator and deck builder read.
+
+    Parameters
+    ----------
+    source : str, optional
+        URL or local path of the prices file, defaults to AllPricesToday.json.xz
+        on the MTGJSON server.
+    cache_path : str, optional
+        Local copy of the compressed file, see `stream_mtgjson`.
+    session : requests.Session, optional
+        Session used for the requests.
+    game_format : str
+        'paper' or 'mtgo'.
+    provider : str
+        Price provider, e.g. 'tcgplayer' or 'cardkingdom'.
+    price_type : str
+        'retail' or 'buylist'.
+
+    Returns
+    -------
+    tuple of (dict, pd.DataFrame)
+        The 'meta' of the file (for `data_recency_check`) and the prices with
+        the columns of `columns__card_prices`, one row per card and finish.
+    """
+
+    source = source or mtgjson_url('AllPricesToday.json.xz')
+
+    # Appending the latest price of every finish to typed arrays while the file streams
+    uuids, dates, currencies = [], [], []
+    foils, prices            = array('b'), array('d')
+
+    def on_item(card_uuid, formats):
+        listing = ((formats or {}).get(game_format) or {}).get(provider) or {}
+        for finish, history in (listing.get(price_type) or {}).items():
+            if finish not in prices__finishes or not history:
+                continue
+            date = max(history)
+            uuids.append(card_uuid)
+            dates.append(date)
+            currencies.append(listing.get('currency'))
+            foils.append(prices__finishes[finish])
+            prices.append(float(history[date]))
+
+    top, _ = stream_mtgjson(source
+                           ,on_item    = on_item
+                           ,cache_path = cache_path
+                           ,session    = session)
+
+    df_prices = pd.DataFrame({'CARD_UUID'  : pd.array(uuids, dtype = 'str')
+                             ,'FOIL_FLAG'  : np.frombuffer(foils, dtype = np.int8).astype(bool)
+                             ,'PRICE'      : np.frombuffer(prices, dtype = np.float64)
+                             ,'PRICE_DATE' : pd.array(dates, dtype = 'str')
+                             ,'CURRENCY'   : pd.Categorical(currencies)})
+
+    return top, df_prices[columns__card_prices]
+
+
+
+# Function for uploading the card prices with the indexes of the price joins
+def upload_card_prices(df_prices, engine, schema_name='raw_data', table_name='card_prices', registry=None):
+
+    """
+    Upload the card prices to PostgreSQL with a unique index on (CARD_UUID,
+    FOIL_FLAG) and an index on (CARD_UUID, PRICE) for the candidate query of
+    `utils_deck_builder`.
+
+    Parameters
+    ----------
+    df_prices : pd.DataFrame
+        Output of `ingest_card_prices`, or any table with CARD_UUID, FOIL_FLAG
+        and PRICE.
+    engine : sqlalchemy.engine.Engine
+        Engine connected to the database.
+    schema_name : str
+        Name of the PostgreSQL schema.
+    table_name : str
+        Name of the table.
+    registry : KeyRegistry, optional
+        Registry of integer CARD_UUID keys, see `utils_keys`.
+
+    Returns
+    -------
+    list of str
+        Names of the indexes created.
+    """
+
+    return upload_indexed_table(df_prices
+                               ,schema_name    = schema_name
+                               ,table_name     = table_name
+                               ,engine         = engine
+                               ,indexes        = [['CARD_UUID', 'PRICE']]
+                               ,unique_indexes = [['CARD_UUID', 'FOIL_FLAG']]
+                               ,registry       = registry)
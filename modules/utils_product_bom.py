@@ -0,0 +1,272 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_deck_files import deck_files__boards
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Content types that are expanded further, the others being leaves of the bill of materials
+bom__expanded_types = ['sealed'
+                      ,'deck']
+
+# Columns of the set product bill of materials table
+columns__set_product_bom = ['PRODUCT_UUID'
+                           ,'SET_CODE'
+                           ,'COMPONENT_TYPE'
+                           ,'COMPONENT_SET_CODE'
+                           ,'COMPONENT_UUID'
+                           ,'COMPONENT_CODE'
+                           ,'COMPONENT_NAME'
+                           ,'FOIL_FLAG'
+                           ,'QUANTITY']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for naming the node of one content entry
+def _content_node(content_type, content):
+
+    """
+    Return the graph node of one entry of a product's contents:
+    ('sealed', uuid), ('deck', set code, name), ('card', set code, uuid, foil),
+    ('pack', set code, booster code) or ('other', name).
+    """
+
+    set_code = (content.get('set') or '').upper() or None
+
+    if content_type == 'sealed':
+        return ('sealed', content.get('uuid'))
+    if content_type == 'deck':
+        return ('deck', set_code, content.get('name'))
+    if content_type == 'card':
+        return ('card', set_code, content.get('uuid'), bool(content.get('foil', False)))
+    if content_type == 'pack':
+        return ('pack', set_code, content.get('code'))
+
+    return (content_type, content.get('name'))
+
+
+
+# Function for listing the components of one contents dictionary
+def _content_edges(contents, probability=1.0):
+
+    """
+    Return the (node, quantity) components of a product's contents, the
+    configurations of 'variable' contents contributing their expected
+    quantities (weighted by chance / weight, or equally when unweighted).
+    """
+
+    edges = []
+    for content_type, entries in (contents or {}).items():
+        for content in entries if isinstance(entries, list) else []:
+            if not isinstance(content, dict):
+                continue
+            if content_type != 'variable':
+                edges.append((_content_node(content_type, content), probability * (content.get('count') or 1)))
+                continue
+
+            # Each configuration is one possible content of the product
+            configs = [config for config in content.get('configs') or [] if isinstance(config, dict)]
+            for config in configs:
+                weights = [w for w in config.get('variable_config') or [] if isinstance(w, dict) and w.get('weight')]
+                chance  = weights[0].get('chance', 1) / weights[0]['weight'] if weights else 1 / len(configs)
+                edges  += _content_edges({k : v for k, v in config.items() if k != 'variable_config'}, probability * chance)
+
+    return edges
+
+
+
+# Function for building the product to component graph of the set list
+def product_graph(df_set_list):
+
+    """
+    Build the directed acyclic graph linking every sealed product and deck to
+    the products, decks, cards and packs it contains.
+
+    Parameters
+    ----------
+    df_set_list : pd.DataFrame
+        Output of `set_list_frame`, with SET_CODE, PRODUCT_INFO and SET_DECKS.
+
+    Returns
+    -------
+    tuple of (dict, dict)
+        {('sealed', uuid) : (set code, product name)} and
+        {node : list of (component node, quantity)} for sealed products and decks.
+    """
+
+    products, edges = {}, {}
+    for set_code, set_products, set_decks in zip(df_set_list['SET_CODE'], df_set_list['PRODUCT_INFO'], df_set_list['SET_DECKS']):
+        for product in set_products if isinstance(set_products, list) else []:
+            node           = ('sealed', product.get('uuid'))
+            products[node] = (set_code, product.get('name'))
+            edges[node]    = _content_edges(product.get('contents') if isinstance(product.get('contents'), dict) else {})
+
+        # Decks are made of the cards of their boards
+        for deck in set_decks if isinstance(set_decks, list) else []:
+            edges[('deck', set_code, deck.get('name'))] = [(('card', set_code, card.get('uuid'), bool(card.get('isFoil', False))), card.get('count') or 1)
+                                                           for board in deck_files__boards
+                                                           for card in deck.get(board) or []
+                                                           if isinstance(card, dict)]
+
+    return products, edges
+
+
+
+# Function for expanding one node of the product graph into its leaves
+def resolve_node(node, edges, memo=None, path=()):
+
+    """
+    Expand a product or deck into the quantities of the cards, packs and other
+    leaves it is made of, recursing through nested products.
+
+    Results are memoised per node, so a product shared by many others (e.g.
+    the booster box of every case) is expanded once. Products and decks
+    missing from the graph stay as leaves.
+
+    Parameters
+    ----------
+    node : tuple
+        Graph node, see `product_graph`.
+    edges : dict
+        The graph edges.
+    memo : dict, optional
+        Expansions already computed, filled in place.
+    path : tuple
+        Nodes being expanded, used to detect cycles.
+
+    Returns
+    -------
+    dict
+        {leaf node : quantity}.
+
+    Raises
+    ------
+    ValueError
+        If a product contains itself.
+    """
+
+    memo = {} if memo is None else memo
+    if node in memo:
+        return memo[node]
+    if node in path:
+        raise ValueError(f'Product contents loop back on themselves: {" -> ".join(map(str, path + (node,)))}')
+    if node[0] not in bom__expanded_types or node not in edges:
+        return {node : 1.0}
+
+    leaves = {}
+    for component, quantity in edges[node]:
+        for leaf, leaf_quantity in resolve_node(component, edges, memo, path + (node,)).items():
+            leaves[leaf] = leaves.get(leaf, 0.0) + quantity * leaf_quantity
+    memo[node] = leaves
+
+    return leaves
+
+
+
+# Function for splitting a leaf node into the component columns
+def _leaf_columns(leaf):
+
+    """
+    Return COMPONENT_TYPE, COMPONENT_SET_CODE, COMPONENT_UUID, COMPONENT_CODE,
+    COMPONENT_NAME and FOIL_FLAG of a leaf node.
+    """
+
+    if leaf[0] == 'card':
+        return ('card', leaf[1], leaf[2], None, None, leaf[3])
+    if leaf[0] == 'pack':
+        return ('pack', leaf[1], None, leaf[2], None, False)
+    if leaf[0] == 'sealed':
+        return ('sealed', None, leaf[1], None, None, False)
+    if leaf[0] == 'deck':
+        return ('deck', leaf[1], None, None, leaf[2], False)
+
+    return (leaf[0], None, None, None, leaf[1], False)
+
+
+
+# Function for building the set product bill of materials table
+def set_product_bom_table(df_set_list):
+
+    """
+    Fully expand every sealed product of the set list into the cards, booster
+    packs and other items it ultimately contains, e.g. a case into the packs of
+    its booster boxes and a bundle into the cards of its deck.
+
+    Parameters
+    ----------
+    df_set_list : pd.DataFrame
+        Output of `set_list_frame`.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per product and leaf with `columns__set_product_bom`, the
+        QUANTITY being an expected count for variable contents. Sealed
+        products and decks that could not be found stay as 'sealed' and 'deck'
+        rows.
+    """
+
+    products, edges = product_graph(df_set_list)
+
+    memo, rows = {}, []
+    for node, (set_code, _) in products.items():
+        for leaf, quantity in resolve_node(node, edges, memo).items():
+            rows.append((node[1], set_code) + _leaf_columns(leaf) + (quantity,))
+
+    df = pd.DataFrame(rows, columns = columns__set_product_bom)
+    df['QUANTITY'] = df['QUANTITY'].astype(np.float64)
+
+    return df.sort_values(['SET_CODE', 'PRODUCT_UUID', 'COMPONENT_TYPE', 'COMPONENT_UUID', 'COMPONENT_CODE'], ignore_index = True)
+
+
+
+# Function for rolling card prices up to the sealed products
+def product_bom_value(df_bom, df_prices, price_column='PRICE'):
+
+    """
+    Sum the price of the cards each product contains.
+
+    Parameters
+    ----------
+    df_bom : pd.DataFrame
+        Output of `set_product_bom_table`.
+    df_prices : pd.DataFrame
+        One price per CARD_UUID, or per CARD_UUID and FOIL_FLAG when foil and
+        non-foil prices differ.
+    price_column : str
+        Column of `df_prices` holding the price.
+
+    Returns
+    -------
+    pd.DataFrame
+        PRODUCT_UUID, CARD_VALUE, UNPRICED_CARDS (quantity of cards without a
+        price) and PACKS (quantity of booster packs left to price, see the
+        booster simulator).
+    """
+
+    keys   = ['CARD_UUID', 'FOIL_FLAG'] if 'FOIL_FLAG' in df_prices.columns else ['CARD_UUID']
+    df     = df_bom.rename(columns = {'COMPONENT_UUID' : 'CARD_UUID'})
+    cards  = df['COMPONENT_TYPE'] == 'card'
+    priced = df[cards].merge(df_prices[keys + [price_column]], on = keys, how = 'left')
+
+    value = (priced.assign(CARD_VALUE     = priced['QUANTITY'] * priced[price_column]
+                          ,UNPRICED_CARDS = priced['QUANTITY'].where(priced[price_column].isna(), 0.0))
+                   .groupby('PRODUCT_UUID')[['CARD_VALUE', 'UNPRICED_CARDS']].sum())
+    packs = df[df['COMPONENT_TYPE'] == 'pack'].groupby('PRODUCT_UUID')['QUANTITY'].sum().rename('PACKS')
+
+    return (pd.DataFrame(index = pd.Index(df['PRODUCT_UUID'].unique(), name = 'PRODUCT_UUID'))
+              .join(value).join(packs).fillna(0.0).reset_index())
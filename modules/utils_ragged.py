@@ -0,0 +1,312 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+from   itertools import chain
+
+# Data libraries
+import numpy           as np
+import pandas          as pd
+import pyarrow         as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Container for list columns stored as offsets and dictionary codes
+class RaggedArray:
+
+    """
+    List column stored as an offsets array and a flat array of codes into a
+    dictionary of distinct values, instead of one Python list per row.
+
+    Row i holds dictionary[codes[offsets[i]:offsets[i + 1]]], and rows whose
+    `valid` flag is False were missing (None) rather than empty. It converts to
+    and from Arrow ListArrays of dictionary values, which pandas holds as
+    ArrowDtype columns and Parquet stores natively.
+    """
+
+    def __init__(self, offsets, codes, dictionary, valid=None):
+        self.offsets    = np.asarray(offsets, dtype = np.int64)
+        self.codes      = np.asarray(codes,   dtype = np.int32)
+        self.dictionary = pd.Index(dictionary)
+        self.valid      = np.ones(len(self.offsets) - 1, dtype = bool) if valid is None else np.asarray(valid, dtype = bool)
+
+    @classmethod
+    def from_flat(cls, values, lengths, valid=None):
+        # Encoding the flat values once, the lengths giving the row boundaries
+        codes, dictionary = pd.factorize(np.asarray(values, dtype = object) if not isinstance(values, (pd.Series, pd.Index, np.ndarray)) else values)
+        offsets           = np.concatenate([[0], np.cumsum(np.asarray(lengths, dtype = np.int64))])
+        return cls(offsets, codes, dictionary, valid)
+
+    @classmethod
+    def from_lists(cls, values):
+        # Lists, tuples and Arrow converted arrays are rows, anything else is missing
+        rows  = [x if isinstance(x, (list, tuple, np.ndarray)) else None for x in values]
+        valid = np.fromiter((x is not None for x in rows), dtype = bool, count = len(rows))
+        flat  = list(chain.from_iterable(x for x in rows if x is not None))
+        return cls.from_flat(flat, [0 if x is None else len(x) for x in rows], valid)
+
+    @classmethod
+    def from_arrow(cls, array):
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks() if array.num_chunks else pa.array([], type = array.type)
+
+        # Lengths and flatten both skip the slice offset and any values hidden under null rows
+        lengths = pc.fill_null(pc.list_value_length(array), 0).to_numpy()
+        flat    = array.flatten()
+        if not pa.types.is_dictionary(flat.type):
+            flat = pc.dictionary_encode(flat)
+
+        codes = pc.fill_null(flat.indices, -1).to_numpy(zero_copy_only = False)
+        valid = pc.is_valid(array).to_numpy(zero_copy_only = False)
+        return cls(np.concatenate([[0], np.cumsum(lengths)]), codes, flat.dictionary.to_pylist(), valid)
+
+    @classmethod
+    def from_series(cls, series):
+        if isinstance(series.dtype, pd.ArrowDtype):
+            return cls.from_arrow(pa.array(series.array))
+        return cls.from_lists(series)
+
+    def __len__(self):
+        return len(self.valid)
+
+    def __getitem__(self, row):
+        return list(self.dictionary[self.codes[self.offsets[row]:self.offsets[row + 1]]]) if self.valid[row] else None
+
+    def __repr__(self):
+        return f'RaggedArray(rows={len(self)}, values={len(self.codes)}, dictionary={len(self.dictionary)})'
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.codes.nbytes + self.valid.nbytes + self.dictionary.memory_usage(deep = True)
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def parents(self):
+        return np.repeat(np.arange(len(self)), self.lengths())
+
+    def explode(self):
+        # Row position and value of every element, missing values coming back as NaN
+        return self.parents(), pd.Categorical.from_codes(self.codes, categories = self.dictionary)
+
+    def take(self, rows):
+        rows    = np.asarray(rows, dtype = np.int64)
+        lengths = self.lengths()[rows]
+        starts  = np.repeat(self.offsets[:-1][rows], lengths)
+        within  = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return RaggedArray(np.concatenate([[0], np.cumsum(lengths)]), self.codes[starts + within], self.dictionary, self.valid[rows])
+
+    def _row_counts(self, hits):
+        # Number of elements of every row whose dictionary entry is a hit, -1 codes never hit
+        flags = np.append(np.asarray(hits, dtype = bool), False)
+        return np.bincount(self.parents(), weights = flags[self.codes], minlength = len(self)).astype(np.int64)
+
+    def _hits(self, predicate):
+        return np.asarray(predicate(self.dictionary) if callable(predicate) else predicate, dtype = bool)
+
+    def contains(self, value):
+        return self.contains_any([value])
+
+    def contains_any(self, values):
+        return self._row_counts(self.dictionary.isin(values)) > 0
+
+    def contains_all(self, values):
+        return np.logical_and.reduce([self.contains(value) for value in values]) if len(values) else np.ones(len(self), dtype = bool)
+
+    def any(self, predicate):
+        return self._row_counts(self._hits(predicate)) > 0
+
+    def all(self, predicate):
+        return self._row_counts(self._hits(predicate)) == self.lengths()
+
+    def to_lists(self):
+        values = np.append(self.dictionary.to_numpy(dtype = object), None)[self.codes]
+        rows   = np.split(values, self.offsets[1:-1]) if len(self) else []
+        return [row.tolist() if valid else None for row, valid in zip(rows, self.valid)]
+
+    def to_arrow(self, dictionary=True):
+        indices = pa.array(self.codes, mask = self.codes < 0, type = pa.int32())
+        values  = pa.DictionaryArray.from_arrays(indices, pa.array(self.dictionary.to_numpy(dtype = object))) if dictionary\
+             else pa.array(self.dictionary.to_numpy(dtype = object)).take(indices)
+        list_type = pa.LargeListArray if self.offsets[-1] >= 2 ** 31 else pa.ListArray
+        offsets   = pa.array(self.offsets, type = pa.int64() if list_type is pa.LargeListArray else pa.int32())
+        return list_type.from_arrays(offsets, values, mask = pa.array(~self.valid))
+
+    def to_series(self, index=None, name=None):
+        return pd.Series(pd.arrays.ArrowExtensionArray(self.to_arrow()), index = index, name = name)
+
+
+
+# Function for mapping Arrow list types with dictionary values to pandas
+def ragged_types_mapper(arrow_type):
+
+    """
+    `types_mapper` for `pyarrow.Table.to_pandas` keeping lists of dictionary
+    values as ArrowDtype columns, every other type converting as usual.
+    """
+
+    if (pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type)) and pa.types.is_dictionary(arrow_type.value_type):
+        return pd.ArrowDtype(arrow_type)
+
+    return None
+
+
+
+# Function for converting list columns of a table into ragged columns
+def ragged_columns(df, columns):
+
+    """
+    Convert list columns (Python lists, Arrow converted arrays or ArrowDtype
+    lists) into dictionary encoded ArrowDtype list columns.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The table.
+    columns : list of str
+        Columns to convert, those missing from `df` are skipped.
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of the table with the ragged columns.
+    """
+
+    df = df.copy()
+    for column in columns:
+        if column in df.columns:
+            df[column] = RaggedArray.from_series(df[column]).to_series(index = df.index, name = column)
+
+    return df
+
+
+
+# Function for converting the list columns of an Arrow table into ragged columns
+def ragged_arrow_table(table, columns=None):
+
+    """
+    Dictionary encode the list of string or integer columns of an Arrow table,
+    so `to_pandas(types_mapper=ragged_types_mapper)` keeps them ragged.
+
+    Parameters
+    ----------
+    table : pyarrow.Table
+        The table, e.g. from `read_ndjson_table`.
+    columns : list of str, optional
+        Columns to convert, defaults to every list of strings or integers.
+
+    Returns
+    -------
+    pyarrow.Table
+        The table with list<dictionary> columns.
+    """
+
+    for i, field in enumerate(table.schema):
+        is_list = pa.types.is_list(field.type) or pa.types.is_large_list(field.type)
+        if columns is None and not (is_list and (pa.types.is_string(field.type.value_type) or pa.types.is_integer(field.type.value_type))):
+            continue
+        if columns is not None and field.name not in columns:
+            continue
+        table = table.set_column(i, field.name, RaggedArray.from_arrow(table.column(i)).to_arrow())
+
+    return table
+
+
+
+# Function for writing a table with ragged columns to Parquet
+def write_ragged_parquet(df, path):
+
+    """
+    Write a table with ragged columns to Parquet, the lists keeping their
+    offsets and dictionary encoding.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The table.
+    path : str
+        Destination .parquet path.
+    """
+
+    pq.write_table(pa.Table.from_pandas(df, preserve_index = False), path)
+
+
+
+# Function for reading a table with ragged columns from Parquet
+def read_ragged_parquet(path, columns=None):
+
+    """
+    Read a Parquet file written by `write_ragged_parquet`, the dictionary
+    encoded lists coming back as ragged ArrowDtype columns.
+
+    Parameters
+    ----------
+    path : str
+        Path of the .parquet file.
+    columns : list of str, optional
+        Columns read, defaults to all of them.
+
+    Returns
+    -------
+    pd.DataFrame
+        The table.
+    """
+
+    return pq.read_table(path, columns = columns).to_pandas(types_mapper = ragged_types_mapper)
+
+
+
+# Function for choosing the PostgreSQL array type of every ragged column
+def postgres_array_dtypes(df):
+
+    """
+    Return the `to_sql` dtype of every ArrowDtype list column, e.g. TEXT[] for
+    lists of strings and BIGINT[] for lists of integers.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The table.
+
+    Returns
+    -------
+    dict
+        {column : sqlalchemy type}.
+    """
+
+    from sqlalchemy                     import BigInteger, Float, Text
+    from sqlalchemy.dialects.postgresql import ARRAY
+
+    dtypes = {}
+    for column, dtype in df.dtypes.items():
+        if not (isinstance(dtype, pd.ArrowDtype) and (pa.types.is_list(dtype.pyarrow_dtype) or pa.types.is_large_list(dtype.pyarrow_dtype))):
+            continue
+        value_type = dtype.pyarrow_dtype.value_type
+        value_type = value_type.value_type if pa.types.is_dictionary(value_type) else value_type
+        dtypes[column] = ARRAY(BigInteger if pa.types.is_integer(value_type) else Float if pa.types.is_floating(value_type) else Text)
+
+    return dtypes
+
+
+
+# Function for converting ragged columns into the Python lists a database driver sends as arrays
+def postgres_array_frame(df):
+
+    """
+    Convert the ragged columns of a table into Python lists for `to_sql`,
+    returning the table and the array dtypes of `postgres_array_dtypes`.
+    Arrays read back from PostgreSQL convert with `RaggedArray.from_lists`.
+    """
+
+    dtypes = postgres_array_dtypes(df)
+    if dtypes:
+        df = df.assign(**{column : pd.Series(RaggedArray.from_series(df[column]).to_lists(), index = df.index, dtype = object) for column in dtypes})
+
+    return df, dtypes
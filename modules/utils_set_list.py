@@ -6,6 +6,10 @@
 import numpy  as np
 import pandas as pd
 
+# Modular functions
+from   modules.utils_df   import normalise_empty_values, multi_label_one_hot
+from   modules.utils_keys import encode_key_columns
+
 
 
 ###################################################################################################
@@ -35,9 +39,22 @@ def extract_purchase_urls(cell):
         - 'TCG_PLAYER_URL': URL if available, otherwise NaN.
     """
 
+    # Returning a Pandas Series so it can be easily joined to a DataFrame
+    return pd.Series(dict(zip(['CARD_KINGDOM_URL', 'TCG_PLAYER_URL'], _purchase_urls(cell))))
+
+
+
+# Function for reading the purchase URLs of a set product without building a Series
+def _purchase_urls(cell):
+
+    """
+    Same extraction as `extract_purchase_urls`, returning a
+    (card kingdom url, tcgplayer url) tuple, NaN when missing.
+    """
+
     # Default output with NaN values
     result = {'CARD_KINGDOM_URL': np.nan, 'TCG_PLAYER_URL': np.nan}
-    
+
     # Case 1: If the cell is a dictionary
     if isinstance(cell, dict):
         key, value = next(iter(cell.items()), (None, None))  # Get the first key-value pair safely
@@ -56,8 +73,355 @@ def extract_purchase_urls(cell):
                 elif key == 'tcgplayer':
                     result['TCG_PLAYER_URL'] = value
 
-    # Return as a Pandas Series so it can be easily joined to a DataFrame
-    return pd.Series(result)
+    return result['CARD_KINGDOM_URL'], result['TCG_PLAYER_URL']
+
+
+
+# Function for converting a list of strings into a column without a dtype inference pass
+def _string_column(values, index):
+
+    """
+    Same column as `pd.Series(values)`, the str dtype being given up front
+    when every value is a string or missing, as inferring it from a list
+    allocates several times the size of the column.
+    """
+
+    array = np.array(values, dtype = object)
+    if pd.api.types.infer_dtype(array, skipna = True) == 'string':
+        return pd.Series(array, index = index, dtype = 'str')
+
+    return pd.Series(values, index = index)
+
+
+
+# Function for building the main set list table
+def set_list_frame(data):
+
+    """
+    Flatten the 'data' of SetList.json into one row per set, sorted by release
+    date and set code, with the set code and name first and a DECK_COUNT.
+
+    Parameters
+    ----------
+    data : list of dict
+        The 'data' list of SetList.json.
+
+    Returns
+    -------
+    pd.DataFrame
+        The set list, nested lists and dictionaries kept as objects.
+    """
+
+    # Converting the dictionary to a flattened dataframe with renamed columns
+    df = pd.json_normalize(data)
+    df.rename(columns = columns__rename_set_list, inplace = True)
+
+    # Sorting by release date and set code, the set name and code first and the other columns alphabetically
+    df = df.sort_values(by = ['RELEASE_DATE', 'SET_CODE'], ignore_index = True)
+    df = df[['SET_CODE', 'SET_NAME'] + sorted(c for c in df.columns if c not in ['SET_CODE', 'SET_NAME'])]
+
+    # Counting the number of decks per set
+    df['DECK_COUNT'] = [len(x) if isinstance(x, list) else 0 for x in df['SET_DECKS']]
+
+    # Ensuring the empty values are consistent
+    return normalise_empty_values(df, strings = False, containers = ())
+
+
+
+# Function for building the sets info table
+def sets_info_table(df_set_list):
+
+    """
+    Project the set list onto `columns__sets_info`, with boolean flags and
+    nullable integer ids.
+    """
+
+    df = df_set_list[columns__sets_info]
+
+    # Converting the flag columns to booleans
+    for col in ['NON_FOIL_FLAG', 'PREVIEW_FLAG', 'FOREIGN_FLAG']:
+        df[col] = df[col].where(df[col].notna(), False).astype(bool)
+
+    # Converting ID columns to integers
+    for col in ['CM_ID', 'CM_ID_ADD', 'CS_SET_ID', 'TCGPG_ID']:
+        df[col] = df[col].astype('Int64')
+
+    return df
+
+
+
+# Function for building the set name translations table
+def translations_table(df_set_list):
+
+    """
+    Project the set list onto the set code, name and TRANSLATION_ columns, the
+    prefix being removed from the language columns.
+    """
+
+    df = df_set_list[['SET_CODE', 'SET_NAME'] + [c for c in df_set_list.columns if 'TRANSLATION' in c]]
+    df.columns = df.columns.str.replace('TRANSLATION_', '', regex = False)
+
+    return df
+
+
+
+# Function for building the set languages table
+def languages_table(df_set_list):
+
+    """
+    One row per set and one boolean column per language the set was released
+    in, ordered by release date.
+    """
+
+    # Ordering the sets by their keys before the release date sort, as the pivot table did
+    df = df_set_list[['SET_CODE', 'SET_NAME', 'RELEASE_DATE', 'LANGUAGES']].dropna(subset = ['SET_CODE', 'SET_NAME', 'RELEASE_DATE'])
+    df = df.sort_values(by = ['SET_CODE', 'SET_NAME', 'RELEASE_DATE'])
+
+    # One-hot encoding the languages with upper case, underscored column names
+    df_languages = multi_label_one_hot(df['LANGUAGES'])
+    df_languages.columns = pd.Index(df_languages.columns, dtype = 'str').str.upper().str.replace(' ', '_')
+    df_languages = df_languages.rename(columns = {'PORTUGUESE_(BRAZIL)' : 'BRAZILIAN_PORTUGUESE'})
+    df = pd.concat([df[['SET_CODE', 'SET_NAME', 'RELEASE_DATE']], df_languages], axis = 1).reset_index(drop = True)
+
+    # Reordering the dataframe by release date
+    return df.sort_values(by = 'RELEASE_DATE').drop(columns = ['RELEASE_DATE']).reset_index(drop = True)
+
+
+
+# Function for building the exploded set decks table shared by the deck tables
+def set_decks_frame(df_set_list):
+
+    """
+    One row per preconstructed deck (one empty row per set without decks),
+    with the renamed deck attributes, NaN for empty lists and a
+    DISPLAY_COMMANDER_COUNT. Every deck table projects from this one frame.
+
+    Parameters
+    ----------
+    df_set_list : pd.DataFrame
+        Output of `set_list_frame`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The set decks.
+    """
+
+    # Repeating the set of every deck, sets without decks keeping one row
+    decks   = [x if isinstance(x, list) else [] for x in df_set_list['SET_DECKS']]
+    lengths = np.fromiter((max(len(x), 1) for x in decks), dtype = np.int64, count = len(decks))
+    df      = df_set_list[['SET_CODE', 'SET_NAME']].take(np.repeat(np.arange(len(decks)), lengths))
+    df.reset_index(drop = True, inplace = True)
+
+    # Expanding the deck dictionaries into separate columns
+    df = pd.concat([df
+                   ,pd.json_normalize([deck for x in decks for deck in (x or [np.nan])])]
+                  ,axis = 1)
+    df.drop(columns = ['code'], inplace = True)
+    df.rename(columns = columns__rename_set_decks, inplace = True)
+
+    # Replacing the empty lists and missing values with NaN
+    df = normalise_empty_values(df, strings = False, containers = list)
+
+    # Counting the number of display commanders
+    df['DISPLAY_COMMANDER_COUNT'] = [len(x) if isinstance(x, list) else 0 for x in df['DISPLAY_COMMANDER']]
+
+    return df
+
+
+
+# Function for building the set decks info table
+def set_decks_info_table(df_set_decks, registry=None):
+
+    """
+    One row per deck with its commander and partner uuids, the card count of
+    every relational column and its first sealed product uuid. With a
+    `registry`, the set code, commander and partner are int32 keys (see
+    `utils_keys`).
+    """
+
+    df = df_set_decks[columns__set_deck_info]
+
+    # Counting the cards of every relational column
+    for relational_col in columns__relational_columns:
+        df[f'{relational_col}_COUNT'] = [sum(d.get('count', 0) for d in x) if isinstance(x, list) else 0 for x in df_set_decks[relational_col]]
+
+    # Separating the main commander and partner commanders into separate columns
+    df_commanders   = df_set_decks.loc[df_set_decks['COMMANDER'].notna(), 'COMMANDER']
+    commander_uuids = pd.DataFrame([[c['uuid'] for c in x] + [None] * (2 - len(x)) for x in df_commanders]
+                                  ,columns = ['COMMANDER_1', 'COMMANDER_2']
+                                  ,index   = df_commanders.index)
+    df[['COMMANDER', 'PARTNER']] = commander_uuids
+
+    # Extracting the product IDs
+    df['SEALED_PRODUCT_IDS'] = df['SEALED_PRODUCT_IDS'].apply(lambda x: x[0] if isinstance(x, list) else x)
+
+    # Reorganise the column order
+    df = df[columns__set_deck_info[:-1]
+          + ['PARTNER']
+          + [col + '_COUNT' for col in columns__relational_columns]
+          + ['SEALED_PRODUCT_IDS']]
+
+    return encode_key_columns(df, registry) if registry is not None else df
+
+
+
+# Function for building a table of one deck list column
+def deck_board_table(df_set_decks, column, uuid_column, count_column=None, registry=None):
+
+    """
+    Explode one list column of the set decks (main board, side board,
+    display commanders, planes or schemes) into one row per card, keeping
+    only the count and uuid of every card dictionary.
+
+    Parameters
+    ----------
+    df_set_decks : pd.DataFrame
+        Output of `set_decks_frame`.
+    column : str
+        The list column, e.g. 'DECK_CARDS'.
+    uuid_column : str
+        Name of the card uuid column, e.g. 'CARD'.
+    count_column : str, optional
+        Name of the card count column, e.g. 'CARD_COUNT', no count when None.
+    registry : KeyRegistry, optional
+        Registry replacing the set codes and card uuids with int32 keys, so
+        the child tables join on integers until `upload_indexed_table`
+        decodes them, see `utils_keys`.
+
+    Returns
+    -------
+    pd.DataFrame
+        SET_CODE, SET_NAME, DECK_NAME, the count and the uuid, decks without
+        cards keeping one row of missing values (-1 keys with a registry).
+    """
+
+    # Repeating the keys of every deck once per card, in one take
+    boards  = [x if isinstance(x, list) and x else [np.nan] for x in df_set_decks[column]]
+    lengths = np.fromiter(map(len, boards), dtype = np.int64, count = len(boards))
+    df      = df_set_decks[['SET_CODE', 'SET_NAME', 'DECK_NAME']].take(np.repeat(np.arange(len(boards)), lengths))
+    df.reset_index(drop = True, inplace = True)
+
+    # Reading the count and uuid of every card dictionary
+    cards = [card if isinstance(card, dict) else {} for x in boards for card in x]
+    if count_column:
+        df[count_column] = pd.array([card.get('count') for card in cards], dtype = 'Int64')
+    uuids = [card.get('uuid', np.nan) for card in cards]
+    if registry is None:
+        df[uuid_column] = _string_column(uuids, df.index)
+        return df
+
+    # Interning the uuids straight from the list, without building the string column
+    df[uuid_column] = registry.encode('uuid', uuids)
+
+    return encode_key_columns(df, registry, {'SET_CODE' : 'set_code'})
+
+
+
+# Function for building the sealed product info table
+def set_product_info_table(df_set_list):
+
+    """
+    One row per sealed product content, with the product attributes, purchase
+    URLs and the retailer ids of `columns__set_product_info`.
+
+    Parameters
+    ----------
+    df_set_list : pd.DataFrame
+        Output of `set_list_frame`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The product info.
+    """
+
+    # Repeating the set of every product, sets without products keeping one row
+    products = [x if isinstance(x, list) and x else [{}] for x in df_set_list['PRODUCT_INFO']]
+    lengths  = np.fromiter(map(len, products), dtype = np.int64, count = len(products))
+    df       = df_set_list[['SET_CODE', 'SET_NAME']].take(np.repeat(np.arange(len(products)), lengths))
+    df.reset_index(drop = True, inplace = True)
+    products = [product if isinstance(product, dict) else {} for x in products for product in x]
+
+    # Joining the product attributes, purchase urls and identifiers
+    df = df.join(pd.DataFrame(products, index = df.index).drop(columns = ['contents', 'purchaseUrls', 'identifiers'], errors = 'ignore'))
+    df['cardCount'] = df['cardCount'].fillna(0).astype('int64')
+    urls = [_purchase_urls(product.get('purchaseUrls', np.nan)) for product in products]
+    df['PURCHASE_URL_CARD_KINGDOM'] = pd.Series([url[0] for url in urls], index = df.index)
+    df['PURCHASE_URL_TCG_PLAYER']   = pd.Series([url[1] for url in urls], index = df.index)
+    df = df.join(pd.json_normalize([product.get('identifiers', np.nan) for product in products]))
+
+    # Taking the first contents key as the type of product and its values as the contents
+    contents = [product.get('contents') for product in products]
+    df['CONTENTS_TYPE'] = [next(iter(x)) if isinstance(x, dict) else {} for x in contents]
+    contents = [next(iter(x.values())) if isinstance(x, dict) else {} for x in contents]
+
+    # Repeating every product once per content
+    contents = [x if isinstance(x, (list, dict)) and len(x) else [np.nan] if isinstance(x, (list, dict)) else [x] for x in contents]
+    lengths  = np.fromiter(map(len, contents), dtype = np.int64, count = len(contents))
+    df       = df.take(np.repeat(np.arange(len(contents)), lengths))
+    df.reset_index(drop = True, inplace = True)
+    df = df.join(pd.json_normalize([content for x in contents for content in (x if isinstance(x, list) else [x])]).add_prefix('contents_'))
+    df.drop(columns = ['contents_configs', 'contents_set', 'contents_foil'], inplace = True)
+
+    # Replacing any empty dicts or lists with NaN
+    df = normalise_empty_values(df, strings = False, containers = (dict, list))
+
+    # Setting the contents_count and relevant ID columns to integer
+    df['contents_count'] = df['contents_count'].fillna(0).astype('Int64')
+    for col in ['abuId', 'cardtraderId', 'mcmId', 'tcgplayerProductId', 'tntId', 'cardKingdomId', 'csiId', 'miniaturemarketId']:
+        df[col] = df[col].replace({np.nan: pd.NA}).astype('Int64')
+
+    # Renaming and reordering the columns
+    df.rename(columns = columns__rename_product_info, inplace = True)
+
+    return df[columns__set_product_info]
+
+
+
+# Function for building every table of the set list
+def set_list_tables(data, registry=None):
+
+    """
+    Build the set list tables uploaded by the set_list notebook, the nested
+    set list and the exploded deck frame being released as soon as the last
+    table needing them is built.
+
+    Parameters
+    ----------
+    data : list of dict
+        The 'data' list of SetList.json.
+    registry : KeyRegistry, optional
+        Registry replacing the set codes and card uuids of the deck tables
+        (set_decks_info and its child tables) with int32 keys, decoded by
+        `upload_indexed_table(registry=...)`.
+
+    Returns
+    -------
+    dict
+        {table name : pd.DataFrame} for 'sets_info', 'translations',
+        'languages', 'set_decks_info', 'display_commanders', 'set_decks_cards',
+        'set_decks_side_board', 'set_decks_planes', 'set_decks_schemes' and
+        'set_product_info'.
+    """
+
+    df_set_list = set_list_frame(data)
+    tables      = {'sets_info'    : sets_info_table(df_set_list)
+                  ,'translations' : translations_table(df_set_list)
+                  ,'languages'    : languages_table(df_set_list)}
+
+    df_set_decks = set_decks_frame(df_set_list)
+    tables['set_decks_info']       = set_decks_info_table(df_set_decks, registry = registry)
+    tables['display_commanders']   = deck_board_table(df_set_decks, 'DISPLAY_COMMANDER', 'DISPLAY_COMMANDER', None,           registry = registry)
+    tables['set_decks_cards']      = deck_board_table(df_set_decks, 'DECK_CARDS',        'CARD',            'CARD_COUNT',   registry = registry)
+    tables['set_decks_side_board'] = deck_board_table(df_set_decks, 'SIDE_BOARD_CARDS',  'SIDE_BOARD_CARD', 'CARD_COUNT',   registry = registry)
+    tables['set_decks_planes']     = deck_board_table(df_set_decks, 'PLANES',            'PLANE',           'PLANE_COUNT',  registry = registry)
+    tables['set_decks_schemes']    = deck_board_table(df_set_decks, 'SCHEMES',           'SCHEME',          'SCHEME_COUNT', registry = registry)
+    del df_set_decks
+
+    tables['set_product_info'] = set_product_info_table(df_set_list)
+
+    return tables
 
 
 
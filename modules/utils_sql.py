@@ -0,0 +1,115 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Database libraries
+from   sqlalchemy import text
+
+# Modular functions
+from   modules.utils_keys   import decode_key_columns
+from   modules.utils_ragged import postgres_array_frame
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for creating an index on columns of a PostgreSQL table
+def create_index(engine, schema_name, table_name, columns, unique=False, index_name=None):
+
+    """
+    Create a (unique) B-tree index on one or more columns of a table, if it does
+    not exist yet.
+
+    Column names are quoted because the tables uploaded from the notebooks
+    keep their upper case pandas column names.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.engine.Engine
+        Engine connected to the database.
+    schema_name : str
+        Name of the PostgreSQL schema where the table resides.
+    table_name : str
+        Name of the table.
+    columns : str or list of str
+        Column(s) of the index, in order.
+    unique : bool
+        Whether to create a unique index.
+    index_name : str, optional
+        Name of the index, defaults to '<table>__<columns>__idx'.
+
+    Returns
+    -------
+    str
+        The name of the index.
+    """
+
+    columns    = [columns] if isinstance(columns, str) else list(columns)
+    index_name = index_name or f"{table_name}__{'__'.join(columns)}__idx".lower()
+
+    # Building the statement with quoted column names
+    statement = text(f"""
+                     CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name}
+                     ON {schema_name}.{table_name} ({', '.join(f'"{c}"' for c in columns)})
+                     """)
+
+    with engine.begin() as conn:
+        conn.execute(statement)
+
+    return index_name
+
+
+
+# Function for uploading a dataframe and indexing its key columns
+def upload_indexed_table(dataframe, schema_name, table_name, engine, indexes=None, unique_indexes=None, chunksize=100_000, registry=None):
+
+    """
+    Replace a table with a dataframe and create its indexes afterwards, which is
+    faster than maintaining the indexes while the rows are inserted. Ragged
+    list columns are uploaded as PostgreSQL arrays, and integer key columns
+    (and ragged lists of keys) are decoded back to uuids and codes when a key
+    registry is given.
+
+    Parameters
+    ----------
+    dataframe : pd.DataFrame
+        The rows to upload.
+    schema_name : str
+        Name of the PostgreSQL schema where the table resides.
+    table_name : str
+        Name of the table.
+    engine : sqlalchemy.engine.Engine
+        Engine connected to the database.
+    indexes : list, optional
+        Columns (or lists of columns) to index.
+    unique_indexes : list, optional
+        Columns (or lists of columns) to index as unique.
+    chunksize : int
+        Number of rows inserted per batch.
+    registry : KeyRegistry, optional
+        Registry of the int32 key columns, see `utils_keys`.
+
+    Returns
+    -------
+    list of str
+        Names of the indexes created.
+    """
+
+    if registry is not None:
+        dataframe = decode_key_columns(dataframe, registry)
+
+    dataframe, dtypes = postgres_array_frame(dataframe)
+    dataframe.to_sql(name      = table_name
+                    ,con       = engine
+                    ,schema    = schema_name
+                    ,if_exists = 'replace'
+                    ,index     = False
+                    ,chunksize = chunksize
+                    ,dtype     = dtypes or None)
+
+    created  = [create_index(engine, schema_name, table_name, columns, unique = True) for columns in unique_indexes or []]
+    created += [create_index(engine, schema_name, table_name, columns)                for columns in indexes or []]
+
+    return created
@@ -0,0 +1,330 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+
+# Data libraries
+import pyarrow         as pa
+import pyarrow.csv     as pa_csv
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Modular functions
+from   modules.utils_download      import mtgjson_base_url, download_file
+from   modules.utils_all_printings import columns__rename_cards
+from   modules.utils_set_list      import columns__rename_set_list
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for building the URL of an MTGJSON tabular file
+def mtgjson_tabular_url(file_stem, file_format='parquet'):
+
+    """
+    Build the URL of one table of MTGJSON's pre-flattened AllPrintings distribution.
+
+    Parameters
+    ----------
+    file_stem : str
+        Name of the table on the server, e.g. 'cards' or 'cardLegalities'.
+    file_format : str
+        'parquet' or 'csv'.
+
+    Returns
+    -------
+    str
+        The full URL of the file.
+    """
+
+    return f'{mtgjson_base_url}/{file_format}/{file_stem}.{file_format}'
+
+
+
+# Function for downloading the tabular files of the selected tables
+def download_tabular(folder, tables=None, file_format='parquet', session=None, progress=True):
+
+    """
+    Download MTGJSON's CSV or Parquet files for the selected `raw_data` tables,
+    verifying their checksums and keeping local copies that are still current.
+
+    Parameters
+    ----------
+    folder : str
+        Local folder for the files.
+    tables : list of str, optional
+        Keys of `tabular__tables`, defaults to all of them.
+    file_format : str
+        'parquet' or 'csv'.
+    session : requests.Session, optional
+        Session used for the requests.
+    progress : bool
+        Whether to show a progress bar per file.
+
+    Returns
+    -------
+    dict
+        Local path per table name.
+    """
+
+    paths = {}
+    for table_name in tables or list(tabular__tables):
+        file_stem         = tabular__tables[table_name]
+        paths[table_name] = download_file(mtgjson_tabular_url(file_stem, file_format)
+                                         ,os.path.join(folder, f'{file_stem}.{file_format}')
+                                         ,session         = session
+                                         ,progress        = progress
+                                         ,only_if_changed = True)
+
+    return paths
+
+
+
+# Function for reading a tabular file with the multithreaded Arrow readers
+def read_tabular(path):
+
+    """
+    Read an MTGJSON CSV or Parquet file into an Arrow table.
+
+    Parameters
+    ----------
+    path : str
+        Path of a .csv or .parquet file.
+
+    Returns
+    -------
+    pyarrow.Table
+        The table with the column types stored in (or inferred from) the file.
+    """
+
+    if path.endswith('.parquet'):
+        return pq.read_table(path, use_threads = True)
+
+    return pa_csv.read_csv(path, read_options = pa_csv.ReadOptions(use_threads = True))
+
+
+
+# Function for mapping a tabular file onto the raw_data schema
+def map_tabular_table(table, columns__rename, list_columns=()):
+
+    """
+    Rename the columns of an MTGJSON tabular table with a rename registry and
+    turn its comma-separated list columns back into list columns, in Arrow.
+
+    Parameters
+    ----------
+    table : pyarrow.Table
+        Output of `read_tabular`.
+    columns__rename : dict
+        Renaming dictionary, e.g. `columns__rename_cards`.
+    list_columns : iterable of str
+        Renamed columns that MTGJSON flattens to ', ' separated strings.
+
+    Returns
+    -------
+    pd.DataFrame
+        The table in the same shape as the JSON ingest produces.
+    """
+
+    # Renaming with the registry, keeping unknown columns as they are
+    table = table.rename_columns([columns__rename.get(c, c) for c in table.column_names])
+
+    # Splitting the flattened list columns with the vectorised Arrow kernel
+    for column in list_columns:
+        if column in table.column_names and pa.types.is_string(table.schema.field(column).type):
+            index = table.column_names.index(column)
+            table = table.set_column(index, column, pc.split_pattern(table[column], ', '))
+
+    return table.to_pandas()
+
+
+
+# Function for loading the tabular distribution into raw_data shaped dataframes
+def load_tabular_printings(folder, tables=None, file_format='parquet', download=True, session=None):
+
+    """
+    Alternative AllPrintings ingest that reads MTGJSON's pre-flattened CSV or
+    Parquet tables with columnar readers instead of flattening the JSON.
+
+    Parameters
+    ----------
+    folder : str
+        Local folder for the files.
+    tables : list of str, optional
+        Keys of `tabular__tables`, defaults to all of them.
+    file_format : str
+        'parquet' or 'csv'.
+    download : bool
+        Download (or revalidate) the files first. When False the files must
+        already be in `folder`.
+    session : requests.Session, optional
+        Session used for the requests.
+
+    Returns
+    -------
+    dict
+        One dataframe per table name, e.g. 'cards', 'tokens', 'card_legalities'.
+    """
+
+    tables = tables or list(tabular__tables)
+
+    # Resolving the local files
+    if download:
+        paths = download_tabular(folder, tables, file_format, session = session)
+    else:
+        paths = {t : os.path.join(folder, f'{tabular__tables[t]}.{file_format}') for t in tables}
+
+    # Reading and mapping each table onto the raw_data schema
+    return {table_name : map_tabular_table(read_tabular(paths[table_name])
+                                          ,tabular__rename[table_name]
+                                          ,tabular__list_columns.get(table_name, ()))
+            for table_name in tables}
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# MTGJSON file stem of each raw_data table in the tabular distribution
+tabular__tables = {'cards'              : 'cards'
+                  ,'tokens'             : 'tokens'
+                  ,'sets'               : 'sets'
+                  ,'card_identifiers'   : 'cardIdentifiers'
+                  ,'card_legalities'    : 'cardLegalities'
+                  ,'card_rulings'       : 'cardRulings'
+                  ,'card_foreign_data'  : 'cardForeignData'
+                  ,'card_purchase_urls' : 'cardPurchaseUrls'
+                  ,'token_identifiers'  : 'tokenIdentifiers'
+                  ,'set_translations'   : 'setTranslations'}
+
+# List of the formats in the card legalities table
+formats__legalities = ['alchemy'
+                      ,'brawl'
+                      ,'commander'
+                      ,'duel'
+                      ,'explorer'
+                      ,'future'
+                      ,'gladiator'
+                      ,'historic'
+                      ,'historicbrawl'
+                      ,'legacy'
+                      ,'modern'
+                      ,'oathbreaker'
+                      ,'oldschool'
+                      ,'pauper'
+                      ,'paupercommander'
+                      ,'penny'
+                      ,'pioneer'
+                      ,'predh'
+                      ,'premodern'
+                      ,'standard'
+                      ,'standardbrawl'
+                      ,'timeless'
+                      ,'vintage']
+
+# Dictionary for renaming the card and token identifier columns
+columns__rename_identifiers = {'uuid'                     : 'CARD_UUID'
+                              ,'abuId'                    : 'ABU_GAMES_ID'
+                              ,'cardKingdomEtchedId'      : 'CARD_KINGDOM_ETCHED_ID'
+                              ,'cardKingdomFoilId'        : 'CARD_KINGDOM_FOIL_ID'
+                              ,'cardKingdomId'            : 'CARD_KINGDOM_ID'
+                              ,'cardsphereId'             : 'CS_CARD_ID'
+                              ,'cardsphereFoilId'         : 'CS_CARD_FOIL_ID'
+                              ,'cardtraderId'             : 'CARD_TRADER_ID'
+                              ,'csiId'                    : 'COOL_STUFF_INC_ID'
+                              ,'mcmId'                    : 'CARD_MARKET_ID'
+                              ,'mcmMetaId'                : 'CARD_MARKET_META_ID'
+                              ,'miniaturemarketId'        : 'MINIATURE_MARKET_ID'
+                              ,'mtgArenaId'               : 'MTG_ARENA_ID'
+                              ,'mtgjsonFoilVersionId'     : 'MTGJSON_FOIL_VERSION_ID'
+                              ,'mtgjsonNonFoilVersionId'  : 'MTGJSON_NON_FOIL_VERSION_ID'
+                              ,'mtgjsonV4Id'              : 'MTGJSON_V4_ID'
+                              ,'mtgoFoilId'               : 'MTGO_FOIL_ID'
+                              ,'mtgoId'                   : 'MTGO_ID'
+                              ,'multiverseId'             : 'MULTIVERSE_ID'
+                              ,'mvpId'                    : 'MVP_GAMES_ID'
+                              ,'scgId'                    : 'STAR_CITY_GAMES_ID'
+                              ,'scryfallId'               : 'SCRYFALL_ID'
+                              ,'scryfallCardBackId'       : 'SCRYFALL_CARD_BACK_ID'
+                              ,'scryfallOracleId'         : 'SCRYFALL_ORACLE_ID'
+                              ,'scryfallIllustrationId'   : 'SCRYFALL_ILLUSTRATION_ID'
+                              ,'tcgplayerProductId'       : 'TCG_PLAYER_ID'
+                              ,'tcgplayerEtchedProductId' : 'TCG_PLAYER_ETCHED_ID'
+                              ,'tntId'                    : 'TOAD_AND_TROLL_ID'}
+
+# Dictionary for renaming the card legalities columns
+columns__rename_legalities = {'uuid' : 'CARD_UUID'} | {f : f.upper() for f in formats__legalities}
+
+# Dictionary for renaming the card rulings columns
+columns__rename_rulings = {'uuid' : 'CARD_UUID'
+                          ,'date' : 'RULING_DATE'
+                          ,'text' : 'RULING_TEXT'}
+
+# Dictionary for renaming the card foreign data columns
+columns__rename_foreign_data = {'uuid'         : 'CARD_UUID'
+                               ,'language'     : 'LANGUAGE'
+                               ,'name'         : 'FOREIGN_NAME'
+                               ,'faceName'     : 'FOREIGN_FACE_NAME'
+                               ,'text'         : 'FOREIGN_TEXT'
+                               ,'type'         : 'FOREIGN_TYPE_LINE'
+                               ,'flavorText'   : 'FOREIGN_FLAVOR_TEXT'
+                               ,'multiverseId' : 'MULTIVERSE_ID'}
+
+# Dictionary for renaming the card purchase URL columns
+columns__rename_purchase_urls = {'uuid'              : 'CARD_UUID'
+                                ,'cardKingdom'       : 'PURCHASE_URL_CARD_KINGDOM'
+                                ,'cardKingdomEtched' : 'PURCHASE_URL_CARD_KINGDOM_ETCHED'
+                                ,'cardKingdomFoil'   : 'PURCHASE_URL_CARD_KINGDOM_FOIL'
+                                ,'cardmarket'        : 'PURCHASE_URL_CARD_MARKET'
+                                ,'tcgplayer'         : 'PURCHASE_URL_TCG_PLAYER'
+                                ,'tcgplayerEtched'   : 'PURCHASE_URL_TCG_PLAYER_ETCHED'}
+
+# Dictionary for renaming the set name translations columns
+columns__rename_set_translations = {'code'        : 'SET_CODE'
+                                   ,'language'    : 'LANGUAGE'
+                                   ,'translation' : 'TRANSLATION'}
+
+# Rename registry used for each table
+tabular__rename = {'cards'              : columns__rename_cards
+                  ,'tokens'             : columns__rename_cards
+                  ,'sets'               : columns__rename_set_list
+                  ,'card_identifiers'   : columns__rename_identifiers
+                  ,'card_legalities'    : columns__rename_legalities
+                  ,'card_rulings'       : columns__rename_rulings
+                  ,'card_foreign_data'  : columns__rename_foreign_data
+                  ,'card_purchase_urls' : columns__rename_purchase_urls
+                  ,'token_identifiers'  : columns__rename_identifiers
+                  ,'set_translations'   : columns__rename_set_translations}
+
+# Columns MTGJSON stores as ', ' separated strings in the tabular files
+columns__list_cards = ['ARTIST_IDS'
+                      ,'ATTRACTION_LIGHTS'
+                      ,'AVAILABILITY'
+                      ,'BOOSTER_TYPES'
+                      ,'COLORS'
+                      ,'COLOR_IDENTITY'
+                      ,'COLOR_INDICATOR'
+                      ,'FINISHES'
+                      ,'FRAME_EFFECTS'
+                      ,'KEYWORDS'
+                      ,'ORIGINAL_PRINTINGS'
+                      ,'OTHER_FACE_IDS'
+                      ,'PRINTINGS'
+                      ,'PRODUCED_MANA'
+                      ,'PROMO_TYPES'
+                      ,'REBALANCED_PRINTINGS'
+                      ,'SUBSETS'
+                      ,'SUBTYPES'
+                      ,'SUPERTYPES'
+                      ,'TYPES'
+                      ,'VARIATIONS']
+
+# List columns of each table
+tabular__list_columns = {'cards'  : columns__list_cards
+                        ,'tokens' : columns__list_cards + ['REVERSE_RELATED']
+                        ,'sets'   : ['LANGUAGES']}
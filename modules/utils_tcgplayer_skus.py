@@ -0,0 +1,286 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+from   array import array
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_download import mtgjson_url
+from   modules.utils_pipeline import stream_mtgjson
+from   modules.utils_sql      import upload_indexed_table
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Dictionary for renaming the SKU attributes
+columns__rename_skus = {'skuId'     : 'SKU_ID'
+                       ,'productId' : 'PRODUCT_ID'
+                       ,'condition' : 'CONDITION'
+                       ,'language'  : 'LANGUAGE'
+                       ,'printing'  : 'PRINTING'
+                       ,'finish'    : 'FINISH'}
+
+# Low cardinality SKU attributes stored as categoricals
+columns__sku_categories = ['condition'
+                          ,'language'
+                          ,'printing'
+                          ,'finish']
+
+# Columns of the SKU table, in order
+columns__tcgplayer_skus = ['MTGJSON_UUID'
+                          ,'SKU_ID'
+                          ,'PRODUCT_ID'
+                          ,'CONDITION'
+                          ,'LANGUAGE'
+                          ,'PRINTING'
+                          ,'FINISH']
+
+# Columns of the SKU table that can be indexed for joins
+columns__sku_keys = ['MTGJSON_UUID'
+                    ,'SKU_ID'
+                    ,'PRODUCT_ID']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for streaming TcgplayerSkus into a normalised SKU table
+def ingest_tcgplayer_skus(source=None, cache_path=None, session=None):
+
+    """
+    Stream TcgplayerSkus into one row per SKU.
+
+    The file maps every card and sealed product uuid to its TCGplayer SKUs. The
+    uuids and the condition, language, printing and finish strings are interned
+    to integer codes and the ids are appended to typed arrays while the file
+    streams, so millions of SKUs never exist as Python dictionaries at once.
+
+    Parameters
+    ----------
+    source : str, optional
+        URL or local path of TcgplayerSkus.json.xz, defaults to the MTGJSON server.
+    cache_path : str, optional
+        Local copy of the compressed file, see `stream_mtgjson`.
+    session : requests.Session, optional
+        Session used for the requests.
+
+    Returns
+    -------
+    tuple of (dict, pd.DataFrame)
+        The 'meta' of the file (for `data_recency_check`) and the SKU table
+        with the columns of `columns__tcgplayer_skus`, sorted by SKU_ID. The
+        uuid and attribute columns are categoricals.
+    """
+
+    source = source or mtgjson_url('TcgplayerSkus.json.xz')
+
+    # Interned values of the categorical columns and the typed arrays of codes and ids
+    interned = {name : {} for name in ['uuid'] + columns__sku_categories}
+    codes    = {name : array('i') for name in interned}
+    ids      = {name : array('q') for name in ['skuId', 'productId']}
+
+    # Appending every SKU of a card or sealed product
+    def on_item(mtgjson_uuid, skus):
+        uuid_code = interned['uuid'].setdefault(mtgjson_uuid, len(interned['uuid']))
+        for sku in skus:
+            codes['uuid'].append(uuid_code)
+            for name in columns__sku_categories:
+                value = sku.get(name)
+                codes[name].append(-1 if value is None else interned[name].setdefault(value, len(interned[name])))
+            for name in ids:
+                value = sku.get(name)
+                ids[name].append(-1 if value is None else int(value))
+
+    top, _ = stream_mtgjson(source
+                           ,on_item    = on_item
+                           ,cache_path = cache_path
+                           ,session    = session)
+
+    # Building the columns from the arrays without copying them through Python objects
+    columns = {'MTGJSON_UUID' : pd.Categorical.from_codes(np.frombuffer(codes['uuid'], dtype = np.int32), categories = list(interned['uuid']))}
+    for name in ids:
+        values = np.frombuffer(ids[name], dtype = np.int64)
+        columns[columns__rename_skus[name]] = pd.arrays.IntegerArray(values.copy(), values == -1)
+    for name in columns__sku_categories:
+        columns[columns__rename_skus[name]] = pd.Categorical.from_codes(np.frombuffer(codes[name], dtype = np.int32), categories = list(interned[name]))
+
+    df_skus = pd.DataFrame(columns)[columns__tcgplayer_skus]
+    df_skus = df_skus.sort_values('SKU_ID', kind = 'stable').reset_index(drop = True)
+
+    return top, df_skus
+
+
+
+# Function for converting join keys into the integer keys of an SKU index
+def _sku_keys(df_skus, column, values):
+
+    """
+    Convert values of an SKU key column into int64 keys: the categorical codes
+    for MTGJSON_UUID (-1 for unknown uuids) and the ids themselves otherwise
+    (-1 for missing ids).
+    """
+
+    if column == 'MTGJSON_UUID':
+        return df_skus[column].cat.categories.get_indexer(pd.Index(values, dtype = object)).astype(np.int64)
+
+    return pd.array(values, dtype = 'Int64').fillna(-1).to_numpy(dtype = np.int64)
+
+
+
+# Function for building a sorted index on a key column of the SKU table
+def build_sku_index(df_skus, column):
+
+    """
+    Sort a key column of the SKU table once so it can be joined many times with
+    binary searches instead of rebuilding a hash table per join.
+
+    Parameters
+    ----------
+    df_skus : pd.DataFrame
+        Output of `ingest_tcgplayer_skus`.
+    column : str
+        One of `columns__sku_keys`.
+
+    Returns
+    -------
+    dict
+        'column', the sorted int64 'keys' and the 'order' of the rows they
+        come from.
+
+    Raises
+    ------
+    ValueError
+        If the column is not a key of the SKU table.
+    """
+
+    if column not in columns__sku_keys:
+        raise ValueError(f"Cannot index '{column}', expected one of {columns__sku_keys}")
+
+    # Categorical codes are already integers, missing ids sort first as -1
+    keys  = df_skus[column].cat.codes.to_numpy(dtype = np.int64) if column == 'MTGJSON_UUID' else _sku_keys(df_skus, column, df_skus[column])
+    order = np.argsort(keys, kind = 'stable')
+
+    return {'column' : column
+           ,'keys'   : keys[order]
+           ,'order'  : order}
+
+
+
+# Function for attaching SKUs to cards or sealed products in bulk
+def attach_skus(df, df_skus, left_on, right_on='MTGJSON_UUID', how='inner', index=None, suffix='_SKU'):
+
+    """
+    Join the SKUs onto a table of cards or sealed products with vectorised
+    binary searches on a sorted SKU key.
+
+    Cards join on their uuid (`left_on='CARD_UUID'`), sealed products on their
+    uuid (`left_on='PRODUCT_UUID'`) or on TCGplayer product id
+    (`left_on='TCG_PLAYER_ID', right_on='PRODUCT_ID'`).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Left table, e.g. the cards table or `df__set_product_info`.
+    df_skus : pd.DataFrame
+        Output of `ingest_tcgplayer_skus`.
+    left_on : str
+        Key column of the left table.
+    right_on : str
+        Key column of the SKU table, one of `columns__sku_keys`.
+    how : str
+        'inner' drops left rows without SKUs, 'left' keeps them with <NA> SKUs.
+    index : dict, optional
+        Output of `build_sku_index` for `right_on`, reused across joins.
+    suffix : str
+        Appended to SKU columns whose names already exist in the left table
+        (e.g. LANGUAGE), so neither side is silently dropped.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per left row and matching SKU, in left order, with the SKU
+        columns (other than the key) appended.
+
+    Raises
+    ------
+    ValueError
+        If `how` is not 'inner' or 'left', or a suffixed SKU column still
+        collides with a column of the left table.
+    """
+
+    if how not in ('inner', 'left'):
+        raise ValueError(f"Unsupported join '{how}', expected 'inner' or 'left'")
+
+    index = index if index is not None and index['column'] == right_on else build_sku_index(df_skus, right_on)
+
+    # Every match of a key lies between its left and right insertion points, -1 never matches
+    queries = _sku_keys(df_skus, right_on, df[left_on])
+    lower   = np.searchsorted(index['keys'], queries, side = 'left')
+    upper   = np.searchsorted(index['keys'], queries, side = 'right')
+    counts  = np.where(queries == -1, 0, upper - lower)
+
+    # Keeping unmatched rows once for a left join
+    repeats = np.maximum(counts, 1) if how == 'left' else counts
+    rows    = np.repeat(np.arange(len(df)), repeats)
+    offsets = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    matched = np.repeat(counts > 0, repeats)
+    skus    = index['order'][np.where(matched, np.repeat(lower, repeats) + offsets, 0)] if len(index['order']) else np.zeros(len(rows), dtype = np.int64)
+
+    # Suffixing the SKU columns that share a name with a column of the left table
+    names = {column : column + suffix if column in df.columns else column for column in columns__tcgplayer_skus if column != right_on}
+    clash = [name for name in names.values() if name in df.columns]
+    if clash:
+        raise ValueError(f'SKU columns {clash} already exist in the left table, pass a different suffix')
+
+    # Assembling the joined rows, blanking the SKU columns of unmatched rows
+    df_joined = df.iloc[rows].reset_index(drop = True)
+    for column, name in names.items():
+        values = df_skus[column].iloc[skus].reset_index(drop = True) if len(df_skus) else pd.Series(pd.NA, index = df_joined.index)
+        df_joined[name] = values.where(matched) if how == 'left' else values
+
+    return df_joined
+
+
+
+# Function for uploading the SKU table with its join indexes
+def upload_tcgplayer_skus(df_skus, engine, schema_name='raw_data', table_name='tcgplayer_skus'):
+
+    """
+    Upload the SKU table to PostgreSQL with a unique index on
+    (SKU_ID, MTGJSON_UUID) and indexes on SKU_ID, PRODUCT_ID and MTGJSON_UUID
+    for vendor price joins. SKU_ID alone is not unique, as the faces of a
+    double-faced card share the TCGplayer product and so its SKUs.
+
+    Parameters
+    ----------
+    df_skus : pd.DataFrame
+        Output of `ingest_tcgplayer_skus`.
+    engine : sqlalchemy.engine.Engine
+        Engine connected to the database.
+    schema_name : str
+        Name of the PostgreSQL schema.
+    table_name : str
+        Name of the table.
+
+    Returns
+    -------
+    list of str
+        Names of the indexes created.
+    """
+
+    return upload_indexed_table(df_skus
+                               ,schema_name    = schema_name
+                               ,table_name     = table_name
+                               ,engine         = engine
+                               ,indexes        = ['SKU_ID', 'PRODUCT_ID', 'MTGJSON_UUID']
+                               ,unique_indexes = [['SKU_ID', 'MTGJSON_UUID']])
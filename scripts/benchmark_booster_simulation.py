@@ -0,0 +1,174 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import sys
+import time
+import uuid
+import random
+import argparse
+
+# Data libraries
+import pandas as pd
+
+## Modular functions
+# Setting the root path for finding the modules directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# Loading Modular functions
+from   modules.utils_download import mtgjson_url
+from   modules.utils_booster  import load_boosters, simulate_boosters
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for generating synthetic booster sheets and prices
+def synthetic_boosters(sets=6, seed=0):
+
+    """
+    Generate booster sheets for `sets` sets shaped like a modern draft
+    booster: weighted common, uncommon, rare/mythic and basic land sheets,
+    and a foil sheet allowing duplicates in one pack configuration out of
+    three. Every card gets a lognormal non-foil price and a foil price
+    2.5 times higher.
+
+    The same `sets` and `seed` always give the same sheets and prices, so the
+    benchmark can be reproduced without AllPrintings.
+
+    Parameters
+    ----------
+    sets : int
+        Number of sets.
+    seed : int
+        Seed of the generator.
+
+    Returns
+    -------
+    tuple of (dict, pd.DataFrame)
+        {set code : {'default' : booster}} like `load_boosters`, and the
+        prices with CARD_UUID, PRICE and FOIL_FLAG.
+    """
+
+    rng      = random.Random(seed)
+    uids     = lambda n: [str(uuid.UUID(int = rng.getrandbits(128))) for _ in range(n)]
+    boosters = {}
+    prices   = []
+
+    for i in range(sets):
+        common, uncommon, rare, mythic, land = uids(101), uids(80), uids(53), uids(15), uids(5)
+        sheets = {'common'     : {'cards' : {x : 10 for x in common},   'foil' : False, 'totalWeight' : 10 * len(common), 'balanceColors' : True}
+                 ,'uncommon'   : {'cards' : {x : 5 for x in uncommon},  'foil' : False, 'totalWeight' : 5 * len(uncommon)}
+                 ,'rareMythic' : {'cards' : {**{x : 2 for x in rare}, **{x : 1 for x in mythic}}, 'foil' : False, 'totalWeight' : 2 * len(rare) + len(mythic)}
+                 ,'foil'       : {'cards' : {**{x : 20 for x in common}, **{x : 6 for x in uncommon}, **{x : 2 for x in rare}, **{x : 1 for x in mythic}}
+                                 ,'foil' : True, 'allowDuplicates' : True, 'totalWeight' : 0}
+                 ,'basicLand'  : {'cards' : {x : 1 for x in land},      'foil' : False, 'totalWeight' : 5}}
+        boosters[f'B{i:02d}'] = {'default' : {'boosters'            : [{'contents' : {'common' : 10, 'uncommon' : 3, 'rareMythic' : 1, 'basicLand' : 1},              'weight' : 2}
+                                                                      ,{'contents' : {'common' : 9,  'uncommon' : 3, 'rareMythic' : 1, 'foil' : 1, 'basicLand' : 1}, 'weight' : 1}]
+                                             ,'boostersTotalWeight' : 3
+                                             ,'name'                : 'Draft'
+                                             ,'sheets'              : sheets
+                                             ,'sourceSetCodes'      : []}}
+
+        # Pricing every card, the foil printing at 2.5 times the non-foil price
+        for card in common + uncommon + rare + mythic + land:
+            price   = round(rng.lognormvariate(-1.5, 1.2), 2)
+            prices += [(card, price, False), (card, round(price * 2.5, 2), True)]
+
+    return boosters, pd.DataFrame(prices, columns = ['CARD_UUID', 'PRICE', 'FOIL_FLAG'])
+
+
+
+# Function for loading the card prices or pricing every card at one
+def load_prices(path, boosters):
+
+    """
+    Load the card prices from a CSV with CARD_UUID, PRICE and optionally
+    FOIL_FLAG, or price every sheet card at 1 when no file is given, which
+    leaves the sampling work unchanged.
+
+    Parameters
+    ----------
+    path : str or None
+        Path of the prices CSV.
+    boosters : dict
+        Output of `load_boosters`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The prices.
+    """
+
+    if path:
+        return pd.read_csv(path)
+
+    uuids = {uuid for set_boosters in boosters.values() for booster in set_boosters.values()
+                  for sheet in booster['sheets'].values() for uuid in sheet['cards']}
+
+    return pd.DataFrame({'CARD_UUID' : sorted(uuids), 'PRICE' : 1.0})
+
+
+
+# Function for timing the simulation with a number of workers
+def time_simulation(boosters, df_prices, packs, workers, seed):
+
+    """
+    Simulate every set with `workers` processes.
+
+    Returns
+    -------
+    tuple of (pd.DataFrame, dict)
+        The per set summary and WORKERS, PACKS, SECONDS and PACKS_PER_SECOND.
+    """
+
+    started = time.perf_counter()
+    df      = simulate_boosters(boosters, df_prices, packs = packs, seed = seed, workers = workers)
+    seconds = time.perf_counter() - started
+
+    return df, {'WORKERS'          : workers
+               ,'PACKS'            : int(df['PACKS'].sum())
+               ,'SECONDS'          : round(seconds, 3)
+               ,'PACKS_PER_SECOND' : round(df['PACKS'].sum() / seconds)}
+
+
+
+###################################################################################################
+# --------------------------------------------- MAIN -------------------------------------------- #
+###################################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Time the Monte Carlo booster simulation in packs per second')
+    parser.add_argument('--source',    default = mtgjson_url('AllPrintings.json.xz'), help = 'URL or path of AllPrintings.json.xz')
+    parser.add_argument('--cache',     default = os.path.join(os.path.dirname(__file__), '..', 'data', 'AllPrintings.json.xz'))
+    parser.add_argument('--prices',    default = None, help = 'CSV of CARD_UUID, PRICE and optionally FOIL_FLAG')
+    parser.add_argument('--sets',      nargs = '*', default = None, help = 'Set codes, defaults to every set with boosters')
+    parser.add_argument('--packs',     type = int, default = 1_000_000, help = 'Packs opened per set')
+    parser.add_argument('--workers',   type = int, nargs = '*', default = [1, os.cpu_count() or 1])
+    parser.add_argument('--seed',      type = int, default = 0)
+    parser.add_argument('--synthetic', type = int, metavar = 'SETS', help = 'Simulate generated sheets and prices for this many sets instead of AllPrintings')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        boosters, df_prices = synthetic_boosters(args.synthetic, seed = args.seed)
+        df_prices           = load_prices(args.prices, boosters) if args.prices else df_prices
+    else:
+        boosters  = load_boosters(args.source, args.sets, cache_path = None if os.path.exists(args.source) else args.cache)
+        df_prices = load_prices(args.prices, boosters)
+    print(f'{len(boosters)} sets with boosters')
+
+    results, rows = [], []
+    for workers in dict.fromkeys(args.workers):
+        df, row = time_simulation(boosters, df_prices, args.packs, workers, args.seed)
+        results.append(df)
+        rows.append(row)
+
+    # The per set seeds make the results independent of the number of workers
+    assert all(df.equals(results[0]) for df in results), 'Simulations differ between worker counts'
+
+    print(results[0].to_string(index = False))
+    print(pd.DataFrame(rows).to_string(index = False))
@@ -0,0 +1,131 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import sys
+import time
+import argparse
+
+# Data libraries
+import pandas as pd
+
+## Modular functions
+# Setting the root path for finding the modules directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# Loading Modular functions
+from   modules.utils_all_printings import read_ndjson_table, printings_table_to_pandas
+from   modules.utils_card_search   import build_card_store, save_card_store, load_card_store, search_cards
+# Loading lists and dictionaries
+from   modules.utils_all_printings import columns__rename_cards
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Queries timed by default, from single bitset tests to mixed phrase searches
+benchmark_queries = ['c:r'
+                    ,'t:creature mv<=3'
+                    ,'f:modern r:rare'
+                    ,'id<=wu t:instant'
+                    ,'o:flying'
+                    ,'o:"draw a card"'
+                    ,'c:r t:creature mv<=3 o:"draw a card" f:modern r:rare'
+                    ,'c:r t:creature mv<=3 o:"draw a card" f:modern r:rare set:LEA'
+                    ,'(t:instant or t:sorcery) -c:r o:"target creature"'
+                    ,'t:goblin pow>=2 f:pauper']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for loading or building the card store
+def load_store(cards_path, store_path):
+
+    """
+    Load the cached card store, building and caching it from the cards NDJSON
+    when missing.
+
+    Parameters
+    ----------
+    cards_path : str
+        Path of AllPrintings.cards.ndjson, see `write_printings_ndjson`.
+    store_path : str
+        Path of the cached .npz card store.
+
+    Returns
+    -------
+    tuple of (dict, float)
+        The card store and the seconds spent loading or building it.
+    """
+
+    started = time.perf_counter()
+    if os.path.exists(store_path):
+        return load_card_store(store_path), time.perf_counter() - started
+
+    df_cards = printings_table_to_pandas(read_ndjson_table(cards_path), columns__rename_cards)
+    store    = build_card_store(df_cards)
+    save_card_store(store, store_path)
+
+    return store, time.perf_counter() - started
+
+
+
+# Function for timing the queries
+def time_queries(store, queries, repeats):
+
+    """
+    Time every query, keeping the best of `repeats` runs after a warm-up run.
+
+    Parameters
+    ----------
+    store : dict
+        Card store.
+    queries : list of str
+        Queries to time.
+    repeats : int
+        Runs per query.
+
+    Returns
+    -------
+    pd.DataFrame
+        QUERY, MATCHES and MILLISECONDS.
+    """
+
+    rows = []
+    for query in queries:
+        matches = len(search_cards(store, query))
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            search_cards(store, query)
+            timings.append(time.perf_counter() - started)
+        rows.append({'QUERY'        : query
+                    ,'MATCHES'      : matches
+                    ,'MILLISECONDS' : round(min(timings) * 1000, 3)})
+
+    return pd.DataFrame(rows)
+
+
+
+###################################################################################################
+# --------------------------------------------- MAIN -------------------------------------------- #
+###################################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Time Scryfall-like queries over the cached card store')
+    parser.add_argument('--cards',   default = os.path.join(os.path.dirname(__file__), '..', 'data', 'AllPrintings.cards.ndjson'))
+    parser.add_argument('--store',   default = os.path.join(os.path.dirname(__file__), '..', 'data', 'card_store.npz'))
+    parser.add_argument('--queries', nargs = '*', default = benchmark_queries)
+    parser.add_argument('--repeats', type = int, default = 20)
+    args = parser.parse_args()
+
+    store, seconds = load_store(args.cards, args.store)
+    print(f"Card store with {int(store['rows'])} rows ready in {seconds:.2f} s")
+    print(time_queries(store, args.queries, args.repeats).to_string(index = False))
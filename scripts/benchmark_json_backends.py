@@ -0,0 +1,227 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import sys
+import json
+import lzma
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+## Modular functions
+# Setting the root path for finding the modules directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# Loading Modular functions (pandas and the pipeline are imported lazily so the
+# child processes stay small and their peak RSS reflects the parse alone)
+from   modules.utils_json     import available_json_backends, get_json_backend
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Default MTGJSON files benchmarked, relative to the repository root
+default_files = ['data/SetList.json.xz'
+                ,'data/Keywords.json.xz'
+                ,'data/AllPrintings.json.xz']
+
+# Columns of the benchmark results
+columns__benchmark = ['FILE'
+                     ,'BACKEND'
+                     ,'SIZE_MB'
+                     ,'BEST_SECONDS'
+                     ,'MB_PER_SECOND'
+                     ,'PEAK_RSS_MB']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for reading the decompressed bytes of a file, optionally keeping only the first sets
+def read_sample(path, sample_items=None):
+
+    """
+    Decompress an MTGJSON .json.xz file, keeping only the first `sample_items`
+    items of its 'data' value when given (e.g. an AllPrintings sample).
+
+    Parameters
+    ----------
+    path : str
+        Path of the .json.xz file.
+    sample_items : int, optional
+        Number of 'data' items to keep.
+
+    Returns
+    -------
+    bytes
+        The decompressed (and possibly sampled) JSON document.
+    """
+
+    from modules.utils_pipeline import iter_json_items
+
+    with lzma.open(path, 'rb') as f:
+        if sample_items is None:
+            return f.read()
+
+        # Streaming only as many items as needed
+        top, data = {}, {}
+        for key, value in iter_json_items(iter(lambda: f.read(1024 * 1024), b''), top = top):
+            data[key] = value
+            if len(data) >= sample_items:
+                break
+
+    return json.dumps({**top, 'data' : data}).encode()
+
+
+
+# Function for reading the peak resident set size of the current process
+def peak_rss_kb():
+
+    """
+    Return the peak resident set size of the current process in kilobytes.
+
+    VmHWM is used where /proc is available because ru_maxrss keeps the peak of
+    the parent process across fork and exec on Linux.
+    """
+
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024 if sys.platform == 'darwin' else maxrss
+
+
+
+# Function for timing one backend on one file in the current process
+def run_single(path, backend, repeats):
+
+    """
+    Parse an uncompressed JSON file with one backend and report the best time
+    and the peak RSS added by parsing.
+
+    Runs in its own process (see `run_benchmark`) so the peak RSS of one backend
+    does not leak into the next, and reads a plain file so decompression does not
+    raise the baseline.
+
+    Returns
+    -------
+    dict
+        BACKEND, SIZE_MB, BEST_SECONDS, MB_PER_SECOND and PEAK_RSS_MB.
+    """
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    name, loads   = get_json_backend(backend)
+    baseline_kb   = peak_rss_kb()
+
+    # Keeping the best of several runs
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        parsed  = loads(data)
+        timings.append(time.perf_counter() - started)
+        del parsed
+
+    peak_kb = peak_rss_kb()
+
+    return {'BACKEND'       : name
+           ,'SIZE_MB'       : len(data) / 1024 ** 2
+           ,'BEST_SECONDS'  : min(timings)
+           ,'MB_PER_SECOND' : len(data) / 1024 ** 2 / min(timings)
+           ,'PEAK_RSS_MB'   : (peak_kb - baseline_kb) / 1024}
+
+
+
+# Function for benchmarking every available backend on every file
+def run_benchmark(paths, backends=None, repeats=3, sample_items=None):
+
+    """
+    Benchmark JSON backends on MTGJSON files, one subprocess per file and backend.
+
+    Parameters
+    ----------
+    paths : list of str
+        Paths of .json.xz files, e.g. SetList, Keywords and AllPrintings.
+    backends : list of str, optional
+        Backends to compare, defaults to every installed backend.
+    repeats : int
+        Number of timed parses per file and backend.
+    sample_items : int, optional
+        Number of 'data' items kept from AllPrintings, to benchmark a sample.
+
+    Returns
+    -------
+    pd.DataFrame
+        The `columns__benchmark` of every file and backend, fastest first
+        within each file (empty without paths).
+    """
+
+    import pandas as pd
+
+    # Only benchmarking installed backends, rather than their fallbacks
+    available = available_json_backends()
+    backends  = [b for b in backends if b in available] if backends else available
+
+    rows = []
+    for path in paths:
+        # Sampling only AllPrintings, the other files are small
+        sample = sample_items if 'AllPrintings' in os.path.basename(path) else None
+
+        # Writing the decompressed document to a temporary file shared by the child processes
+        with tempfile.NamedTemporaryFile(suffix = '.json') as f:
+            f.write(read_sample(path, sample))
+            f.flush()
+            for backend in backends:
+                command = [sys.executable, __file__, '--single', f.name, '--backends', backend, '--repeats', str(repeats)]
+                output  = subprocess.run(command, check = True, capture_output = True, text = True).stdout
+                rows.append({'FILE' : os.path.basename(path), **json.loads(output.strip().splitlines()[-1])})
+
+    return pd.DataFrame(rows, columns = columns__benchmark).sort_values(['FILE', 'BEST_SECONDS']).reset_index(drop = True)
+
+
+
+###################################################################################################
+# --------------------------------------------- MAIN -------------------------------------------- #
+###################################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Compare JSON backends on MTGJSON files')
+    parser.add_argument('paths',          nargs = '*', default = default_files)
+    parser.add_argument('--backends',     nargs = '*', default = None)
+    parser.add_argument('--repeats',      type  = int, default = 3)
+    parser.add_argument('--sample-items', type  = int, default = 50)
+    parser.add_argument('--single',       default = None, help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child process measuring one file and backend
+    if args.single:
+        print(json.dumps(run_single(args.single, args.backends[0], args.repeats)))
+        sys.exit(0)
+
+    # Skipping files that have not been downloaded yet
+    root  = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    paths = [p if os.path.isabs(p) else os.path.join(root, p) for p in args.paths]
+    missing = [p for p in paths if not os.path.exists(p)]
+    paths   = [p for p in paths if os.path.exists(p)]
+    if missing:
+        print('Skipping files not downloaded yet: ' + ', '.join(os.path.relpath(p, root) for p in missing))
+    if not paths:
+        print('No input files found, download them into data/ or pass their paths')
+        sys.exit(0)
+
+    print(run_benchmark(paths, args.backends, args.repeats, args.sample_items).to_string(index = False))
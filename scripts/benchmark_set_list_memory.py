@@ -0,0 +1,565 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import sys
+import time
+import uuid
+import random
+import argparse
+import tracemalloc
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+## Modular functions
+# Setting the root path for finding the modules directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# Loading Modular functions
+from   modules.utils_download import mtgjson_url, download_file, load_json_xz
+from   modules.utils_set_list import extract_purchase_urls, set_list_tables
+# Loading lists and dictionaries
+from   modules.utils_set_list import columns__rename_set_list,   columns__sets_info,            columns__rename_set_decks\
+                                    ,columns__set_deck_info,     columns__relational_columns,   columns__display_commanders\
+                                    ,columns__set_decks_cards,   columns__set_decks_side_board, columns__set_decks_planes\
+                                    ,columns__set_decks_schemes, columns__rename_product_info,  columns__set_product_info
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Languages a synthetic set can be printed in
+synthetic__languages = ['English', 'Spanish', 'French', 'German', 'Italian', 'Portuguese (Brazil)', 'Japanese'
+                       ,'Korean', 'Russian', 'Chinese Simplified', 'Chinese Traditional']
+
+# Languages of the synthetic set name translations
+synthetic__translations = ['Chinese Simplified', 'Chinese Traditional', 'French', 'German', 'Italian'
+                          ,'Japanese', 'Korean', 'Portuguese (Brazil)', 'Russian', 'Spanish']
+
+# Retailer identifiers of a synthetic sealed product
+synthetic__identifiers = ['abuId', 'cardtraderId', 'mcmId', 'tcgplayerProductId', 'tntId'
+                         ,'cardKingdomId', 'csiId', 'miniaturemarketId', 'scgId', 'mvpId']
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for generating a synthetic SetList with the shape of the real file
+def synthetic_set_list(sets=900, seed=0):
+
+    """
+    Generate the 'data' list of a SetList.json with `sets` sets, about a third
+    of them with preconstructed decks (main and side boards, commanders,
+    planes, schemes) and most with sealed products of every contents type.
+
+    The same `sets` and `seed` always give the same data, so the benchmark can
+    be reproduced without downloading the file.
+
+    Parameters
+    ----------
+    sets : int
+        Number of sets.
+    seed : int
+        Seed of the generator.
+
+    Returns
+    -------
+    list of dict
+        The 'data' list.
+    """
+
+    rng  = random.Random(seed)
+    uid  = lambda: str(uuid.UUID(int = rng.getrandbits(128)))
+    data = []
+
+    for i in range(sets):
+        code = f'S{i:03d}'
+        s    = {'baseSetSize'  : rng.randint(1, 400)
+               ,'code'         : code
+               ,'isFoilOnly'   : rng.random() < .05
+               ,'isOnlineOnly' : rng.random() < .1
+               ,'keyruneCode'  : f'K{i}'
+               ,'languages'    : rng.sample(synthetic__languages, rng.randint(0, len(synthetic__languages))) if rng.random() < .9 else []
+               ,'name'         : f'Set {i}'
+               ,'releaseDate'  : f'{1993 + i % 32}-{1 + i % 12:02d}-01'
+               ,'totalSetSize' : rng.randint(1, 500)
+               ,'type'         : rng.choice(['expansion', 'core', 'commander', 'masters', 'promo'])
+               ,'translations' : {}}
+
+        # Optional attributes, each missing from part of the sets
+        if rng.random() < .7:  s['tcgplayerGroupId'] = rng.randint(1, 3000)
+        if rng.random() < .5:  s['block']            = f'Block {i % 40}'
+        if rng.random() < .1:  s['isNonFoilOnly']    = True
+        if rng.random() < .3:  s['parentCode']       = f'S{max(0, i - 1):03d}'
+        if rng.random() < .6:  s['mcmId'], s['mcmName'] = rng.randint(1, 5000), f'MCM {i}'
+        if rng.random() < .4:  s['tokenSetCode']     = f'T{i}'
+        if rng.random() < .5:  s['cardsphereSetId']  = rng.randint(1, 2000)
+        if rng.random() < .05: s['mcmIdExtras']      = rng.randint(1, 5000)
+        if rng.random() < .3:  s['mtgoCode']         = f'M{i}'
+        if rng.random() < .05: s['isPartialPreview'] = True
+        if rng.random() < .03: s['isForeignOnly']    = True
+        for language in synthetic__translations:
+            s['translations'][language] = f'{language} {i}' if rng.random() < .6 else None
+
+        # Preconstructed decks
+        if rng.random() < .35:
+            board = lambda n: [{'count' : rng.randint(1, 4), 'uuid' : uid(), 'isFoil' : rng.random() < .1} for _ in range(n)]
+            decks = []
+            for d in range(rng.randint(1, 8)):
+                commanders = board(rng.choice([0, 1, 1, 2]))
+                decks.append({'code'               : code
+                             ,'commander'          : commanders
+                             ,'displayCommander'   : commanders[:1] if rng.random() < .5 else []
+                             ,'mainBoard'          : board(rng.randint(20, 100))
+                             ,'name'               : f'Deck {d}'
+                             ,'planes'             : board(rng.choice([0, 0, 0, 10]))
+                             ,'releaseDate'        : s['releaseDate']
+                             ,'schemes'            : board(rng.choice([0, 0, 0, 20]))
+                             ,'sealedProductUuids' : [uid()] if rng.random() < .7 else []
+                             ,'sideBoard'          : board(rng.choice([0, 0, 15]))
+                             ,'type'               : rng.choice(['Commander Deck', 'Theme Deck'])})
+            s['decks'] = decks
+
+        # Sealed products
+        if rng.random() < .6:
+            products = []
+            for p in range(rng.randint(1, 12)):
+                kind = rng.choice(['card', 'pack', 'sealed', 'deck', 'other', 'variable'])
+                if kind == 'card':
+                    contents = {'card' : [{'name' : f'C{k}', 'number' : str(k), 'set' : code.lower(), 'uuid' : uid(), 'foil' : rng.random() < .5} for k in range(rng.randint(1, 5))]}
+                elif kind == 'pack':
+                    contents = {'pack' : [{'code' : 'default', 'set' : code.lower()}]}
+                elif kind == 'sealed':
+                    contents = {'sealed' : [{'count' : rng.randint(1, 36), 'name' : 'Booster', 'set' : code.lower(), 'uuid' : uid()}]}
+                elif kind == 'deck':
+                    contents = {'deck' : [{'name' : 'Deck 0', 'set' : code.lower()}]}
+                elif kind == 'other':
+                    contents = {'other' : [{'name' : 'Dice'}]}
+                else:
+                    contents = {'variable' : [{'configs' : [{'card' : [{'uuid' : uid()}]}]}]}
+                identifiers = {k : str(rng.randint(1, 10 ** 6)) for k in synthetic__identifiers if rng.random() < .5}
+                product     = {'category'     : rng.choice(['booster_pack', 'booster_box', 'deck', 'bundle'])
+                              ,'identifiers'  : identifiers
+                              ,'name'         : f'Product {p}'
+                              ,'purchaseUrls' : {k : f'https://x/{k}/{p}' for k in ['cardKingdom', 'tcgplayer'] if rng.random() < .6}
+                              ,'releaseDate'  : s['releaseDate']
+                              ,'subtype'      : rng.choice(['default', 'set', None])
+                              ,'uuid'         : uid()
+                              ,'contents'     : contents
+                              ,'language'     : rng.choice(['English', 'Japanese'])}
+                if rng.random() < .6:
+                    product['cardCount'] = rng.randint(1, 500)
+                products.append({k : v for k, v in product.items() if v is not None})
+            s['sealedProduct'] = products
+
+        data.append(s)
+
+    return data
+
+
+
+
+# Function for building the set list tables the way the notebook did before the module functions
+def copy_set_list_tables(data):
+
+    """
+    Reference pipeline: the set_list notebook cells as they were before
+    `set_list_tables`, copying the set list and deck frames for every table and
+    mapping whole frames. Kept to check the module functions against.
+
+    Parameters
+    ----------
+    data : list of dict
+        The 'data' list of SetList.json.
+
+    Returns
+    -------
+    dict
+        Same tables as `set_list_tables`.
+    """
+
+    ## Creating the main dataframe
+    # Converting the dictionary to a flattened dataframe
+    df__set_list = pd.json_normalize(data)
+
+    # Renaming the columns
+    df__set_list = df__set_list.rename(columns = columns__rename_set_list)
+
+    # Sorting the set list by release date date and set code
+    df__set_list = df__set_list.sort_values(by = ['RELEASE_DATE', 'SET_CODE']).reset_index(drop = True)
+
+    # Reordering the columns alphabetically with the set name and code first
+    first_cols = ["SET_CODE", "SET_NAME"]
+    other_cols = sorted([c for c in df__set_list.columns if c not in first_cols])
+    df__set_list = df__set_list[first_cols + other_cols]
+
+    # Counting the number of decks per set
+    df__set_list['DECK_COUNT'] = df__set_list['SET_DECKS'].apply(lambda x: len(x) if isinstance(x, list) else 0)
+
+    # Ensuring there empty values are consistent
+    df__set_list = df__set_list.where(pd.notnull(df__set_list), np.nan)
+
+    # Making a copy of the input dataframe
+    df__sets_info = df__set_list[columns__sets_info].copy()
+
+    # Converting the flag columns to booleans
+    for col in ['NON_FOIL_FLAG', 'PREVIEW_FLAG', 'FOREIGN_FLAG']:
+        df__sets_info[col] = df__sets_info[col].where(df__sets_info[col].notna(), False).astype(bool)
+
+    # Converting ID columns to integers
+    for col in ['CM_ID', 'CM_ID_ADD', 'CS_SET_ID', 'TCGPG_ID']:
+        df__sets_info[col] = df__sets_info[col].astype('Int64')
+
+    ## Extracting the set name translations into a separate dataframe
+
+    # Creating new dataframe for the set name translations
+    columns__translations = [column for column in df__set_list.filter(like="TRANSLATION").columns]
+    df__translations      = df__set_list[['SET_CODE'] + ['SET_NAME'] + columns__translations].copy()
+
+    # Renaming the columns for the translation columns
+    df__translations.columns = df__translations.columns.str.replace("TRANSLATION_", "", regex=False)
+
+    ## Extracting the set language releases into a separate dataframe
+
+    # Making a copy of the columns into a new dataframe
+    df__languages = df__set_list[['SET_CODE','SET_NAME','RELEASE_DATE','LANGUAGES']].copy()
+    df__languages['LANGUAGES'] = df__languages['LANGUAGES'].apply(lambda x: x if isinstance(x, list) and x else ['__NONE__'])
+
+    # Converting the languages column into a dataframe
+    df__languages = df__languages.explode('LANGUAGES')
+    df__languages = (df__languages.assign(value=True).pivot_table(index      = ['SET_CODE','SET_NAME','RELEASE_DATE']
+                                                                 ,columns    = 'LANGUAGES'
+                                                                 ,values     = 'value'
+                                                                 ,fill_value = False).astype(bool).reset_index())
+
+    # Drop the empty column
+    df__languages = df__languages.drop(columns = ['__NONE__'])
+
+    # Fixing the column names
+    df__languages.columns = df__languages.columns.str.upper()
+    df__languages.columns = df__languages.columns.str.replace(' ','_')
+    df__languages = df__languages.rename(columns = {'PORTUGUESE_(BRAZIL)' : 'BRAZILIAN_PORTUGUESE'})
+    df__languages.columns.name = None
+
+    # Reordering the dataframe by release date
+    df__languages = df__languages.sort_values(by = 'RELEASE_DATE').drop(columns = ['RELEASE_DATE']).reset_index(drop = True)
+
+    # Copying the ID and deck data from the input set table
+    df__set_decks = df__set_list[['SET_CODE','SET_NAME','SET_DECKS']].copy()
+
+    # Reordering the columns
+    df__set_decks = df__set_decks[['SET_CODE'
+                                  ,'SET_NAME'
+                                  ,'SET_DECKS']]
+
+    # Replacing the NaN rows in the deck column with empty lists so pd.explode works
+    df__set_decks['SET_DECKS'] = df__set_decks['SET_DECKS'].apply(lambda x: x if isinstance(x, list) else [])
+
+    # Exploding the deck lists into individual rows of dictionaries
+    df__set_decks = df__set_decks.explode('SET_DECKS', ignore_index=True)
+
+    # Expand the deck dictionary into separate columns
+    df__set_decks = pd.concat([df__set_decks.drop(columns='SET_DECKS')
+                              ,pd.json_normalize(df__set_decks['SET_DECKS'])]
+                             ,axis = 1)
+
+    # Dropping duplicate column
+    df__set_decks = df__set_decks.drop(columns = ['code'])
+
+    # Renaming the new columns
+    df__set_decks = df__set_decks.rename(columns__rename_set_decks
+                                        ,axis = 1)
+
+    # Replacing the empty lists with NaN
+    df__set_decks = df__set_decks.map(lambda x: np.nan if isinstance(x, list) and len(x) == 0 else x)
+
+    # Counting the number of display commanders
+    df__set_decks['DISPLAY_COMMANDER_COUNT'] = df__set_decks['DISPLAY_COMMANDER'].apply(lambda x: len(x) if isinstance(x, list) else 0)
+
+    # Ensuring there empty values are consistent
+    df__set_decks = df__set_decks.where(pd.notnull(df__set_decks), np.nan)
+
+    # Copying the decks source table and keeping key columns
+    df__set_decks_info = df__set_decks[columns__set_deck_info + columns__relational_columns].copy()
+
+    # Looping through the relational tables for total counts
+    for relational_col in columns__relational_columns:
+        # Replacing the NaN rows in the column with empty lists so the total sizes can be counted
+        df__set_decks_info[relational_col] = df__set_decks_info[relational_col].apply(lambda x: x if isinstance(x, list) else [])
+        # Counting the totals
+        df__set_decks_info[f'{relational_col}_COUNT'] = df__set_decks_info[relational_col].apply(lambda cards: sum(d.get('count', 0) for d in cards))
+
+    # Only keep rows where COMMANDER is not null
+    df__commanders = df__set_decks_info.loc[~df__set_decks['COMMANDER'].isna(), 'COMMANDER']
+
+    # Separate the main commander and partner commanders into seperate columns
+    commander_uuids = pd.DataFrame(df__commanders.apply(lambda x: [c['uuid'] for c in x] + [None]*(2-len(x))).tolist()
+                                  ,columns = ['COMMANDER_1', 'COMMANDER_2']
+                                  ,index   = df__commanders.index)
+
+    # Merge commanders back into the main dataframe
+    df__set_decks_info[['COMMANDER', 'PARTNER']] = commander_uuids
+
+    # Create a flag whether there is a commander partner
+    df__set_decks_info['PARTNER_FLAG'] = df__set_decks_info['PARTNER'].notna()
+
+    # Extracting the product IDs
+    df__set_decks_info['SEALED_PRODUCT_IDS'] = df__set_decks_info['SEALED_PRODUCT_IDS'].apply(lambda x: x[0] if isinstance(x, list) else x)
+
+    # Reorganise the column order
+    df__set_decks_info = df__set_decks_info[columns__set_deck_info[:-1]
+                                         + ['PARTNER']
+                                         + [col + '_COUNT' for col in columns__relational_columns]
+                                         + ['SEALED_PRODUCT_IDS']]
+
+    # Copying the display commanders from the set decks
+    df__display_commanders = df__set_decks[columns__display_commanders].copy()
+
+    # Replacing NaN values with empty lists for pd.explode
+    df__display_commanders['DISPLAY_COMMANDER'] = df__display_commanders['DISPLAY_COMMANDER'].apply(lambda x: x if isinstance(x, list) else [])
+
+    # Exploding the display commander lists into individual rows of dictionaries
+    df__display_commanders = df__display_commanders.explode('DISPLAY_COMMANDER', ignore_index=True)
+
+    # Extracting the uuid from the diplay commander dictionary
+    df__display_commanders['DISPLAY_COMMANDER'] = df__display_commanders['DISPLAY_COMMANDER'].apply(lambda x: x.get('uuid') if isinstance(x, dict) else np.nan)
+
+    # Copying the decks source table and keeping key columns
+    df__set_decks_cards = df__set_decks[columns__set_decks_cards].copy()
+
+    # Replacing NaN values with empty lists for pd.explode
+    df__set_decks_cards['DECK_CARDS'] = df__set_decks_cards['DECK_CARDS'].apply(lambda x: x if isinstance(x, list) else [])
+
+    # Exploding the deck cards lists into individual rows of card dictionaries
+    df__set_decks_cards = df__set_decks_cards.explode('DECK_CARDS', ignore_index=True)
+
+    # Extracting the count & uuid from the card dictionary
+    df__set_decks_cards['CARD_COUNT'] = df__set_decks_cards['DECK_CARDS'].apply(lambda x: x.get('count') if isinstance(x, dict) else np.nan)
+    df__set_decks_cards['CARD']       = df__set_decks_cards['DECK_CARDS'].apply(lambda x: x.get('uuid') if isinstance(x, dict) else np.nan)
+
+    # Dropping the dictionary column
+    df__set_decks_cards.drop(columns = 'DECK_CARDS'
+                            ,inplace = True)
+
+    # Converting the card count column to integer
+    df__set_decks_cards['CARD_COUNT'] = df__set_decks_cards['CARD_COUNT'].astype('Int64')
+
+    # Copying the decks source table and keeping key columns
+    df__set_decks_side_board = df__set_decks[columns__set_decks_side_board].copy()
+
+    # Replacing NaN values with empty lists for pd.explode
+    df__set_decks_side_board['SIDE_BOARD_CARDS'] = df__set_decks_side_board['SIDE_BOARD_CARDS'].apply(lambda x: x if isinstance(x, list) else [])
+
+    # Exploding the deck cards lists into individual rows of card dictionaries
+    df__set_decks_side_board = df__set_decks_side_board.explode('SIDE_BOARD_CARDS', ignore_index=True)
+
+    # Extracting the count & uuid from the card dictionary
+    df__set_decks_side_board['CARD_COUNT'] = df__set_decks_side_board['SIDE_BOARD_CARDS'].apply(lambda x: x.get('count') if isinstance(x, dict) else np.nan)
+    df__set_decks_side_board['SIDE_BOARD_CARD'] = df__set_decks_side_board['SIDE_BOARD_CARDS'].apply(lambda x: x.get('uuid') if isinstance(x, dict) else np.nan)
+
+    # Dropping the dictionary column
+    df__set_decks_side_board.drop(columns = 'SIDE_BOARD_CARDS'
+                                 ,inplace = True)
+
+    # Converting the card count column to integer
+    df__set_decks_side_board['CARD_COUNT'] = df__set_decks_side_board['CARD_COUNT'].astype('Int64')
+
+    # Copying the decks source table and keeping key columns
+    df__set_decks_planes = df__set_decks[columns__set_decks_planes].copy()
+
+    # Replacing NaN values with empty lists for pd.explode
+    df__set_decks_planes['PLANES'] = df__set_decks_planes['PLANES'].apply(lambda x: x if isinstance(x, list) else [])
+
+    # Exploding the deck planes lists into individual rows of card dictionaries
+    df__set_decks_planes = df__set_decks_planes.explode('PLANES', ignore_index=True)
+
+    # Extracting the count & uuid from the planes dictionary
+    df__set_decks_planes['PLANE_COUNT'] = df__set_decks_planes['PLANES'].apply(lambda x: x.get('count') if isinstance(x, dict) else np.nan)
+    df__set_decks_planes['PLANE']       = df__set_decks_planes['PLANES'].apply(lambda x: x.get('uuid') if isinstance(x, dict) else np.nan)
+
+    # Dropping the dictionary column
+    df__set_decks_planes.drop(columns = 'PLANES'
+                            ,inplace = True)
+
+    # Converting the planes count column to integer
+    df__set_decks_planes['PLANE_COUNT'] = df__set_decks_planes['PLANE_COUNT'].astype('Int64')
+
+    # Copying the decks source table and keeping key columns
+    df__set_decks_schemes = df__set_decks[columns__set_decks_schemes].copy()
+
+    # Replacing NaN values with empty lists for pd.explode
+    df__set_decks_schemes['SCHEMES'] = df__set_decks_schemes['SCHEMES'].apply(lambda x: x if isinstance(x, list) else [])
+
+    # Exploding the deck planes lists into individual rows of card dictionaries
+    df__set_decks_schemes = df__set_decks_schemes.explode('SCHEMES', ignore_index=True)
+
+    # Extracting the count & uuid from the planes dictionary
+    df__set_decks_schemes['SCHEME_COUNT'] = df__set_decks_schemes['SCHEMES'].apply(lambda x: x.get('count') if isinstance(x, dict) else np.nan)
+    df__set_decks_schemes['SCHEME']       = df__set_decks_schemes['SCHEMES'].apply(lambda x: x.get('uuid') if isinstance(x, dict) else np.nan)
+
+    # Dropping the dictionary column
+    df__set_decks_schemes.drop(columns = 'SCHEMES'
+                              ,inplace = True)
+
+    # Converting the planes count column to integer
+    df__set_decks_schemes['SCHEME_COUNT'] = df__set_decks_schemes['SCHEME_COUNT'].astype('Int64')
+
+    # Making a copy of the relevant columns from the set product info table
+    df__set_product_info = df__set_list[['SET_CODE','SET_NAME','PRODUCT_INFO']].copy()
+
+    # Replacing all NaN values in product info with empty lists for df.explode to work
+    df__set_product_info['PRODUCT_INFO'] = df__set_product_info['PRODUCT_INFO'].apply(lambda x: x if isinstance(x, list) else [])
+    # Creating new rows for the listed dictionaries
+    df__set_product_info = df__set_product_info.explode('PRODUCT_INFO'
+                                                       ,ignore_index = True)
+
+    # Replacing all NaN values in product info with empty dictionaries for json_normalize to work
+    df__set_product_info['PRODUCT_INFO'] = df__set_product_info['PRODUCT_INFO'].apply(lambda x: x if isinstance(x, dict) else {})
+    # Creating a dataframe from the dictionaries and joining back onto the main table
+    df__set_product_info = df__set_product_info.join(pd.json_normalize(df__set_product_info["PRODUCT_INFO"]
+                                                                      ,max_level = 0))
+
+
+    # Replacing empty values with 0 and converting the column to integer
+    df__set_product_info['cardCount'] = df__set_product_info['cardCount'].fillna(0).astype('int64')
+
+    # Flattening the purchase urls into separate columns
+    df__set_product_info[['PURCHASE_URL_CARD_KINGDOM','PURCHASE_URL_TCG_PLAYER']] = df__set_product_info['purchaseUrls'].apply(extract_purchase_urls)
+
+    # Creating a dataframe from the identifiers dictionary
+    df__set_product_info = df__set_product_info.join(pd.json_normalize(df__set_product_info['identifiers']))
+
+    # Extracting the dictionary key as the type of product
+    df__set_product_info['CONTENTS_TYPE'] = df__set_product_info['contents'].apply(lambda x: list(x.keys())[0] if isinstance(x, dict) else {})
+    # Extracting the values as the product content
+    df__set_product_info['contents'] = df__set_product_info['contents'].apply(lambda x: list(x.values())[0] if isinstance(x, dict) else {})
+    # Creating new rows for the listed dictionaries
+    df__set_product_info = df__set_product_info.explode('contents'
+                                                       ,ignore_index = True)
+    # Creating a dataframe from the contents dictionary and joining back onto the main table
+    df__set_product_info = df__set_product_info.join(pd.json_normalize(df__set_product_info['contents']).add_prefix('contents_'))
+
+    # Dropping the source dictionary columns and unneeded columns
+    df__set_product_info.drop(columns = ['PRODUCT_INFO'
+                                        ,'contents'
+                                        ,'purchaseUrls'
+                                        ,'identifiers'
+                                        ,'contents_configs'
+                                        ,'contents_set'
+                                        ,'contents_foil']
+                             ,inplace = True)
+
+    # Replacing any empty dicts or lists with NaN
+    df__set_product_info = df__set_product_info.map(lambda x: np.nan if isinstance(x, (dict, list)) and len(x) == 0 else x)
+
+    # Setting the contents_count and relevant ID columns to integer
+    df__set_product_info['contents_count'] = df__set_product_info['contents_count'].fillna(0).astype('Int64')
+    for col in ['abuId','cardtraderId','mcmId','tcgplayerProductId','tntId','cardKingdomId','csiId','miniaturemarketId']:
+        df__set_product_info[col] = df__set_product_info[col].replace({np.nan: pd.NA}).astype('Int64')
+
+    # Renaming the columns
+    df__set_product_info = df__set_product_info.rename(columns__rename_product_info
+                                                      ,axis = 1)
+
+    # Reordering the columns
+    df__set_product_info = df__set_product_info[columns__set_product_info]
+
+    return {'sets_info'            : df__sets_info
+           ,'translations'         : df__translations
+           ,'languages'            : df__languages
+           ,'set_decks_info'       : df__set_decks_info
+           ,'display_commanders'   : df__display_commanders
+           ,'set_decks_cards'      : df__set_decks_cards
+           ,'set_decks_side_board' : df__set_decks_side_board
+           ,'set_decks_planes'     : df__set_decks_planes
+           ,'set_decks_schemes'    : df__set_decks_schemes
+           ,'set_product_info'     : df__set_product_info}
+
+
+
+# Function for measuring the peak memory and time of a pipeline
+def measure(pipeline, data):
+
+    """
+    Run a pipeline under tracemalloc.
+
+    Parameters
+    ----------
+    pipeline : callable
+        `copy_set_list_tables` or `set_list_tables`.
+    data : list of dict
+        The 'data' list of SetList.json.
+
+    Returns
+    -------
+    tuple of (dict, dict)
+        The tables and PIPELINE, PEAK_MB, SECONDS.
+    """
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    tables  = pipeline(data)
+    seconds = time.perf_counter() - started
+    peak    = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return tables, {'PIPELINE' : pipeline.__name__
+                   ,'PEAK_MB'  : round(peak / 1e6, 2)
+                   ,'SECONDS'  : round(seconds, 3)}
+
+
+
+# Function for checking two sets of tables are identical
+def assert_identical(expected, actual):
+
+    """
+    Assert every table has the same columns, dtypes, index and values.
+
+    Raises
+    ------
+    AssertionError
+        Naming the first table that differs.
+    """
+
+    assert expected.keys() == actual.keys(), f'Tables differ: {sorted(expected)} != {sorted(actual)}'
+    for name, df in expected.items():
+        try:
+            pd.testing.assert_frame_equal(df, actual[name], check_exact = True)
+        except AssertionError as error:
+            raise AssertionError(f"Table '{name}' differs: {error}") from None
+
+
+
+###################################################################################################
+# --------------------------------------------- MAIN -------------------------------------------- #
+###################################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Compare the peak memory of the set list pipelines')
+    parser.add_argument('--path',        default = os.path.join(os.path.dirname(__file__), '..', 'data', 'SetList.json.xz'))
+    parser.add_argument('--no-download', action = 'store_true', help = 'Use the local SetList.json.xz only')
+    parser.add_argument('--synthetic',   type = int, metavar = 'SETS', help = 'Benchmark a generated SetList with this many sets instead of the file')
+    parser.add_argument('--seed',        type = int, default = 0, help = 'Seed of the synthetic SetList')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        data = synthetic_set_list(args.synthetic, seed = args.seed)
+    else:
+        if not args.no_download:
+            download_file(mtgjson_url('SetList.json.xz'), args.path, only_if_changed = True)
+        data = load_json_xz(args.path)['data']
+
+    expected, before = measure(copy_set_list_tables, data)
+    actual,   after  = measure(set_list_tables,      data)
+    assert_identical(expected, actual)
+
+    print(pd.DataFrame([before, after]).to_string(index = False))
+    print(f"Identical tables, peak memory {before['PEAK_MB'] / after['PEAK_MB']:.1f}x lower")
@@ -0,0 +1,115 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import sys
+import time
+import argparse
+
+# Data libraries
+import pandas as pd
+
+## Modular functions
+# Setting the root path for finding the modules directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# Loading Modular functions
+from   modules.utils_download      import mtgjson_url
+from   modules.utils_all_printings import write_printings_ndjson, read_ndjson_table, printings_table_to_pandas
+from   modules.utils_tabular       import load_tabular_printings
+# Loading lists and dictionaries
+from   modules.utils_all_printings import columns__rename_cards
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Function for timing the JSON ingest path
+def run_json_path(folder, source=None):
+
+    """
+    Stream AllPrintings.json.xz into the NDJSON intermediates and load the card
+    and token tables with the Arrow JSON reader.
+
+    Parameters
+    ----------
+    folder : str
+        Folder holding (or receiving) AllPrintings.json.xz and the intermediates.
+    source : str, optional
+        URL or path of AllPrintings.json.xz, defaults to the MTGJSON server with
+        the local copy used as a cache.
+
+    Returns
+    -------
+    dict
+        PATH, SECONDS, CARD_ROWS and TOKEN_ROWS.
+    """
+
+    cache_path  = os.path.join(folder, 'AllPrintings.json.xz')
+    cards_path  = os.path.join(folder, 'AllPrintings.cards.ndjson')
+    tokens_path = os.path.join(folder, 'AllPrintings.tokens.ndjson')
+
+    started = time.perf_counter()
+    write_printings_ndjson(source or mtgjson_url('AllPrintings.json.xz'), cards_path, tokens_path, cache_path = cache_path)
+    df_cards  = printings_table_to_pandas(read_ndjson_table(cards_path),  columns__rename_cards)
+    df_tokens = printings_table_to_pandas(read_ndjson_table(tokens_path), columns__rename_cards)
+
+    return {'PATH'       : 'json'
+           ,'SECONDS'    : time.perf_counter() - started
+           ,'CARD_ROWS'  : len(df_cards)
+           ,'TOKEN_ROWS' : len(df_tokens)}
+
+
+
+# Function for timing the tabular ingest path
+def run_tabular_path(folder, file_format, download):
+
+    """
+    Load the cards and tokens tables of MTGJSON's CSV or Parquet distribution.
+
+    Parameters
+    ----------
+    folder : str
+        Folder holding (or receiving) the tabular files.
+    file_format : str
+        'parquet' or 'csv'.
+    download : bool
+        Download or revalidate the files as part of the timing.
+
+    Returns
+    -------
+    dict
+        PATH, SECONDS, CARD_ROWS and TOKEN_ROWS.
+    """
+
+    started = time.perf_counter()
+    tables  = load_tabular_printings(folder, ['cards', 'tokens'], file_format, download = download)
+
+    return {'PATH'       : file_format
+           ,'SECONDS'    : time.perf_counter() - started
+           ,'CARD_ROWS'  : len(tables['cards'])
+           ,'TOKEN_ROWS' : len(tables['tokens'])}
+
+
+
+###################################################################################################
+# --------------------------------------------- MAIN -------------------------------------------- #
+###################################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Compare the JSON and tabular AllPrintings ingest end to end')
+    parser.add_argument('--folder',      default = os.path.join(os.path.dirname(__file__), '..', 'data'))
+    parser.add_argument('--source',      default = None, help = 'URL or path of AllPrintings.json.xz')
+    parser.add_argument('--formats',     nargs = '*', default = ['parquet', 'csv'])
+    parser.add_argument('--no-download', action = 'store_true', help = 'Use local tabular files only')
+    args = parser.parse_args()
+
+    rows = [run_json_path(args.folder, args.source)]
+    for file_format in args.formats:
+        rows.append(run_tabular_path(args.folder, file_format, not args.no_download))
+
+    print(pd.DataFrame(rows).sort_values('SECONDS').to_string(index = False))
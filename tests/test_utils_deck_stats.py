@@ -0,0 +1,88 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Testing libraries
+import pytest
+
+# Modular functions
+from   modules.utils_deck_stats import build_deck_store, deck_statistics, deck_values
+from   modules.utils_keys       import KeyRegistry, encode_key_columns
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Cards of the test decks: a land, two spells and a card missing from the cards table
+cards = pd.DataFrame({'CARD_UUID'     : ['u-land', 'u-bolt', 'u-golem']
+                     ,'MANA_VALUE'    : [0.0, 1.0, 4.0]
+                     ,'RARITY'        : ['common', 'common', 'uncommon']
+                     ,'COLORS'        : [[], ['R'], []]
+                     ,'TYPES'         : [['Land'], ['Instant'], ['Artifact', 'Creature']]
+                     ,'PRODUCED_MANA' : [['R'], None, None]})
+
+# Deck lists with the column names of `deck_board_table`
+deck_cards = pd.DataFrame({'SET_CODE'   : ['AAA', 'AAA', 'AAA', 'BBB', 'BBB']
+                          ,'DECK_NAME'  : ['Burn', 'Burn', 'Burn', 'Golems', 'Golems']
+                          ,'CARD'       : ['u-land', 'u-bolt', 'u-missing', 'u-land', 'u-golem']
+                          ,'CARD_COUNT' : [20, 4, 1, 17, 3]})
+
+# Non-foil prices of the cards
+prices = pd.DataFrame({'CARD_UUID' : ['u-land', 'u-bolt', 'u-golem']
+                      ,'PRICE'     : [0.1, 2.0, 0.5]})
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Statistics and values of the test decks built from uuid columns
+def test_deck_statistics_from_uuids():
+
+    df = deck_statistics(build_deck_store(deck_cards, cards))
+
+    assert df['SET_CODE'].tolist()     == ['AAA', 'BBB']
+    assert df['CARD_COUNT'].tolist()   == [25, 20]
+    assert df['UNIQUE_CARDS'].tolist() == [3, 2]
+    assert df['LAND_COUNT'].tolist()   == [20, 17]
+    assert df['AVERAGE_MANA_VALUE'].tolist() == [1.0, 4.0]
+    assert df['COLOR_R'].tolist()      == [4, 0]
+    assert df['TYPE_CREATURE'].tolist() == [0, 3]
+
+
+
+# The store built from `encode_key_columns` output matches the one built from uuids
+def test_deck_store_from_encoded_keys():
+
+    expected = deck_statistics(build_deck_store(deck_cards, cards))
+    values   = deck_values(build_deck_store(deck_cards, cards), prices)
+
+    registry = KeyRegistry()
+    df_cards = encode_key_columns(cards, registry)
+    df_decks = encode_key_columns(deck_cards.rename(columns = {'CARD' : 'CARD_UUID'}), registry).rename(columns = {'CARD_UUID' : 'CARD'})
+    n_uuids  = len(registry.values['uuid'])
+
+    store = build_deck_store(df_decks, df_cards, registry = registry)
+    pd.testing.assert_frame_equal(deck_statistics(store), expected, check_dtype = False)
+    np.testing.assert_allclose(deck_values(store, encode_key_columns(prices, registry))['DECK_VALUE'], values['DECK_VALUE'])
+
+    # The integer keys were read as keys, not interned as new uuids
+    assert len(registry.values['uuid']) == n_uuids
+
+
+
+# Integer keys from another registry are refused instead of read as unknown cards
+def test_deck_store_rejects_foreign_keys():
+
+    registry = KeyRegistry()
+    df_decks = encode_key_columns(deck_cards.rename(columns = {'CARD' : 'CARD_UUID'}), registry).rename(columns = {'CARD_UUID' : 'CARD'})
+
+    with pytest.raises(ValueError):
+        build_deck_store(df_decks, cards)
@@ -0,0 +1,194 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+import os
+import json
+import hashlib
+import threading
+from   http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Testing libraries
+import pytest
+
+# Modular functions
+from   modules.utils_download import download_file, iter_download_chunks, partial_suffix, validators_suffix, remote_file_changed
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Payload served by the test server (incompressible, a few chunks long)
+payload = os.urandom(256 * 1024 + 123)
+
+# Number of bytes sent before the server drops the first full-file response
+drop_after = 100 * 1024
+
+# ETag of the version of the file being served
+etag = '"v2"'
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Request handler serving `payload` with Range support and one dropped connection
+class _RangeHandler(BaseHTTPRequestHandler):
+
+    # Range headers of every request for the payload, shared with the test
+    ranges = []
+
+    # Whether the first full-file response is still to be dropped
+    drop = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+
+        # Serving the published checksum next to the file
+        if self.path.endswith('.sha256'):
+            body = (hashlib.sha256(payload).hexdigest() + '  file.bin\n').encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        requested = self.headers.get('Range')
+        type(self).ranges.append(requested)
+
+        # Answering a conditional request for the current version with 304
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        # Ignoring the Range of a resume for another version, as If-Range requires
+        if requested and self.headers.get('If-Range', etag) != etag:
+            requested = None
+
+        # Answering 416 (without validators) when the client already holds every byte
+        if requested:
+            start = int(requested.split('=')[1].split('-')[0])
+            if start >= len(payload):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(payload)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Range', f'bytes {start}-{len(payload) - 1}/{len(payload)}')
+            self.send_header('Content-Length', str(len(payload) - start))
+            self.end_headers()
+            self.wfile.write(payload[start:])
+            return
+
+        # Announcing the whole file but closing the connection part way through the first time
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if not type(self).drop:
+            self.wfile.write(payload)
+            return
+        type(self).drop = False
+        self.wfile.write(payload[:drop_after])
+        self.wfile.flush()
+        self.close_connection = True
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+
+
+
+# Fixture running the server on a free local port
+@pytest.fixture
+def server_url():
+    _RangeHandler.ranges = []
+    _RangeHandler.drop   = True
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/file.bin'
+    server.shutdown()
+    server.server_close()
+
+
+
+# Test: a dropped connection is resumed with a Range request from the last complete chunk
+def test_iter_download_chunks_resumes_after_drop(server_url):
+    hasher = hashlib.sha256()
+    data   = b''.join(iter_download_chunks(server_url, hasher = hasher, chunk_size = 16 * 1024, backoff = 0))
+    assert data == payload
+    assert hasher.hexdigest() == hashlib.sha256(payload).hexdigest()
+    assert _RangeHandler.ranges[0] is None
+    assert 0 < int(_RangeHandler.ranges[1].split('=')[1].rstrip('-')) <= drop_after
+
+
+
+# Test: download_file resumes the dropped transfer and verifies the published SHA-256
+def test_download_file_matches_sha256(server_url, tmp_path):
+    path = str(tmp_path / 'file.bin')
+    download_file(server_url, path, chunk_size = 16 * 1024, progress = False)
+    with open(path, 'rb') as f:
+        assert hashlib.sha256(f.read()).hexdigest() == hashlib.sha256(payload).hexdigest()
+    assert not os.path.exists(path + partial_suffix)
+    assert len(_RangeHandler.ranges) == 2
+
+
+
+# Writing a partial download of the given version
+def _write_partial(path, data, version):
+    with open(path + partial_suffix, 'wb') as f:
+        f.write(data)
+    with open(path + partial_suffix + validators_suffix, 'w') as f:
+        json.dump({'etag' : version, 'last_modified' : None}, f)
+
+
+
+# Test: a 416 for a partial file that is already complete finishes the download and keeps its validators
+def test_download_file_handles_416(server_url, tmp_path):
+    path = str(tmp_path / 'file.bin')
+    _write_partial(path, payload, etag)
+    download_file(server_url, path, progress = False)
+    with open(path, 'rb') as f:
+        assert f.read() == payload
+    assert _RangeHandler.ranges == [f'bytes={len(payload)}-']
+    with open(path + validators_suffix) as f:
+        assert json.load(f)['etag'] == etag
+    assert not remote_file_changed(server_url, path)
+
+
+
+# Test: a partial file of an older version is discarded instead of completed with the new version
+def test_download_file_discards_stale_partial(server_url, tmp_path):
+    path = str(tmp_path / 'file.bin')
+    _write_partial(path, b'x' * 1000, '"v1"')
+    _RangeHandler.drop = False
+    download_file(server_url, path, sha256 = False, progress = False)
+    with open(path, 'rb') as f:
+        assert f.read() == payload
+    assert _RangeHandler.ranges == ['bytes=1000-', None]
+    assert not os.path.exists(path + partial_suffix + validators_suffix)
+
+
+
+# Test: a partial file without validators is discarded, as its version is unknown
+def test_download_file_discards_unversioned_partial(server_url, tmp_path):
+    path = str(tmp_path / 'file.bin')
+    with open(path + partial_suffix, 'wb') as f:
+        f.write(b'x' * 1000)
+    _RangeHandler.drop = False
+    download_file(server_url, path, sha256 = False, progress = False)
+    with open(path, 'rb') as f:
+        assert f.read() == payload
+    assert _RangeHandler.ranges == [None]
@@ -0,0 +1,114 @@
+###################################################################################################
+# -------------------------------------- PYTHON LIBRARIES --------------------------------------- #
+###################################################################################################
+
+# Standard libraries
+from   itertools import combinations, product
+from   math      import comb
+
+# Data libraries
+import numpy  as np
+import pandas as pd
+
+# Modular functions
+from   modules.utils_deck_stats import build_deck_store
+from   modules.utils_draws      import _exact_keep_rates, _simulated_keep_rates, draw_statistics, draws__keep_lands
+
+
+
+###################################################################################################
+# ------------------------------------------ VARIABLES ------------------------------------------ #
+###################################################################################################
+
+# Colour bits of the hand-built classes
+white, red = 1, 8
+
+# Classes (LAND, PRODUCED, COLORS, COUNT) of a two-colour deck: white, red and dual lands, then cheap white and red spells
+classes = np.array([[1, white,       0,     8]
+                   ,[1, red,         0,     7]
+                   ,[1, white | red, 0,     4]
+                   ,[0, 0,           white, 20]
+                   ,[0, 0,           red,   21]], dtype = np.int64)
+
+# Hands simulated by the brute-force check
+samples = 200_000
+
+
+
+###################################################################################################
+# ------------------------------------------ FUNCTIONS ------------------------------------------ #
+###################################################################################################
+
+# Keep flag of every hand, written out card by card independently of `_keep_hands`
+def _brute_keep(land, produced, colours, keep_lands=draws__keep_lands):
+    n_lands   = (land == 1).sum(axis = 1)
+    available = np.bitwise_or.reduce(np.where(land == 1, produced, 0), axis = 1)
+    castable  = np.zeros(len(land), dtype = bool)
+    for card in range(land.shape[1]):
+        castable |= (land[:, card] == 0) & ((colours[:, card] | available) == available)
+    return (n_lands >= keep_lands[0]) & (n_lands <= keep_lands[1]) & castable
+
+
+
+# Exact keep rate of classes, as `draw_statistics` calls it
+def _exact(classes, hand_size=7):
+    land, produced, colours, counts = classes.T[:, None, :]
+    return _exact_keep_rates(counts, land, produced, colours, hand_size, draws__keep_lands)[0]
+
+
+
+# Test: the enumerated keep rate equals the share of kept hands over every hand of a small deck
+def test_exact_keep_rate_matches_every_hand():
+    small = np.array([[1, white, 0, 3], [1, red, 0, 2], [0, 0, white, 3], [0, 0, red, 2], [0, 0, white | red, 2]], dtype = np.int64)
+    cards = np.repeat(small, small[:, 3], axis = 0)
+    hands = np.array(list(combinations(range(len(cards)), 7)))
+    kept  = _brute_keep(cards[hands, 0], cards[hands, 1], cards[hands, 2]).mean()
+    assert abs(_exact(small) - kept) < 1e-12
+
+
+
+# Test: the enumerated and Monte Carlo keep rates agree with a brute-force simulation of a 60-card deck
+def test_exact_keep_rate_matches_simulation():
+    cards = np.repeat(classes, classes[:, 3], axis = 0)
+    hands = np.random.default_rng(0).random((samples, len(cards))).argsort(axis = 1)[:, :7]
+    kept  = _brute_keep(cards[hands, 0], cards[hands, 1], cards[hands, 2]).mean()
+    exact = _exact(classes)
+
+    # Four standard errors of the simulated share
+    tolerance = 4 * np.sqrt(exact * (1 - exact) / samples)
+    assert abs(exact - kept) < tolerance
+
+    simulated = _simulated_keep_rates(classes, np.array([len(classes)]), ['0' * 64], 7, draws__keep_lands, samples, 0)[0]
+    assert abs(exact - simulated) < tolerance
+
+
+
+# Test: COLORS_T<n> equals the direct hypergeometric probability of a white and a red source among the cards seen
+def test_colour_probabilities_match_hypergeometric():
+    names   = ['Plains', 'Mountain', 'Dual', 'White Spell', 'Red Spell']
+    df_card = pd.DataFrame({'CARD_UUID'     : names
+                           ,'MANA_VALUE'    : [0.0, 0.0, 0.0, 1.0, 2.0]
+                           ,'RARITY'        : ['common'] * 5
+                           ,'COLORS'        : [[], [], [], ['W'], ['R']]
+                           ,'TYPES'         : [['Land'], ['Land'], ['Land'], ['Instant'], ['Sorcery']]
+                           ,'PRODUCED_MANA' : [['W'], ['R'], ['W', 'R'], None, None]})
+    df_deck = pd.DataFrame({'SET_CODE'   : 'AAA'
+                           ,'DECK_NAME'  : 'Boros'
+                           ,'CARD'       : names
+                           ,'CARD_COUNT' : classes[:, 3]})
+
+    df = draw_statistics(build_deck_store(df_deck, df_card), turns = 3)
+
+    # Summing the multivariate hypergeometric probability of the white, red, dual and other cards drawn
+    plains, mountains, duals, others = classes[0, 3], classes[1, 3], classes[2, 3], classes[3:, 3].sum()
+    deck_size                        = classes[:, 3].sum()
+    for turn in range(1, 4):
+        seen   = 7 + turn - 1
+        direct = sum(comb(plains, w) * comb(mountains, r) * comb(duals, d) * comb(others, seen - w - r - d)
+                     for w, r, d in product(range(seen + 1), repeat = 3)
+                     if w + r + d <= seen and w + d > 0 and r + d > 0) / comb(deck_size, seen)
+        assert abs(df[f'COLORS_T{turn}'].iloc[0] - direct) < 1e-9
+
+    assert df['DECK_COLORS'].iloc[0] == 'WR'
+    assert df['KEEP_METHOD'].iloc[0] == 'exact'
+    assert abs(df['KEEP_RATE'].iloc[0] - _exact(classes)) < 1e-12